@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""
+Measure how long each script spends importing modules before it can do
+anything, by starting it with `python -X importtime SCRIPT --help` and
+parsing the report. Scripts over their startup budget are listed and the
+exit status is 1.
+"""
+
+import argparse
+import subprocess
+import sys
+
+from pathlib import Path
+
+
+repo_root = Path(__file__).resolve().parents[0]
+# Import time budget in ms for a script's usage or --help path; modules the
+#   interpreter loads before any script runs aren't counted.
+DEFAULT_BUDGET_MS = 50
+# Per-script overrides of DEFAULT_BUDGET_MS, by script name.
+BUDGETS_MS = {}
+
+
+def parse_importtime(stderr):
+    """
+    Return a list of (name, self_us, cumulative_us, level) from the stderr of
+    `python -X importtime`; level 0 is imported directly by the script (or
+    by the interpreter).
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # Header line.
+            continue
+        name = parts[2][1:]
+        level = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(parts[0]), int(parts[1]), level))
+    return imports
+
+def run_importtime(args):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        cwd=repo_root,
+        text=True,
+    )
+    return parse_importtime(result.stderr)
+
+def get_startup_modules():
+    """Return the names of the modules the interpreter imports on its own."""
+    return {name for name, s, c, level in run_importtime(['-c', 'pass']) if level == 0}
+
+def measure_script(script, args, startup_modules, repeat):
+    """
+    Return the script's total import time in µs (best of repeat runs) and
+    its heaviest top-level imports from that run.
+    """
+    best = None
+    for n in range(repeat):
+        imports = [i for i in run_importtime([str(script)] + args) if i[3] == 0 and i[0] not in startup_modules]
+        total = sum(i[2] for i in imports)
+        if best is None or total < best[0]:
+            best = (total, sorted(imports, key=lambda i: i[2], reverse=True))
+    return best
+
+def get_scripts(names):
+    if names:
+        return [repo_root / (n if n.endswith('.py') else f"{n}.py") for n in names]
+    return [f for f in sorted(repo_root.glob('*.py')) if "__name__ == '__main__'" in f.read_text()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('scripts', nargs='*', help="scripts to check [default: all scripts]")
+    parser.add_argument('-a', '--args', default='--help', help="arguments to start each script with [%(default)s]")
+    parser.add_argument('-b', '--budget', type=float, help="budget in ms for every script, instead of the per-script budgets")
+    parser.add_argument('-r', '--repeat', type=int, default=5, help="runs per script; the fastest one counts [%(default)s]")
+    parser.add_argument('-n', '--top', type=int, default=3, help="number of heaviest imports to show [%(default)s]")
+    args = parser.parse_args()
+
+    scripts = get_scripts(args.scripts)
+    for s in scripts:
+        if not s.is_file():
+            print(f"Error: {s} does not exist.")
+            exit(1)
+
+    startup_modules = get_startup_modules()
+    over = []
+    width = max(len(s.stem) for s in scripts)
+    for s in scripts:
+        total, imports = measure_script(s, args.args.split(), startup_modules, max(1, args.repeat))
+        budget = args.budget or BUDGETS_MS.get(s.stem, DEFAULT_BUDGET_MS)
+        ms = total / 1000
+        status = 'ok' if ms <= budget else 'OVER'
+        if status == 'OVER':
+            over.append(s.stem)
+        heaviest = ', '.join(f"{name} {c / 1000:.1f}" for name, _, c, _ in imports[:args.top])
+        print(f"{s.stem:<{width}}  {ms:6.1f} ms / {budget:g} ms  {status:<4}  {heaviest}")
+
+    if over:
+        print(f"\n{len(over)} scripts over their startup budget: {', '.join(over)}")
+        exit(1)
+    print(f"\nAll {len(scripts)} scripts within their startup budget.")
+
+
+if __name__ == '__main__':
+    main()
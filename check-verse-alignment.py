@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+"""
+Check that the verses of two SFM files (e.g. SAB and EAB, after
+harmonize-verse-markers.py) correspond, and list the most doubtful verses.
+
+Each verse pair is scored by how far its character and token length ratios
+are from the median ratio of its chapter, and by mismatched numbers and
+proper names. Missing and empty verses are listed first.
+"""
+
+import argparse
+import difflib
+import re
+import sfmutils
+import textutils
+
+from pathlib import Path
+
+
+book = 'XXA'
+# Robust z-score above which a length ratio is flagged.
+Z_THRESHOLD = 3.5
+# Similarity above which two proper names are taken as the same name.
+NAME_SIMILARITY = 0.6
+# Score added for each unmatched number or proper name.
+NUMBER_WEIGHT = 2.0
+NAME_WEIGHT = 1.0
+
+regex_number = re.compile(r'[0-9]+')
+regex_sentence_end = re.compile(r'[.!?:;«»“”"]$')
+
+
+def iter_verses(infile):
+    """
+    Yield (chapter, verse, text) for each verse of an SFM file, including
+    empty verses. Text before a chapter's first verse is verse 0.
+    """
+    key = None
+    parts = []
+    for i, line in enumerate(sfmutils.iter_lines(infile), 1):
+        marker, text = sfmutils.parse_line(line)
+        if marker in ['c', 'v']:
+            num, text = sfmutils.split_number(text)
+            m = sfmutils.regex_verse_number.match(num)
+            if not m:
+                continue
+            if key is not None and (key[1] > 0 or parts):
+                yield key[0], key[1], ' '.join(parts)
+            if marker == 'c':
+                key = (int(m.group(1)), 0)
+            else:
+                key = (key[0] if key else 0, int(m.group(1)))
+            parts = []
+        elif marker == 'id':
+            continue
+        if text.strip():
+            parts.append(textutils.normalize(text.strip()))
+    if key is not None and (key[1] > 0 or parts):
+        yield key[0], key[1], ' '.join(parts)
+
+def iter_verse_pairs(base_verses, target_verses):
+    """
+    Walk two verse streams in lockstep, yielding (chapter, verse, base_text,
+    target_text); text is None where a file lacks the verse.
+    """
+    b = next(base_verses, None)
+    t = next(target_verses, None)
+    while b is not None or t is not None:
+        if t is None or (b is not None and b[:2] < t[:2]):
+            yield b[0], b[1], b[2], None
+            b = next(base_verses, None)
+        elif b is None or t[:2] < b[:2]:
+            yield t[0], t[1], None, t[2]
+            t = next(target_verses, None)
+        else:
+            yield b[0], b[1], b[2], t[2]
+            b = next(base_verses, None)
+            t = next(target_verses, None)
+
+def get_numbers(text):
+    return set(regex_number.findall(text))
+
+def get_proper_names(text):
+    """Return capitalized words that don't start a sentence, folded for comparison."""
+    names = set()
+    after_end = True
+    for w in text.split():
+        t = textutils.normalize_token(w)
+        if t and w.lstrip('«“"‘(')[:1].isupper() and not after_end:
+            names.add(textutils.fold_diacritics(t))
+        after_end = bool(regex_sentence_end.search(w))
+    return names
+
+def count_unmatched_names(names, other_names):
+    """Count names without a similar name on the other side (e.g. Moses ~ Moïze)."""
+    ct = 0
+    for n in names:
+        if not any(difflib.SequenceMatcher(None, n, o).ratio() >= NAME_SIMILARITY for o in other_names):
+            ct += 1
+    return ct
+
+def collect_features(pairs):
+    """Return the verse refs, texts, and a dict of per-verse numpy feature arrays."""
+    # numpy is slow to import, so it's only imported once there's work.
+    import numpy as np
+
+    refs = []
+    texts = []
+    cols = {k: [] for k in ['b_chars', 'b_tokens', 't_chars', 't_tokens', 'numbers', 'names', 'missing']}
+    for chapter, verse, b_text, t_text in pairs:
+        refs.append((chapter, verse))
+        texts.append((b_text, t_text))
+        # 1: missing in base; 2: missing in target; 3: empty in either.
+        if b_text is None:
+            missing = 1
+        elif t_text is None:
+            missing = 2
+        elif not b_text or not t_text:
+            missing = 3
+        else:
+            missing = 0
+        b_text = b_text or ''
+        t_text = t_text or ''
+        cols['missing'].append(missing)
+        cols['b_chars'].append(len(b_text))
+        cols['t_chars'].append(len(t_text))
+        cols['b_tokens'].append(sum(1 for t in textutils.tokenize(b_text)))
+        cols['t_tokens'].append(sum(1 for t in textutils.tokenize(t_text)))
+        if missing:
+            cols['numbers'].append(0)
+            cols['names'].append(0)
+            continue
+        cols['numbers'].append(len(get_numbers(b_text) ^ get_numbers(t_text)))
+        b_names = get_proper_names(b_text)
+        t_names = get_proper_names(t_text)
+        cols['names'].append(count_unmatched_names(b_names, t_names) + count_unmatched_names(t_names, b_names))
+    features = {k: np.array(v, dtype=np.int64) for k, v in cols.items()}
+    features['chapter'] = np.array([r[0] for r in refs], dtype=np.int64)
+    return refs, texts, features
+
+def get_group_medians(values, groups):
+    """Return the median of values within each group, broadcast back to each item."""
+    import numpy as np
+
+    _, inverse, counts = np.unique(groups, return_inverse=True, return_counts=True)
+    order = np.lexsort((values, inverse))
+    ordered = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    medians = (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
+    return medians[inverse]
+
+def get_robust_z(values, groups, mask):
+    """
+    Robust z-scores of values centered on each chapter's median. Chapters are
+    short, so the spread (MAD) is taken over the whole book.
+    """
+    import numpy as np
+
+    z = np.zeros(len(values))
+    if not mask.any():
+        return z
+    v = values[mask]
+    centered = v - get_group_medians(v, groups[mask])
+    mad = np.median(np.abs(centered)) * 1.4826
+    z[mask] = centered / mad if mad > 0 else 0
+    return z
+
+def score_verses(features):
+    """Return (score, char_z, token_z) arrays; missing and empty verses score inf."""
+    import numpy as np
+
+    ok = features['missing'] == 0
+    char_ratio = np.log((features['b_chars'] + 1) / (features['t_chars'] + 1))
+    token_ratio = np.log((features['b_tokens'] + 1) / (features['t_tokens'] + 1))
+    char_z = get_robust_z(char_ratio, features['chapter'], ok)
+    token_z = get_robust_z(token_ratio, features['chapter'], ok)
+    score = (
+        np.maximum(np.abs(char_z), np.abs(token_z))
+        + NUMBER_WEIGHT * features['numbers']
+        + NAME_WEIGHT * features['names']
+    )
+    score[~ok] = np.inf
+    return score, char_z, token_z
+
+def get_reasons(i, features, char_z, token_z):
+    reasons = []
+    missing = features['missing'][i]
+    if missing == 1:
+        reasons.append('missing in base')
+    elif missing == 2:
+        reasons.append('missing in target')
+    elif missing == 3:
+        reasons.append('empty')
+    if abs(char_z[i]) >= Z_THRESHOLD:
+        reasons.append('char length')
+    if abs(token_z[i]) >= Z_THRESHOLD:
+        reasons.append('token length')
+    if features['numbers'][i]:
+        reasons.append('numbers')
+    if features['names'][i]:
+        reasons.append('names')
+    return reasons
+
+def write_report(outfile, refs, texts, features, scores, char_z, token_z, top):
+    import numpy as np
+
+    order = np.argsort(-scores, kind='stable')
+    lines = ["ref\tscore\treasons\tchar_z\ttoken_z\tbase\ttarget"]
+    ct = 0
+    for i in order:
+        reasons = get_reasons(i, features, char_z, token_z)
+        if not reasons:
+            continue
+        if top and ct >= top:
+            break
+        b_text, t_text = texts[i]
+        score = 'inf' if np.isinf(scores[i]) else f"{scores[i]:.1f}"
+        lines.append(
+            f"{sfmutils.format_ref(book, *refs[i])}\t{score}\t{', '.join(reasons)}\t"
+            f"{char_z[i]:.1f}\t{token_z[i]:.1f}\t{b_text or ''}\t{t_text or ''}"
+        )
+        ct += 1
+    outfile.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return ct
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('basefile', help="SFM file, e.g. 94XXASAB.SFM")
+    parser.add_argument('targetfile', help="SFM file with the same verse markers, e.g. 94XXAEAB.SFM")
+    parser.add_argument('-n', '--top', type=int, default=0, help="only list the N worst verses")
+    parser.add_argument('-o', '--outfile', help="report file [default: BASE_TARGET_alignment-check.tsv]")
+    args = parser.parse_args()
+
+    basefile = Path(args.basefile)
+    targetfile = Path(args.targetfile)
+    for f in [basefile, targetfile]:
+        if not f.is_file():
+            print(f"Error: {f} does not exist.")
+            exit(1)
+    basefile = basefile.resolve()
+    targetfile = targetfile.resolve()
+    if args.outfile:
+        outfile = Path(args.outfile)
+    else:
+        outfile = basefile.with_name(f"{basefile.stem}_{targetfile.stem}_alignment-check.tsv")
+
+    pairs = iter_verse_pairs(iter_verses(basefile), iter_verses(targetfile))
+    refs, texts, features = collect_features(pairs)
+    if not refs:
+        print("Error: No verses found.")
+        exit(1)
+    scores, char_z, token_z = score_verses(features)
+    ct = write_report(outfile, refs, texts, features, scores, char_z, token_z, args.top)
+
+    missing = int((features['missing'] > 0).sum())
+    print(f"{len(refs)} verses compared; {missing} missing or empty.")
+    print(f"{ct} doubtful verses written to {outfile}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,8 @@ def get_info_dict(text):
     text_info = {}
     ch = 0
     for i, line in enumerate(text.splitlines()):
+        if not line.strip():
+            continue
         start = line.split()[0]
         valid_lines = [
             '\p',
@@ -38,9 +40,12 @@ def get_info_dict(text):
             except ValueError as e:
                 print(e)
                 print(f"\c {ch}: {line}")
+                print("Run validate-sfm.py to list all marker problems.")
                 exit(1)
             text_info[ch]['verses'][vn] = text_info[ch]['paragraph-count'] - 1
-            text_info[ch]['paragraphs'][-1] = f"\p\n{line}"
+            # A verse can come before the chapter's first paragraph in freshly converted files.
+            if text_info[ch]['paragraphs']:
+                text_info[ch]['paragraphs'][-1] = f"\p\n{line}"
     return text_info
 
 def verify_paragraph_count(binfo, tinfo):
@@ -65,15 +70,8 @@ def get_total_paragraph_count(info):
         pct += values.get('paragraph-count')
     return pct
 
-def main():
-    # Parse arguments.
-    args = sys.argv[1:]
-    if len(args) != 2:
-        print("Error: This script requires 2 input files as arguments: SAB.SFM EAB.SFM")
-        exit(1)
-    basefile, targetfile = args
-    basefile = p(basefile).resolve()
-    targetfile = p(targetfile).resolve()
+def get_report_lines(basefile, targetfile):
+    """Return the paragraph count comparison of two SFM files as lines of text."""
     base_name = basefile.stem.strip('94XXA')
     target_name = targetfile.stem.strip('94XXA')
 
@@ -88,16 +86,31 @@ def main():
     targetinfo = get_info_dict(targettext)
 
     # Check paragraph counts.
+    lines = []
     mismatched_paragraphs = verify_paragraph_count(baseinfo, targetinfo)
     mp_rev = [k for k in mismatched_paragraphs.keys()]
     for mp in mp_rev[::-1]:
         v = mismatched_paragraphs.get(mp)
-        print(f"\c {mp:3}:\t\tdiff: {v.get('diff'):4}\t{base_name}: {v.get('base'):5}\t{target_name}: {v.get('target'):5}")
+        lines.append(f"\\c {mp:3}:\t\tdiff: {v.get('diff'):4}\t{base_name}: {v.get('base'):5}\t{target_name}: {v.get('target'):5}")
     total_p_base = get_total_paragraph_count(baseinfo)
     total_p_target = get_total_paragraph_count(targetinfo)
     total_p_diff = total_p_base - total_p_target
-    print(f"Total ps:\tdiff: {total_p_diff:4}\t{base_name}: {total_p_base:5}\t{target_name}: {total_p_target:5}")
-    print(f"Total lines:\tdiff: {len_base-len_target:4}\t{base_name}: {len_base:5}\t{target_name}: {len_target:5}")
+    lines.append(f"Total ps:\tdiff: {total_p_diff:4}\t{base_name}: {total_p_base:5}\t{target_name}: {total_p_target:5}")
+    lines.append(f"Total lines:\tdiff: {len_base-len_target:4}\t{base_name}: {len_base:5}\t{target_name}: {len_target:5}")
+    return lines
+
+def main():
+    # Parse arguments.
+    args = sys.argv[1:]
+    if len(args) != 2:
+        print("Error: This script requires 2 input files as arguments: SAB.SFM EAB.SFM")
+        exit(1)
+    basefile, targetfile = args
+    basefile = p(basefile).resolve()
+    targetfile = p(targetfile).resolve()
+
+    for line in get_report_lines(basefile, targetfile):
+        print(line)
     exit(1)
 
 
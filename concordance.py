@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+"""
+Build and query a word concordance of SFM files.
+
+    concordance.py build FILE.SFM [FILE.SFM ...]
+    concordance.py query WORD [--prefix] [--fold] [--book NAME]
+
+The index is an SQLite file of normalized token -> (book, chapter, verse,
+offset) postings. Rebuilding only re-indexes files whose content changed.
+"""
+
+import argparse
+import hashlib
+import sfmutils
+import sqlite3
+import textutils
+import time
+
+from pathlib import Path
+
+
+repo_root = Path(__file__).resolve().parents[0]
+default_index = repo_root / '.cache' / 'concordance.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    name TEXT PRIMARY KEY,
+    path TEXT,
+    size INTEGER,
+    mtime INTEGER,
+    sha1 TEXT
+);
+CREATE TABLE IF NOT EXISTS verses (
+    book TEXT,
+    chapter INTEGER,
+    verse INTEGER,
+    text TEXT,
+    PRIMARY KEY (book, chapter, verse)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT,
+    folded TEXT,
+    book TEXT,
+    chapter INTEGER,
+    verse INTEGER,
+    offset INTEGER
+);
+CREATE INDEX IF NOT EXISTS postings_token ON postings (token);
+CREATE INDEX IF NOT EXISTS postings_folded ON postings (folded);
+CREATE INDEX IF NOT EXISTS postings_book ON postings (book);
+"""
+
+
+def open_index(index_file):
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(index_file)
+    db.executescript(SCHEMA)
+    return db
+
+def get_file_sha1(infile):
+    h = hashlib.sha1()
+    with open(infile, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def is_up_to_date(db, name, infile):
+    """
+    Check size and mtime first, and only hash the file if they changed. If
+    the hash still matches, the new size and mtime are stored.
+    """
+    row = db.execute("SELECT size, mtime, sha1 FROM books WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        return False, None
+    stat = infile.stat()
+    if row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+        return True, row[2]
+    sha1 = get_file_sha1(infile)
+    if sha1 != row[2]:
+        return False, sha1
+    # Touched but unchanged; store the new mtime so it isn't hashed again.
+    with db:
+        db.execute("UPDATE books SET size = ?, mtime = ? WHERE name = ?", (stat.st_size, stat.st_mtime_ns, name))
+    return True, sha1
+
+def iter_verses(infile):
+    """Yield (chapter, verse, text) with each verse's lines joined by spaces."""
+    key = None
+    parts = []
+    for i, chapter, verse, text in sfmutils.iter_verse_text(sfmutils.iter_lines(infile)):
+        if (chapter, verse) != key:
+            if parts:
+                yield key[0], key[1], ' '.join(parts)
+            key = (chapter, verse)
+            parts = []
+        parts.append(textutils.normalize(text.strip()))
+    if parts:
+        yield key[0], key[1], ' '.join(parts)
+
+def index_book(db, name, infile, sha1):
+    stat = infile.stat()
+    with db:
+        db.execute("DELETE FROM postings WHERE book = ?", (name,))
+        db.execute("DELETE FROM verses WHERE book = ?", (name,))
+        verses = {}
+        for chapter, verse, text in iter_verses(infile):
+            # A verse split by another marker is kept together.
+            key = (chapter, verse)
+            if key in verses:
+                text = f"{verses.get(key)} {text}"
+            verses[key] = text
+        for (chapter, verse), text in verses.items():
+            db.execute("INSERT INTO verses VALUES (?, ?, ?, ?)", (name, chapter, verse, text))
+            db.executemany(
+                "INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?)",
+                ((t, textutils.fold_diacritics(t), name, chapter, verse, o) for t, o in textutils.iter_token_offsets(text))
+            )
+        db.execute(
+            "INSERT OR REPLACE INTO books VALUES (?, ?, ?, ?, ?)",
+            (name, str(infile), stat.st_size, stat.st_mtime_ns, sha1 or get_file_sha1(infile))
+        )
+
+def build(db, infiles):
+    for infile in infiles:
+        infile = Path(infile).resolve()
+        if not infile.is_file():
+            print(f"Error: {infile} does not exist.")
+            continue
+        name = infile.stem
+        up_to_date, sha1 = is_up_to_date(db, name, infile)
+        if up_to_date:
+            print(f"{name}: up to date.")
+            continue
+        start = time.perf_counter()
+        index_book(db, name, infile, sha1)
+        ct = db.execute("SELECT COUNT(*) FROM postings WHERE book = ?", (name,)).fetchone()[0]
+        print(f"{name}: {ct} tokens indexed in {time.perf_counter() - start:.2f} s.")
+
+def query(db, word, prefix=False, fold=False, book=None):
+    token = textutils.normalize_token(word)
+    column = 'token'
+    if fold:
+        token = textutils.fold_diacritics(token)
+        column = 'folded'
+    if prefix:
+        # Range scan on the index instead of LIKE, which SQLite can't always index.
+        where = f"p.{column} >= ? AND p.{column} < ?"
+        params = [token, token + '\U0010ffff']
+    else:
+        where = f"p.{column} = ?"
+        params = [token]
+    if book:
+        where += " AND p.book = ?"
+        params.append(book)
+    sql = f"""
+        SELECT p.token, p.book, p.chapter, p.verse, p.offset, v.text
+        FROM postings p JOIN verses v
+            ON v.book = p.book AND v.chapter = p.chapter AND v.verse = p.verse
+        WHERE {where}
+        ORDER BY p.book, p.chapter, p.verse, p.offset
+    """
+    return db.execute(sql, params).fetchall()
+
+def format_hit(hit, width=30):
+    token, book, chapter, verse, offset, text = hit
+    before = text[max(0, offset - width):offset].rjust(width)
+    after = text[offset:offset + len(token) + width]
+    return f"{book} {chapter}:{verse}\t{before}{after}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-i', '--index', default=str(default_index), help="index file [%(default)s]")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help="index or re-index SFM files")
+    p_build.add_argument('infiles', nargs='+', help="SFM files")
+    p_query = sub.add_parser('query', help="look up a word")
+    p_query.add_argument('word')
+    p_query.add_argument('-p', '--prefix', action='store_true', help="match words starting with WORD")
+    p_query.add_argument('-f', '--fold', action='store_true', help="ignore diacritics")
+    p_query.add_argument('-b', '--book', help="limit to one book (file stem, e.g. 94XXASAB)")
+    args = parser.parse_args()
+
+    db = open_index(Path(args.index))
+    if args.command == 'build':
+        build(db, args.infiles)
+    elif args.command == 'query':
+        start = time.perf_counter()
+        hits = query(db, args.word, args.prefix, args.fold, args.book)
+        elapsed = time.perf_counter() - start
+        for hit in hits:
+            print(format_hit(hit))
+        print(f"\n{len(hits)} hits in {elapsed*1000:.1f} ms.")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
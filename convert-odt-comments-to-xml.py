@@ -7,6 +7,9 @@ Extract comments from ODT file and output as Paratext XML comments.
 # References:
 #   https://github.com/eea/odfpy/wiki
 
+import diffutils
+import irutils
+import memutils
 import odfutils
 import random
 import re
@@ -18,10 +21,10 @@ from pathlib import Path
 
 def verify_infile_as_arg(script_args):
     # Ensure that a file was passed as an argument.
-    if len(script_args) > 1 and Path(script_args[1]).suffix == '.odt':
+    if len(script_args) > 1 and Path(script_args[1]).suffix in ['.odt', irutils.IR_SUFFIX]:
         infile = Path(script_args[1]).resolve()
     else:
-        print("Error: Need to pass an ODT file as the first argument.")
+        print("Error: Need to pass an ODT or IR (.jsonl) file as the first argument.")
         exit(1)
 
     if not infile.is_file():
@@ -138,7 +141,11 @@ def append_comment(comment_count, comments, paragraph, verse_ref, doc_content):
 
     return comment_count, comments, doc_content
 
-def extract_comments(doc, book):
+def extract_comments(doc, book, paragraphs=None):
+    """
+    Gather comments and verse text from an ODT document. If paragraphs is
+    given, only comments in those paragraphs are gathered.
+    """
     doc_content = {0: {1: []}}
     comments = {}
     ch_pat = '\s*[Pp][0-9]{2,3}'
@@ -150,7 +157,7 @@ def extract_comments(doc, book):
     verse = 1
     comment_count = 0
     ct = 0
-    for p in doc.body.getElementsByType(odfutils.P):
+    for p in odfutils.get_text_paragraphs(doc):
         if not str(p): # blank line
             continue
         ch_match = ch_pat_bytes.search(str(p))
@@ -168,7 +175,11 @@ def extract_comments(doc, book):
             verse = int(v_match.group().replace('Panel', '', 1).replace('Panel ', '', 1))
             doc_content[chapter][verse] = []
 
-        if has_comment(p):
+        if has_comment(p) and paragraphs is not None and p not in paragraphs:
+            # Skipped comment; leave its contents out of the verse text.
+            ptext = convert_to_sfm(odfutils.get_paragraph_text(p), ch_pat_bytes, v_pat_bytes)
+            doc_content[chapter][verse].extend(ptext.split())
+        elif has_comment(p):
             verse_ref = f"{book} {chapter}:{verse}"
             comment_count, comments, doc_content = append_comment(comment_count, comments, p, verse_ref, doc_content)
         else:
@@ -176,13 +187,41 @@ def extract_comments(doc, book):
 
     return comments, doc_content, comment_count
 
-def main():
-    # Ensure that a file was passed as an argument.
-    infile = verify_infile_as_arg(sys.argv)
-    doc = odfutils.load_doc(infile)
+def extract_ir_comments(ir_file):
+    """Gather comments and verse text from an IR file's paragraph records."""
+    doc_content = {0: {1: []}}
+    comments = {}
+    comment_count = 0
+    for r in irutils.iter_records(ir_file):
+        chapter = r.get('chapter')
+        verse = r.get('verse')
+        text = r.get('text')
+        # Chapter and verse headings start new verse text, as in extract_comments.
+        if odfutils.regex_chapter.search(text) or odfutils.regex_verse.search(text):
+            doc_content.setdefault(chapter, {})[verse] = []
+        doc_content.setdefault(chapter, {}).setdefault(verse, [])
+        for c in r.get('annotations'):
+            c = dict(c)
+            user = c.pop('User')
+            comments.setdefault(user, []).append(c)
+            comment_count += 1
+        ptext = convert_to_sfm(text, odfutils.regex_chapter, odfutils.regex_verse)
+        doc_content[chapter][verse].extend(ptext.split())
+    return comments, doc_content, comment_count
 
-    # Extract comments from ODT file.
-    comments_dict, doc_content, comment_count = extract_comments(doc, 'XXA')
+def export_comments(doc, infile, paragraphs=None):
+    """
+    Write the document's comments to one Paratext Notes_USER.xml file per
+    user, next to infile. doc is a loaded ODT, or None to read infile as an
+    IR file. If paragraphs is given, only their comments are written, to
+    Notes_USER_changed.xml. Return the number of comments found and the
+    files written.
+    """
+    # Extract comments from ODT or IR file.
+    if doc is None:
+        comments_dict, doc_content, comment_count = extract_ir_comments(infile)
+    else:
+        comments_dict, doc_content, comment_count = extract_comments(doc, 'XXA', paragraphs)
 
     # Add in verse text.
     for u, comments in comments_dict.items():
@@ -190,13 +229,43 @@ def main():
             c['Verse'] = ' '.join(get_verse_text(doc_content, c.get('VerseRef')))
 
     # Convert comments to Paratext XML.
+    outfiles = []
     for user, comments in comments_dict.items():
         xml = xmlutils.build_notes_xml(user, comments)
-        file_name = f"Notes_{user}.xml"
+        file_name = f"Notes_{user}.xml" if paragraphs is None else f"Notes_{user}_changed.xml"
         outfile = infile.with_name(file_name)
         outfile.write_text(xml)
+        outfiles.append(outfile)
+
+    return comment_count, outfiles
 
-    print(f"{comment_count} comments found and exported to {outfile.parents[0]}.")
+def main():
+    # Ensure that a file was passed as an argument.
+    args, mem = memutils.pop_args(sys.argv)
+    args, since = diffutils.pop_args(args)
+    infile = verify_infile_as_arg(args)
+    if irutils.is_ir_file(infile):
+        if since:
+            print("Error: --since needs an ODT file, not an IR file.")
+            exit(1)
+        doc = None
+    else:
+        with memutils.stage(mem, 'load'):
+            doc = odfutils.load_doc(infile)
+
+    # Only export comments in paragraphs that changed since an earlier revision.
+    paragraphs = None
+    if since:
+        with memutils.stage(mem, 'diff'):
+            new = diffutils.get_paragraphs(doc)
+            old = diffutils.get_paragraphs(odfutils.load_doc(since.resolve()))
+            paragraphs = {r.get('p') for r in new} - set(diffutils.get_unchanged_paragraphs(old, new))
+        print(f"{len(paragraphs)} paragraphs changed since {since}.")
+
+    with memutils.stage(mem, 'export'):
+        comment_count, outfiles = export_comments(doc, infile, paragraphs)
+    print(f"{comment_count} comments found and exported to {infile.parents[0]}.")
+    memutils.print_report(mem)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+List the paragraphs that were inserted, deleted, or modified between two
+revisions of an ODT draft, with their chapter ("P###") and "Panel" location.
+
+Each paragraph's normalized text and comments are hashed, and the two lists
+of hashes are aligned by a patience diff anchored on paragraphs that occur
+once in both revisions. To re-run only the changed paragraphs, pass
+`--since OLD.odt` to update-odt-lg.py or convert-odt-comments-to-xml.py.
+"""
+
+import argparse
+import diffutils
+import json
+import odfutils
+import time
+
+from pathlib import Path
+
+
+def format_location(paragraph):
+    return f"P{paragraph.get('chapter'):03d} Panel {paragraph.get('verse')}"
+
+def shorten(text, length=70):
+    text = ' '.join(text.split())
+    return text if len(text) <= length else f"{text[:length - 3]}..."
+
+def get_report_lines(changes):
+    lines = []
+    for kind, old, new in changes:
+        location = format_location(new or old)
+        if kind == 'modified' and old.get('text') == new.get('text'):
+            lines.append(f"{location}: comments modified")
+            lines.append(f"    - {shorten(old.get('comments'))}")
+            lines.append(f"    + {shorten(new.get('comments'))}")
+        elif kind == 'modified':
+            lines.append(f"{location}: modified")
+            lines.append(f"    - {shorten(old.get('text'))}")
+            lines.append(f"    + {shorten(new.get('text'))}")
+        elif kind == 'deleted':
+            lines.append(f"{location}: deleted")
+            lines.append(f"    - {shorten(old.get('text'))}")
+        else:
+            lines.append(f"{location}: inserted")
+            lines.append(f"    + {shorten(new.get('text'))}")
+    return lines
+
+def get_json_changes(changes):
+    records = []
+    for kind, old, new in changes:
+        paragraph = new or old
+        records.append({
+            'change': kind,
+            'chapter': paragraph.get('chapter'),
+            'verse': paragraph.get('verse'),
+            'old': old.get('text') if old else None,
+            'new': new.get('text') if new else None,
+            'old_comments': old.get('comments') if old else None,
+            'new_comments': new.get('comments') if new else None,
+        })
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('oldfile', help="earlier ODT revision")
+    parser.add_argument('newfile', help="later ODT revision")
+    parser.add_argument('-j', '--json', action='store_true', help="print the changes as JSON")
+    args = parser.parse_args()
+
+    files = [Path(args.oldfile), Path(args.newfile)]
+    for f in files:
+        if f.suffix != '.odt':
+            print(f"Error: {f} is not an ODT file.")
+            exit(1)
+        if not f.is_file():
+            print(f"Error: {f} does not exist.")
+            exit(1)
+
+    start = time.perf_counter()
+    old, new = [diffutils.get_paragraphs(odfutils.load_doc(f.resolve())) for f in files]
+    changes = list(diffutils.iter_changes(old, new))
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(get_json_changes(changes), ensure_ascii=False, indent=2))
+        return
+    for line in get_report_lines(changes):
+        print(line)
+    counts = {k: sum(1 for c in changes if c[0] == k) for k in ['inserted', 'deleted', 'modified']}
+    unchanged = len(new) - counts.get('inserted') - counts.get('modified')
+    print(f"\n{unchanged} paragraphs unchanged, {counts.get('inserted')} inserted, {counts.get('deleted')} deleted, {counts.get('modified')} modified ({elapsed:.2f} s).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+import hashlib
+import odfutils
+import textutils
+
+from bisect import bisect_left
+from pathlib import Path
+
+
+def get_annotation_text(node):
+    """Return the text of all comments inside a paragraph."""
+    text = []
+    stack = list(node.childNodes)
+    while stack:
+        n = stack.pop()
+        if n.nodeType != n.ELEMENT_NODE:
+            continue
+        if n.tagName == 'office:annotation':
+            text.append(str(n))
+        else:
+            stack.extend(n.childNodes)
+    return ' '.join(reversed(text))
+
+def hash_paragraph(text, comments=''):
+    """Hash a paragraph's whitespace- and NFC-normalized text and comments."""
+    key = textutils.normalize(' '.join(text.split()) + '\0' + ' '.join(comments.split()))
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+
+def get_paragraphs(doc):
+    """
+    Return a dict for each paragraph of doc that has text or comments: the
+    paragraph, its chapter and verse ("P###" and "Panel #" headings), its
+    text and comments, and a hash of both.
+    """
+    paragraphs = []
+    chapter = 0
+    verse = 1
+    for p in odfutils.get_text_paragraphs(doc):
+        text = odfutils.get_paragraph_text(p)
+        comments = get_annotation_text(p)
+        if not text.strip() and not comments:
+            continue
+        ch_match = odfutils.regex_chapter.search(text)
+        v_match = odfutils.regex_verse.search(text)
+        if ch_match:
+            chapter = odfutils.fix_chapter_number(int(ch_match.group(1)))
+            verse = 1
+        if v_match:
+            verse = int(v_match.group(1))
+        paragraphs.append({
+            'p': p,
+            'chapter': chapter,
+            'verse': verse,
+            'text': text,
+            'comments': comments,
+            'hash': hash_paragraph(text, comments),
+        })
+    return paragraphs
+
+def get_unique_anchors(a, b, alo, ahi, blo, bhi):
+    """
+    Return the (i, j) pairs of items that occur exactly once in both a[alo:ahi]
+    and b[blo:bhi], keeping the longest run that is in order in both.
+    """
+    counts = {}
+    for i in range(alo, ahi):
+        c = counts.setdefault(a[i], [0, 0, i, None])
+        c[0] += 1
+    for j in range(blo, bhi):
+        c = counts.get(b[j])
+        if c is not None:
+            c[1] += 1
+            c[3] = j
+    pairs = sorted((c[2], c[3]) for c in counts.values() if c[0] == 1 and c[1] == 1)
+
+    # Longest increasing subsequence of j, by patience sorting.
+    tops = []
+    top_indexes = []
+    previous = [None] * len(pairs)
+    for k, (i, j) in enumerate(pairs):
+        pile = bisect_left(tops, j)
+        if pile == len(tops):
+            tops.append(j)
+            top_indexes.append(k)
+        else:
+            tops[pile] = j
+            top_indexes[pile] = k
+        previous[k] = top_indexes[pile - 1] if pile > 0 else None
+    anchors = []
+    k = top_indexes[-1] if top_indexes else None
+    while k is not None:
+        anchors.append(pairs[k])
+        k = previous[k]
+    anchors.reverse()
+    return anchors
+
+def patience_diff(a, b):
+    """
+    Return difflib-style opcodes (tag, i1, i2, j1, j2) turning sequence a into
+    sequence b. Common ends are matched first, then items that are unique in
+    both sides anchor the alignment and the gaps between them are diffed the
+    same way. Gaps without unique items are left as replacements.
+    """
+    matches = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+        i0, j0 = alo, blo
+        for i, j in get_unique_anchors(a, b, alo, ahi, blo, bhi):
+            matches.append((i, j))
+            regions.append((i0, i, j0, j))
+            i0, j0 = i + 1, j + 1
+        if i0 > alo:
+            regions.append((i0, ahi, j0, bhi))
+    matches.sort()
+
+    opcodes = []
+    i0 = j0 = 0
+    for i, j in matches + [(len(a), len(b))]:
+        if i > i0 and j > j0:
+            opcodes.append(('replace', i0, i, j0, j))
+        elif i > i0:
+            opcodes.append(('delete', i0, i, j0, j))
+        elif j > j0:
+            opcodes.append(('insert', i0, i, j0, j))
+        if i < len(a):
+            if opcodes and opcodes[-1][0] == 'equal':
+                opcodes[-1] = ('equal', opcodes[-1][1], i + 1, opcodes[-1][3], j + 1)
+            else:
+                opcodes.append(('equal', i, i + 1, j, j + 1))
+        i0, j0 = i + 1, j + 1
+    return opcodes
+
+def iter_changes(old, new):
+    """
+    Yield (kind, old paragraph, new paragraph) for each inserted, deleted, or
+    modified paragraph between two get_paragraphs() lists. Replaced runs are
+    paired up in order as modifications; any extra paragraphs in a run are
+    inserted or deleted.
+    """
+    opcodes = patience_diff([r.get('hash') for r in old], [r.get('hash') for r in new])
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+        n = min(i2 - i1, j2 - j1)
+        for k in range(n):
+            yield 'modified', old[i1 + k], new[j1 + k]
+        for i in range(i1 + n, i2):
+            yield 'deleted', old[i], None
+        for j in range(j1 + n, j2):
+            yield 'inserted', None, new[j]
+
+def get_unchanged_paragraphs(old, new):
+    """Return {new paragraph: old paragraph} for the paragraphs that didn't change."""
+    opcodes = patience_diff([r.get('hash') for r in old], [r.get('hash') for r in new])
+    unchanged = {}
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            for k in range(i2 - i1):
+                unchanged[new[j1 + k].get('p')] = old[i1 + k].get('p')
+    return unchanged
+
+def pop_args(argv):
+    """
+    Remove the diff option from a script's argument list:
+        --since OLD.odt     only process paragraphs that changed since OLD.odt
+    Return the remaining arguments and the OLD.odt path, or None.
+    """
+    args = []
+    since = None
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a == '--since' or a.startswith('--since='):
+            if '=' in a:
+                value = a.split('=', 1)[1]
+            else:
+                i += 1
+                value = argv[i] if i < len(argv) else ''
+            since = Path(value)
+            if since.suffix != '.odt' or not since.is_file():
+                print(f"Error: --since needs an existing ODT file, not \"{value}\".")
+                exit(1)
+        else:
+            args.append(a)
+        i += 1
+    return args, since
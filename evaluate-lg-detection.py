@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+"""
+Measure how well and how fast paragraph language detection works on a
+hand-corrected draft. The language of each paragraph's style is taken as
+the correct answer; each detection configuration is run on the same
+paragraphs and its accuracy, confusion matrix, paragraphs per second, and
+hunspell lookups per paragraph are reported.
+
+Configurations:
+    cascade       orthographic pre-pass, then hunspell (update-odt-lg.py)
+    hunspell      hunspell for every paragraph (no pre-pass)
+    orthography   stop words and marker characters only
+    viterbi       whole-document decoding (update-odt-lg.py --viterbi)
+"""
+
+import argparse
+import hs
+import irutils
+import lgutils
+import odfutils
+import scriptutils
+import textutils
+import time
+
+from pathlib import Path
+
+
+LANGUAGES = ['en_US', 'fr_FR', 'sg_CF']
+scripts = {}
+
+
+class CountingDic():
+    """Wrap a hunspell dictionary to count the lookups made through it."""
+    def __init__(self, hs_dic):
+        self.hs_dic = hs_dic
+        self.lookups = 0
+
+    def spell(self, word):
+        self.lookups += 1
+        return self.hs_dic.spell(word)
+
+
+def get_tagger():
+    if 'update-odt-lg' not in scripts:
+        scripts['update-odt-lg'] = scriptutils.import_script('update-odt-lg')
+    return scripts.get('update-odt-lg')
+
+def detect_cascade(word_lists, hs_dics, threshold=None):
+    tagger = get_tagger()
+    results = []
+    last_text_lang = None
+    for words in word_lists:
+        lang_code = tagger.determine_language(words, last_text_lang, hs_dics, threshold)[0]
+        results.append(lang_code)
+        last_text_lang = lang_code
+    return results
+
+def detect_hunspell(word_lists, hs_dics):
+    # A threshold above 1 is never reached, so every paragraph goes to hunspell.
+    return detect_cascade(word_lists, hs_dics, threshold=2.0)
+
+def detect_orthography(word_lists, hs_dics):
+    results = []
+    for words in word_lists:
+        lang_code, confidence = lgutils.guess_language(textutils.count_tokens(words), hs_dics.keys())
+        results.append(lang_code)
+    return results
+
+def detect_viterbi(word_lists, hs_dics):
+    import hmmutils
+    return hmmutils.decode_languages(word_lists, hs_dics)
+
+CONFIGS = {
+    'cascade': detect_cascade,
+    'hunspell': detect_hunspell,
+    'orthography': detect_orthography,
+    'viterbi': detect_viterbi,
+}
+
+
+def get_odt_samples(infile):
+    """Return (words, gold language) for each non-empty paragraph with a language style."""
+    tagger = get_tagger()
+    doc = odfutils.load_doc(infile)
+    style_languages = odfutils.get_style_languages(doc)
+    samples = []
+    for p in odfutils.get_text_paragraphs(doc):
+        words = tagger.get_paragraph_words(p)
+        gold = style_languages.get(p.getAttribute('stylename'))
+        if words and gold:
+            samples.append((words, gold))
+    return samples
+
+def get_ir_samples(infile):
+    """Return (words, gold language) for each non-empty IR paragraph with a language."""
+    samples = []
+    for r in irutils.iter_records(infile):
+        words = r.get('text', '').split()
+        if words and r.get('lang'):
+            samples.append((words, r.get('lang')))
+    return samples
+
+def evaluate(name, samples, hs_dics):
+    """Run one configuration on the samples and return its results dict."""
+    dics = {l: CountingDic(d) if d else None for l, d in hs_dics.items()}
+    word_lists = [words for words, gold in samples]
+    # Run once with no paragraphs so that module imports aren't timed.
+    CONFIGS.get(name)([], dics)
+    start = time.perf_counter()
+    predicted = CONFIGS.get(name)(word_lists, dics)
+    elapsed = time.perf_counter() - start
+
+    labels = list(hs_dics.keys())
+    confusion = {g: {p: 0 for p in labels + [None]} for g in labels}
+    correct = 0
+    for (words, gold), p in zip(samples, predicted):
+        if gold not in confusion:
+            confusion[gold] = {p: 0 for p in labels + [None]}
+        confusion[gold][p] = confusion[gold].get(p, 0) + 1
+        if p == gold:
+            correct += 1
+    n = len(samples)
+    return {
+        'name': name,
+        'accuracy': correct / n if n else 0.0,
+        'paragraphs_per_second': n / elapsed if elapsed else 0.0,
+        'lookups_per_paragraph': sum(d.lookups for d in dics.values() if d) / n if n else 0.0,
+        'confusion': confusion,
+    }
+
+def print_results(results):
+    sp = ' '*3
+    print(f"\n{'config':12}{'accuracy':>10}{'para/s':>10}{'lookups/para':>14}")
+    for r in results:
+        print(f"{r.get('name'):12}{r.get('accuracy'):10.1%}{r.get('paragraphs_per_second'):10.0f}{r.get('lookups_per_paragraph'):14.1f}")
+    for r in results:
+        confusion = r.get('confusion')
+        predicted = list(next(iter(confusion.values())).keys())
+        print(f"\n{r.get('name')}: gold (rows) by detected (columns)")
+        print(sp + f"{'':8}" + ''.join(f"{str(p):>8}" for p in predicted))
+        for gold, row in confusion.items():
+            print(sp + f"{gold:8}" + ''.join(f"{row.get(p, 0):8}" for p in predicted))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('infile', help="hand-corrected ODT file, or its IR (.jsonl) file")
+    parser.add_argument('-c', '--config', action='append', choices=CONFIGS.keys(), help="configuration to run; repeat for several [default: all]")
+    parser.add_argument('-m', '--min-accuracy', type=float, help="exit with status 1 if a configuration's accuracy is below this fraction")
+    args = parser.parse_args()
+
+    infile = Path(args.infile)
+    if infile.suffix not in ['.odt', irutils.IR_SUFFIX]:
+        print("Error: Need to pass an ODT or IR (.jsonl) file as the first argument.")
+        exit(1)
+    if not infile.is_file():
+        print("Error: Input file does not exist.")
+        exit(1)
+    infile = infile.resolve()
+
+    if infile.suffix == '.odt':
+        samples = get_odt_samples(infile)
+    else:
+        samples = get_ir_samples(infile)
+    if not samples:
+        print("Error: No paragraphs with a language style found.")
+        exit(1)
+    print(f"{len(samples)} paragraphs with a language style.")
+
+    dict_dir = scriptutils.repo_root / 'dict'
+    hs_dics = {l: hs.get_hs_dic(dict_dir, l) for l in LANGUAGES}
+    results = [evaluate(name, samples, hs_dics) for name in (args.config or CONFIGS.keys())]
+    print_results(results)
+
+    if args.min_accuracy is not None:
+        low = [r.get('name') for r in results if r.get('accuracy') < args.min_accuracy]
+        if low:
+            print(f"\nError: Accuracy below {args.min_accuracy:.1%}: {', '.join(low)}")
+            exit(1)
+
+
+if __name__ == '__main__':
+    main()
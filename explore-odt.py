@@ -11,7 +11,6 @@ import odfutils
 import random
 import re
 import sys
-import xmlutils
 
 from pathlib import Path
 
@@ -31,23 +30,25 @@ def verify_infile_as_arg(script_args):
     return infile
 
 def explore_element_type(doc, type):
-    for p in doc.body.getElementsByType(type):
+    for p in odfutils.get_elements(doc, type):
         print(p)
 
-def get_children(paragraphs, depth=0):
+def get_children(paragraphs, depth=0, label=''):
     depth += 1
     for p in paragraphs:
         if p.tagName == 'office:annotation':
-            print(f"{depth}: {p}")
+            print(f"{label}{depth}: {p}")
             continue
         if p.childNodes:
-            get_children(p.childNodes, depth)
+            get_children(p.childNodes, depth, label)
             if p.tagName == 'office:annotation':
-                print(f"{depth}: {p}")
+                print(f"{label}{depth}: {p}")
 
 def recurse_through_paragraphs(doc):
-    plist = doc.body.getElementsByType(odfutils.P)
-    get_children(plist)
+    # Print each paragraph's comments, labelled with its document position.
+    for p in odfutils.get_text_paragraphs(doc):
+        ordinal, parents = odfutils.get_paragraph_info(doc, p)
+        get_children([p], label=f"P{ordinal} in {parents[-1].tagName}, ")
 
 def extract_comments(doc, book):
     doc_content = {0: {1: []}}
@@ -61,7 +62,7 @@ def extract_comments(doc, book):
     verse = 1
     comment_count = 0
     ct = 0
-    for p in doc.body.getElementsByType(odfutils.P):
+    for p in odfutils.get_text_paragraphs(doc):
         if not str(p): # blank line
             continue
         ch_match = ch_pat_bytes.search(str(p))
@@ -161,7 +162,7 @@ def main():
     infile = verify_infile_as_arg(sys.argv)
     doc = odfutils.load_doc(infile)
 
-    # explore_element_type(doc, odfutils.H)
+    # explore_element_type(doc, 'text:h')
     recurse_through_paragraphs(doc)
 
 if __name__ == '__main__':
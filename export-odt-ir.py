@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""
+Parse an ODT draft once and export its paragraphs, with style, language,
+chapter, verse, and comments, to an intermediate JSON Lines (IR) file that
+the other tools accept in place of the ODT.
+"""
+
+# References:
+#   https://github.com/eea/odfpy/wiki
+
+import argparse
+import hs
+import irutils
+import memutils
+import odfutils
+import scriptutils
+
+from pathlib import Path
+
+
+def get_annotations(p, book, chapter, verse, comments_script):
+    """Return the paragraph's comments as Paratext note dicts."""
+    comments = {}
+    verse_ref = f"{book} {chapter}:{verse}"
+    doc_content = {chapter: {verse: []}}
+    comments_script.append_comment(0, comments, p, verse_ref, doc_content)
+    annotations = []
+    for user, user_comments in comments.items():
+        for c in user_comments:
+            c['User'] = user
+            annotations.append(c)
+    return annotations
+
+def iter_odt_records(doc, book, detect=None):
+    """
+    Yield an IR record for each non-empty paragraph. The language comes from
+    the paragraph style unless a detect(words, last_lang) function is given.
+    """
+    comments_script = scriptutils.import_script('convert-odt-comments-to-xml')
+    style_languages = odfutils.get_style_languages(doc)
+    last_lang = None
+    for i, (chapter, verse, p, text) in enumerate(odfutils.iter_paragraph_refs(doc)):
+        style = p.getAttribute('stylename')
+        if detect:
+            lang = detect(text.split(), last_lang)
+        else:
+            lang = style_languages.get(style)
+        last_lang = lang
+        annotations = []
+        if comments_script.has_comment(p):
+            annotations = get_annotations(p, book, chapter, verse, comments_script)
+        yield irutils.new_record(i, text, style, lang, chapter, verse, annotations)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('infile', help="ODT file")
+    parser.add_argument('-o', '--outfile', help=f"IR output file [default: INFILE{irutils.IR_SUFFIX}]")
+    parser.add_argument('-d', '--detect', action='store_true', help="detect each paragraph's language instead of using its style")
+    parser.add_argument('--mem-report', action='store_true', help="record peak memory per stage and show top allocation sites")
+    parser.add_argument('--mem-limit', type=float, metavar='MB', help="warn when a stage's peak memory goes over MB")
+    args = parser.parse_args()
+    mem = None
+    if args.mem_report or args.mem_limit:
+        mem = memutils.new_report(args.mem_limit)
+
+    # Ensure that input file exists.
+    infile = Path(args.infile)
+    if infile.suffix != '.odt':
+        print("Error: Need to pass an ODT file as the first argument.")
+        exit(1)
+    if not infile.is_file():
+        print("Error: Input file does not exist.")
+        exit(1)
+    infile = infile.resolve()
+    outfile = Path(args.outfile) if args.outfile else infile.with_suffix(irutils.IR_SUFFIX)
+
+    detect = None
+    if args.detect:
+        tagger = scriptutils.import_script('update-odt-lg')
+        languages = ['en_US', 'fr_FR', 'sg_CF']
+        dict_dir = scriptutils.repo_root / 'dict'
+        hs_dics = {l: hs.get_hs_dic(dict_dir, l) for l in languages}
+        detect = lambda words, last_lang: tagger.determine_language(words, last_lang, hs_dics)[0]
+
+    with memutils.stage(mem, 'load'):
+        doc = odfutils.load_doc(infile)
+    with memutils.stage(mem, 'export'):
+        ct = irutils.write_records(outfile, iter_odt_records(doc, 'XXA', detect), source=infile.name)
+    print(f"{ct} paragraphs exported to {outfile}.")
+    memutils.print_report(mem)
+
+
+if __name__ == '__main__':
+    main()
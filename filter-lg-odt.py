@@ -7,18 +7,13 @@ Filter out text by language type from an ODT file.
 # References:
 #   https://github.com/eea/odfpy/wiki
 
-import re
-import shutil
-import string
 import sys
 
-from odf.opendocument import load
-from odf.opendocument import OpenDocumentText
-from odf.style import Style, TextProperties
-from odf.text import P
 from pathlib import Path
 
-import hs
+import irutils
+import memutils
+import odfutils
 
 
 def get_styles_dict(doc):
@@ -49,7 +44,8 @@ def get_relevant_paragraph_styles(styles_dict, language, country):
     return relevant_p_styles
 
 def get_all_paragraphs(doc):
-    return list(doc.getElementsByType(P))
+    # Comment contents aren't part of the document's text.
+    return odfutils.get_text_paragraphs(doc)
 
 def get_text_from_paragraph(paragraph):
     ptext = []
@@ -113,6 +109,15 @@ def filter_by_language(all_paragraphs, language, country, relevant_p_styles):
 
     return matched_paragraphs, matched_styles
 
+def filter_ir_by_language(ir_file, language, country):
+    # IR records already carry each paragraph's language.
+    lang_code = f"{language}_{country}"
+    matched_paragraphs = []
+    for r in irutils.iter_records(ir_file):
+        if r.get('lang') == lang_code:
+            matched_paragraphs.append(r.get('text').strip())
+    return matched_paragraphs
+
 def print_sorted_list_from_set(input_set):
     input_list = list(input_set)
     input_list.sort()
@@ -123,23 +128,33 @@ def main():
     infile = ''
     language = ''
     country = ''
+    args, mem = memutils.pop_args(sys.argv)
 
     # Ensure that a language and file were passed as arguments.
-    if len(sys.argv) > 2 and Path(sys.argv[2]).suffix == '.odt':
-        infile = Path(sys.argv[2])
-        lang_code = sys.argv[1].split('-')
+    lang_code = args[1].replace('_', '-').split('-') if len(args) > 1 else []
+    if len(args) > 2 and Path(args[2]).suffix in ['.odt', irutils.IR_SUFFIX] and len(lang_code) == 2:
+        infile = Path(args[2])
         language = lang_code[0]
         country = lang_code[1]
     else:
-        print(f"Usage: {sys.argv[0]} LANG file.odt\n\n\tLANG is in the format \"en-US\"")
+        print(f"Usage: {args[0]} LANG file.odt|file.jsonl [--mem-report] [--mem-limit MB]\n\n\tLANG is in the format \"en-US\"")
         exit(1)
     # print(f"language:\t{language}\ncountry:\t{country}\n")
 
+    # Use already-parsed paragraphs from an IR file.
+    if infile.is_file() and irutils.is_ir_file(infile):
+        with memutils.stage(mem, 'filter'):
+            matched_paragraphs = filter_ir_by_language(infile, language, country)
+        print('\n\n'.join(matched_paragraphs))
+        memutils.print_report(mem, file=sys.stderr)
+        exit()
+
     # Ensure that input file exists.
     if infile.is_file() and infile.suffix == '.odt':
         infile = infile.resolve()
         # Load content.
-        doc = load(infile)
+        with memutils.stage(mem, 'load'):
+            doc = odfutils.load_doc(infile)
     else:
         print("Error: Input file does not exist.")
         exit(1)
@@ -152,15 +167,17 @@ def main():
     relevant_p_styles = get_relevant_paragraph_styles(all_styles_dict, language, country)
     # print_sorted_list_from_set(relevant_p_styles)
 
-    # Get all paragraphs from document.
-    all_paragraphs = get_all_paragraphs(doc)
+    with memutils.stage(mem, 'filter'):
+        # Get all paragraphs from document.
+        all_paragraphs = get_all_paragraphs(doc)
 
-    # Keep only paragraphs marked with input language.
-    matched_paragraphs, matched_styles = filter_by_language(all_paragraphs, language, country, relevant_p_styles)
+        # Keep only paragraphs marked with input language.
+        matched_paragraphs, matched_styles = filter_by_language(all_paragraphs, language, country, relevant_p_styles)
 
-    # Send text to STDOUT.
+    # Send text to STDOUT; the memory report goes to STDERR.
     print('\n\n'.join(matched_paragraphs))
     # print(matched_styles)
+    memutils.print_report(mem, file=sys.stderr)
 
     exit()
 
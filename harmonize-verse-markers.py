@@ -2,6 +2,8 @@
 
 """Harmonize the verse markers between EAB and SAB Paratext project files."""
 
+import math
+import re
 import sys
 
 from pathlib import Path as p
@@ -12,12 +14,32 @@ from pathlib import Path as p
 #   - read both files into memory
 #   - make a dictionary of relevant info from SAB:
 #       {ch#: {'line-number': #, 'paragraph-count': #p, 'paragraphs': [], 'verses': {1: i_of_p, 2: i_of_p, etc.}}
+# With --align, chapters whose paragraph counts differ are aligned by
+#   paragraph length (Gale-Church) instead of stopping the script.
+
+# Gale-Church alignment: bead types (base paragraphs, target paragraphs) with
+#   their prior probabilities, and the variance of the target length per base
+#   character.
+BEAD_PRIORS = {
+    (1, 1): 0.89,
+    (1, 0): 0.0099,
+    (0, 1): 0.0099,
+    (2, 1): 0.089,
+    (1, 2): 0.089,
+}
+LENGTH_VARIANCE = 6.8
+# 1-1 beads costing more than this (-log probability) go to the review report.
+LOW_CONFIDENCE_COST = 6.0
+regex_markers = re.compile(r'\\(?:v\s+\S+|[a-z]+[0-9]?)\s*')
 
 def get_info_dict(text):
     text_info = {}
     ch = 0
     for i, line in enumerate(text.splitlines()):
-        start = line.split()[0]
+        parts = line.split()
+        if not parts:
+            continue
+        start = parts[0]
         valid_lines = [
             '\p',
             '\id',
@@ -32,26 +54,42 @@ def get_info_dict(text):
             }
         if start == '\c':
             try:
-                ch = int(line.split()[1])
-            except ValueError:
+                ch = int(parts[1])
+            except (IndexError, ValueError):
                 pass
         elif start in valid_lines:
             text_info[ch]['paragraph-count'] += 1
             text_info[ch]['paragraphs'].append(line)
         elif start == '\\v':
+            if len(parts) < 2:
+                # A bare marker has no verse to place.
+                print(f"Warning: \\c {ch}: skipping bare verse marker on line {i+1}.", file=sys.stderr)
+                continue
+            if not text_info[ch]['paragraphs']:
+                # A verse before the chapter's first paragraph opens its own
+                #   paragraph, so that its text is kept.
+                print(f"Warning: \\c {ch}: verse before first paragraph on line {i+1}; adding a paragraph.", file=sys.stderr)
+                text_info[ch]['paragraph-count'] += 1
+                text_info[ch]['paragraphs'].append('\\p')
             try:
-                vn = int(line.split()[1])
+                vn = int(parts[1])
             except ValueError as e:
                 print(e)
                 print(f"\c {ch}: {line}")
                 exit(1)
             text_info[ch]['verses'][vn] = text_info[ch]['paragraph-count'] - 1
-            text_info[ch]['paragraphs'][-1] = f"\p\n{line}"
+            if text_info[ch]['paragraphs'][-1].strip() == '\\p':
+                text_info[ch]['paragraphs'][-1] = f"\p\n{line}"
+            else:
+                # Keep the paragraph's text, or an earlier verse, in front of this one.
+                text_info[ch]['paragraphs'][-1] += f"\n{line}"
     return text_info
 
-def add_verse_markers(binfo, tinfo):
+def add_verse_markers(binfo, tinfo, skip_chs=()):
     binfo_chs = [k for k in binfo.keys()]
     for bc in binfo_chs[::-1]:
+        if bc in skip_chs:
+            continue
         tps = tinfo.get(bc).get('paragraphs')
         # print(tps)
         tps = add_verse_markers_to_paragraphs(tps, binfo.get(bc).get('verses'))
@@ -69,6 +107,92 @@ def add_verse_markers_to_paragraphs(paragraphs, bverses):
                 break
     return paragraphs
 
+def get_paragraph_length(ptext):
+    return len(regex_markers.sub('', ptext).strip())
+
+def get_length_ratio(binfo, tinfo):
+    # Characters of target text per character of base text, over the whole book.
+    b_len = sum(get_paragraph_length(pt) for c in binfo.values() for pt in c.get('paragraphs'))
+    t_len = sum(get_paragraph_length(pt) for c in tinfo.values() for pt in c.get('paragraphs'))
+    return t_len / b_len if b_len and t_len else 1.0
+
+def get_length_cost(l1, l2, ratio):
+    # -log probability that l1 base characters translate to l2 target characters.
+    mean = (l1 + l2 / ratio) / 2
+    if mean == 0:
+        return 0
+    delta = (l2 - l1 * ratio) / math.sqrt(mean * LENGTH_VARIANCE)
+    prob = math.erfc(abs(delta) / math.sqrt(2))
+    return -math.log(max(prob, 1e-12))
+
+def align_paragraphs(b_lens, t_lens, ratio):
+    """
+    Align base and target paragraphs by length with dynamic programming.
+    Return a list of beads: (base indexes, target indexes, cost).
+    """
+    n = len(b_lens)
+    m = len(t_lens)
+    inf = float('inf')
+    costs = [[inf] * (m + 1) for i in range(n + 1)]
+    back = [[None] * (m + 1) for i in range(n + 1)]
+    costs[0][0] = 0
+    bead_costs = {b: -math.log(prior) for b, prior in BEAD_PRIORS.items()}
+    for i in range(n + 1):
+        for j in range(m + 1):
+            if i == 0 and j == 0:
+                continue
+            for (di, dj), bead_cost in bead_costs.items():
+                if di > i or dj > j or costs[i-di][j-dj] == inf:
+                    continue
+                l1 = sum(b_lens[i-di:i])
+                l2 = sum(t_lens[j-dj:j])
+                cost = costs[i-di][j-dj] + bead_cost + get_length_cost(l1, l2, ratio)
+                if cost < costs[i][j]:
+                    costs[i][j] = cost
+                    back[i][j] = (di, dj, cost - costs[i-di][j-dj])
+
+    # Trace back the best path.
+    beads = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        di, dj, cost = back[i][j]
+        beads.append((list(range(i-di, i)), list(range(j-dj, j)), cost))
+        i -= di
+        j -= dj
+    return beads[::-1]
+
+def get_verse_label(vns):
+    # Merged verses become a verse bridge, e.g. "3-4".
+    if len(vns) == 1:
+        return str(vns[0])
+    return f"{vns[0]}-{vns[-1]}"
+
+def add_aligned_verse_markers(ch, bchapter, tchapter, ratio, review):
+    """
+    Place the base chapter's verse markers on the target paragraphs that
+    align with their base paragraphs. Add doubtful beads to review.
+    """
+    tps = tchapter.get('paragraphs')
+    bverses = bchapter.get('verses')
+    b_lens = [get_paragraph_length(pt) for pt in bchapter.get('paragraphs')]
+    t_lens = [get_paragraph_length(pt) for pt in tps]
+    for bis, tis, cost in align_paragraphs(b_lens, t_lens, ratio):
+        vns = sorted(vn for vn, vpi in bverses.items() if vpi in bis)
+        bead = f"{len(bis)}-{len(tis)}"
+        if bead != '1-1' or cost > LOW_CONFIDENCE_COST:
+            snippet = ' '.join(regex_markers.sub('', tps[tis[0]]).split()[:6]) if tis else ''
+            review.append(f"\\c {ch:3}\t{bead}\tcost: {cost:5.1f}\tverses: {get_verse_label(vns) if vns else '-'}\tbase ps: {bis}\ttarget ps: {tis}\t{snippet}")
+        if not vns:
+            continue
+        if not tis:
+            review.append(f"\\c {ch:3}\tverses {get_verse_label(vns)} have no target paragraph")
+            continue
+        ti = tis[0]
+        if tps[ti][:5] != f"\p\n\\v":
+            tps[ti] = f"\p\n\\v {get_verse_label(vns)} {tps[ti][3:]}"
+    tchapter['paragraphs'] = tps
+    return tchapter
+
 def verify_paragraph_count(binfo, tinfo):
     mismatched_paragraphs = {}
     binfo_chs = [k for k in binfo.keys()]
@@ -101,8 +225,10 @@ def print_output(info_dict):
 def main():
     # Parse arguments.
     args = sys.argv[1:]
+    align = '--align' in args
+    args = [a for a in args if a != '--align']
     if len(args) != 2:
-        print("Error: This script requires 2 input files as arguments: SAB.SFM EAB.SFM")
+        print("Error: This script requires 2 input files as arguments: SAB.SFM EAB.SFM [--align]")
         exit(1)
     basefile, targetfile = args
     basefile = p(basefile).resolve()
@@ -124,7 +250,7 @@ def main():
 
     # Check paragraph counts.
     mismatched_paragraphs = verify_paragraph_count(baseinfo, targetinfo)
-    if mismatched_paragraphs:
+    if mismatched_paragraphs and not align:
         mp_rev = [k for k in mismatched_paragraphs.keys()]
         # for mp, values in mismatched_paragraphs.items():
         for mp in mp_rev[::-1]:
@@ -137,10 +263,23 @@ def main():
         print(f"Total lines:\tdiff: {len_base-len_target:4}\tbase: {len_base:5}\ttarget: {len_target:5}")
         exit(1)
 
+    # Align mismatched chapters by paragraph length.
+    review = []
+    if mismatched_paragraphs:
+        ratio = get_length_ratio(baseinfo, targetinfo)
+        for ch in mismatched_paragraphs.keys():
+            targetinfo[ch] = add_aligned_verse_markers(ch, baseinfo.get(ch), targetinfo.get(ch), ratio, review)
+
     # Add verse markers into target file's info.
-    targetinfo = add_verse_markers(baseinfo, targetinfo)
+    targetinfo = add_verse_markers(baseinfo, targetinfo, skip_chs=mismatched_paragraphs.keys())
     print_output(targetinfo)
 
+    # Write doubtful alignments to a review report; STDOUT has the SFM text.
+    if mismatched_paragraphs:
+        reportfile = targetfile.with_name(f"{targetfile.stem}_alignment-review.txt")
+        reportfile.write_text('\n'.join(review) + '\n')
+        print(f"{len(mismatched_paragraphs)} chapters aligned; {len(review)} items to review in {reportfile}.", file=sys.stderr)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+"""
+Find Sango words missing from the sg_CF dictionary and add accepted ones.
+
+    harvest-lexicon.py harvest FILE [FILE ...]   # SFM or split TXT files
+    harvest-lexicon.py merge CANDIDATES.tsv [WORD ...]
+
+"harvest" writes a candidate list ranked by the number of verses (SFM) or
+lines (TXT) each word appears in, then by frequency. Mark the words to keep
+with "y" in the "accept" column, then run "merge" to add them to
+dict/sg_CF.txt and dict/sg_CF.dic. Token counts are cached per input file,
+so only new or changed files are read again.
+"""
+
+import argparse
+import hashlib
+import json
+import sfmutils
+import textutils
+
+from pathlib import Path
+
+
+repo_root = Path(__file__).resolve().parents[0]
+dict_dir = repo_root / 'dict'
+cache_dir = repo_root / '.cache'
+lang_code = 'sg_CF'
+book = 'XXA'
+accept_values = ['y', 'yes', 'x', '1']
+# Letters that sg_CF.txt sorts as their own, after z.
+txt_distinct_chars = 'àçè'
+
+
+def get_file_sha1(infile):
+    h = hashlib.sha1()
+    with open(infile, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def iter_units(infile):
+    """Yield (ref, text) per SFM verse line, or per line of a TXT file."""
+    if infile.suffix.lower() == '.txt':
+        with open(infile, encoding='utf-8') as f:
+            for i, line in enumerate(f, start=1):
+                yield f"{infile.name}:{i}", line
+    else:
+        for i, chapter, verse, text in sfmutils.iter_verse_text(sfmutils.iter_lines(infile)):
+            yield sfmutils.format_ref(book, chapter, verse), text
+
+def count_file(infile):
+    """Return {token: [count, units, first_ref]} for one input file."""
+    counts = {}
+    for ref, text in iter_units(infile):
+        for t, ct in textutils.count_tokens(text).items():
+            entry = counts.get(t)
+            if entry is None:
+                counts[t] = [ct, 1, ref]
+            else:
+                entry[0] += ct
+                # Consecutive lines of the same verse only count once.
+                if entry[2] != ref:
+                    entry[1] += 1
+    return counts
+
+def load_cache(cache_file):
+    if not cache_file.is_file():
+        return {}
+    try:
+        return json.loads(cache_file.read_text())
+    except json.JSONDecodeError:
+        return {}
+
+def save_cache(cache_file, cache):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(cache, ensure_ascii=False))
+
+def get_file_counts(infile, cache):
+    """Return cached counts for infile, recounting only if its content changed."""
+    key = str(infile)
+    stat = infile.stat()
+    entry = cache.get(key)
+    if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime_ns:
+        return entry.get('counts'), False
+    sha1 = get_file_sha1(infile)
+    if entry and entry.get('sha1') == sha1:
+        entry['mtime'] = stat.st_mtime_ns
+        return entry.get('counts'), False
+    counts = count_file(infile)
+    cache[key] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha1': sha1, 'counts': counts}
+    return counts, True
+
+def read_dic(dic_file):
+    """Return the word list of a hunspell .dic file, without its count header."""
+    lines = dic_file.read_text(encoding='utf-8').splitlines()
+    return [l for l in lines[1:] if l.strip()]
+
+def get_aff_ignore(aff_file):
+    """Return the characters that a hunspell .aff file's IGNORE option removes before lookups."""
+    if not aff_file.is_file():
+        return ''
+    for line in aff_file.read_text(encoding='utf-8').splitlines():
+        parts = line.split()
+        if len(parts) > 1 and parts[0] == 'IGNORE':
+            return parts[1]
+    return ''
+
+def get_dic_words(dic_file, ignore=''):
+    # sg_CF has no affix rules, so once the IGNORE characters (e.g. "-")
+    #   are removed from both sides, a word set matches hunspell's lookups
+    #   and avoids loading hunspell.
+    table = str.maketrans('', '', ignore)
+    return {textutils.normalize_token(w.split('/')[0]).translate(table) for w in read_dic(dic_file)}
+
+def get_candidates(counts_list, known, min_count, ignore=''):
+    table = str.maketrans('', '', ignore)
+    totals = {}
+    for counts in counts_list:
+        for t, (ct, units, ref) in counts.items():
+            if t.translate(table) in known:
+                continue
+            entry = totals.setdefault(t, [0, 0, ref])
+            entry[0] += ct
+            entry[1] += units
+    candidates = [(t, *e) for t, e in totals.items() if e[0] >= min_count]
+    return sorted(candidates, key=lambda c: (-c[2], -c[1], c[0]))
+
+def write_candidates(outfile, candidates, accepted):
+    lines = ["word\tcount\tverses\tfirst_ref\taccept"]
+    for word, ct, units, ref in candidates:
+        lines.append(f"{word}\t{ct}\t{units}\t{ref}\t{'y' if word in accepted else ''}")
+    outfile.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def read_accepted(candidates_file):
+    accepted = []
+    if not candidates_file or not candidates_file.is_file():
+        return accepted
+    for line in candidates_file.read_text(encoding='utf-8').splitlines()[1:]:
+        cols = line.split('\t')
+        if len(cols) >= 5 and cols[4].strip().lower() in accept_values:
+            accepted.append(cols[0])
+    return accepted
+
+def get_txt_sort_key(word):
+    # sg_CF.txt's order: diacritics are ignored at first, except on à, ç,
+    #   and è, which sort after z; hyphens only break the remaining ties
+    #   (baba, ba-ba, babâ).
+    folded = ''.join(c if c in txt_distinct_chars else textutils.fold_diacritics(c) for c in word)
+    return (folded.replace('-', ''), word.replace('-', ''), word.replace('-', '\uffff'))
+
+def merge_words(words, dic_file, txt_file):
+    """Add new words to the .txt and .dic files, re-sorting each file and keeping the .dic count header."""
+    dic_words = read_dic(dic_file)
+    new_words = sorted({textutils.normalize_token(w) for w in words} - set(dic_words) - {''})
+    if not new_words:
+        return new_words
+
+    # The .dic file is in code point order with no trailing newline.
+    dic_words = sorted(dic_words + new_words)
+    dic_file.write_text('\n'.join([str(len(dic_words))] + dic_words), encoding='utf-8')
+
+    # Keep the .txt file's trailing newlines as they are.
+    text = txt_file.read_text(encoding='utf-8')
+    body = text.rstrip('\n')
+    txt_words = body.split('\n')
+    present = set(txt_words)
+    txt_words += [w for w in new_words if w not in present]
+    txt_words.sort(key=get_txt_sort_key)
+    txt_file.write_text('\n'.join(txt_words) + text[len(body):], encoding='utf-8')
+    return new_words
+
+def harvest(args):
+    infiles = []
+    for f in args.infiles:
+        f = Path(f)
+        if not f.is_file():
+            print(f"Error: {f} does not exist.")
+            exit(1)
+        infiles.append(f.resolve())
+
+    cache_file = cache_dir / f"{lang_code}_harvest.json"
+    cache = load_cache(cache_file)
+    counts_list = []
+    for infile in infiles:
+        counts, recounted = get_file_counts(infile, cache)
+        counts_list.append(counts)
+        print(f"{infile.name}: {'counted' if recounted else 'cached'}, {len(counts)} distinct tokens.")
+    save_cache(cache_file, cache)
+
+    ignore = get_aff_ignore(dict_dir / f"{lang_code}.aff")
+    known = get_dic_words(dict_dir / f"{lang_code}.dic", ignore)
+    candidates = get_candidates(counts_list, known, args.min_count, ignore)
+    # Keep earlier review marks when the list is regenerated.
+    outfile = Path(args.outfile)
+    accepted = set(read_accepted(outfile))
+    write_candidates(outfile, candidates, accepted)
+    print(f"{len(candidates)} candidate words written to {outfile}.")
+
+def merge(args):
+    candidates_file = Path(args.candidates)
+    if not candidates_file.is_file():
+        print(f"Error: {candidates_file} does not exist.")
+        exit(1)
+    words = read_accepted(candidates_file) + args.words
+    if not words:
+        print(f"No words marked as accepted in {candidates_file}.")
+        return
+    dic_file = dict_dir / f"{lang_code}.dic"
+    txt_file = dict_dir / f"{lang_code}.txt"
+    added = merge_words(words, dic_file, txt_file)
+    print(f"{len(added)} words added to {dic_file.name} and {txt_file.name}.")
+    for w in added:
+        print(f"  {w}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_harvest = sub.add_parser('harvest', help="list words missing from the dictionary")
+    p_harvest.add_argument('infiles', nargs='+', help="Sango SFM or TXT files")
+    p_harvest.add_argument('-o', '--outfile', default=f"{lang_code}_candidates.tsv", help="candidate list [%(default)s]")
+    p_harvest.add_argument('-m', '--min-count', type=int, default=2, help="minimum occurrences to list a word [%(default)s]")
+    p_merge = sub.add_parser('merge', help="add accepted words to the dictionary")
+    p_merge.add_argument('candidates', help="reviewed candidate list")
+    p_merge.add_argument('words', nargs='*', help="extra words to add")
+    args = parser.parse_args()
+
+    if args.command == 'harvest':
+        harvest(args)
+    elif args.command == 'merge':
+        merge(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import hs
+import lgutils
+import numpy as np
+import textutils
+
+
+# Log-odds added to a language's score for each word its dictionary knows.
+HIT_WEIGHT = np.log(0.9 / 0.1)
+# Log-odds added for each stop-word or marker-character hit.
+ORTHOGRAPHY_WEIGHT = np.log(4.0)
+# Pseudo-count added to every transition when learning the transitions.
+SMOOTHING = 1.0
+# Maximum number of decode/re-estimate rounds.
+MAX_ROUNDS = 3
+
+
+def get_evidence(token_counts_list, hs_dics):
+    """
+    Return two arrays with one row per paragraph and one column per language
+    in hs_dics: stop-word and marker hits, and words found by hunspell.
+    Hunspell is only consulted for paragraphs whose orthographic guess isn't
+    confident, as in the per-paragraph cascade; their other rows are NaN.
+    """
+    lang_codes = list(hs_dics.keys())
+    ortho = np.zeros((len(token_counts_list), len(lang_codes)))
+    hits = np.full_like(ortho, np.nan)
+    for i, token_counts in enumerate(token_counts_list):
+        scores = lgutils.score_orthography(token_counts, lang_codes)
+        ortho[i] = [scores.get(l) for l in lang_codes]
+        lang_code, confidence = lgutils.guess_from_scores(scores)
+        if lang_code and confidence >= lgutils.CONFIDENCE_THRESHOLD:
+            continue
+        hits[i] = 0
+        for t, n in token_counts.items():
+            for j, d in enumerate(hs_dics.values()):
+                if d and hs.lookup_word(d, t):
+                    hits[i, j] += n
+    return ortho, hits
+
+def combine_evidence(ortho, hits):
+    """Return log-odds language scores from get_evidence's arrays; NaN counts as 0."""
+    return ORTHOGRAPHY_WEIGHT * np.nan_to_num(ortho) + HIT_WEIGHT * np.nan_to_num(hits)
+
+def get_log_emissions(scores):
+    """Normalize each row of scores to log probabilities."""
+    shifted = scores - scores.max(axis=1, keepdims=True)
+    return shifted - np.log(np.exp(shifted).sum(axis=1, keepdims=True))
+
+def learn_transitions(labels, n_states, weights=None):
+    """
+    Return log start and log transition probabilities counted from a label
+    sequence. Each transition counts by the product of its two rows' weights.
+    """
+    start = np.bincount(labels, minlength=n_states) + SMOOTHING
+    trans = np.full((n_states, n_states), SMOOTHING)
+    if len(labels) > 1:
+        w = 1.0 if weights is None else weights[:-1] * weights[1:]
+        np.add.at(trans, (labels[:-1], labels[1:]), w)
+    log_start = np.log(start / start.sum())
+    log_trans = np.log(trans / trans.sum(axis=1, keepdims=True))
+    return log_start, log_trans
+
+def viterbi(log_emissions, log_start, log_trans):
+    """Return the most likely state sequence; each step is vectorized over states."""
+    n, k = log_emissions.shape
+    backpointers = np.zeros((n, k), dtype=np.intp)
+    delta = log_start + log_emissions[0]
+    for i in range(1, n):
+        # candidates[j, l]: best path ending in j, then moving to l.
+        candidates = delta[:, None] + log_trans
+        backpointers[i] = candidates.argmax(axis=0)
+        delta = candidates.max(axis=0) + log_emissions[i]
+    path = np.zeros(n, dtype=np.intp)
+    path[-1] = delta.argmax()
+    for i in range(n - 1, 0, -1):
+        path[i - 1] = backpointers[i, path[i]]
+    return path
+
+def decode(scores, fixed=None):
+    """
+    Return the label index of each row of scores. The transitions are first
+    learned from the rows with a clear best score, then re-estimated from
+    the decoded path until it stops changing. Rows whose label is already
+    known are given in fixed (a label index, or -1 for none); their scores
+    are ignored and they keep that label.
+    """
+    log_emissions = get_log_emissions(scores)
+    if fixed is not None:
+        rows = fixed >= 0
+        log_emissions[rows] = -np.inf
+        log_emissions[rows, fixed[rows]] = 0.0
+    n_states = scores.shape[1]
+    labels = log_emissions.argmax(axis=1)
+    # Rows whose best score doesn't stand out carry no transition evidence.
+    ranked = np.sort(log_emissions, axis=1)
+    weights = (ranked[:, -1] - ranked[:, -2] > HIT_WEIGHT).astype(float) if n_states > 1 else None
+    for i in range(MAX_ROUNDS):
+        log_start, log_trans = learn_transitions(labels, n_states, weights)
+        path = viterbi(log_emissions, log_start, log_trans)
+        if weights is None and np.array_equal(path, labels):
+            break
+        labels = path
+        weights = None
+    return path
+
+def decode_word_lists(word_lists, hs_dics, known=None):
+    """
+    Return the indexes of the non-empty lists of words, their evidence (see
+    get_evidence), and their decoded label indexes (columns follow hs_dics).
+    Lists in known ({index in word_lists: label index}) aren't scored; their
+    evidence rows are NaN and they keep their label while the others are
+    decoded.
+    """
+    known = known or {}
+    indexes = [i for i, words in enumerate(word_lists) if words]
+    ortho = np.full((len(indexes), len(hs_dics)), np.nan)
+    hits = np.full_like(ortho, np.nan)
+    if not indexes or not hs_dics:
+        return indexes, ortho, hits, np.zeros(len(indexes), dtype=np.intp)
+    fixed = np.array([known.get(i, -1) for i in indexes], dtype=np.intp)
+    todo = np.flatnonzero(fixed < 0)
+    if len(todo):
+        ortho[todo], hits[todo] = get_evidence([textutils.count_tokens(word_lists[indexes[k]]) for k in todo], hs_dics)
+    scores = combine_evidence(ortho, hits)
+    return indexes, ortho, hits, decode(scores, fixed)
+
+def decode_languages(word_lists, hs_dics):
+    """
+    Return the language code of each list of words, decoded for the whole
+    sequence at once. Empty lists get None and don't break the sequence.
+    """
+    lang_codes = list(hs_dics.keys())
+    results = [None] * len(word_lists)
+    indexes, ortho, hits, labels = decode_word_lists(word_lists, hs_dics)
+    for i, label in zip(indexes, labels):
+        results[i] = lang_codes[label]
+    return results
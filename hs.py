@@ -1,7 +1,7 @@
-import hunspell
-
-
 def get_hs_dic(dir, lang_code):
+    # Imported here so that scripts start (and show usage errors) quickly.
+    import hunspell
+
     aff = None
     dic = None
     hs_dic = None
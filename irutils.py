@@ -0,0 +1,48 @@
+import json
+
+
+# Intermediate representation (IR) of a parsed draft: a JSON Lines file whose
+#   first line is a header and whose other lines each hold one paragraph:
+#   {"index": 12, "text": "...", "style": "P3", "lang": "sg_CF",
+#    "chapter": 4, "verse": 2, "annotations": [{...}, ...]}
+IR_FORMAT = 'sab-ir'
+IR_VERSION = 1
+IR_SUFFIX = '.jsonl'
+
+
+def new_record(index, text, style, lang, chapter, verse, annotations=None):
+    return {
+        'index': index,
+        'text': text,
+        'style': style,
+        'lang': lang,
+        'chapter': chapter,
+        'verse': verse,
+        'annotations': annotations or [],
+    }
+
+def write_records(outfile, records, source=''):
+    """Write an iterable of paragraph records to outfile; return the count."""
+    ct = 0
+    with open(outfile, 'w', encoding='utf-8') as f:
+        header = {'format': IR_FORMAT, 'version': IR_VERSION, 'source': source}
+        f.write(json.dumps(header, ensure_ascii=False) + '\n')
+        for r in records:
+            f.write(json.dumps(r, ensure_ascii=False) + '\n')
+            ct += 1
+    return ct
+
+def iter_records(infile):
+    """Yield the paragraph records of an IR file one at a time."""
+    with open(infile, encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('format') != IR_FORMAT:
+            raise ValueError(f"{infile} is not an {IR_FORMAT} file")
+        if header.get('version') != IR_VERSION:
+            raise ValueError(f"{infile} has unsupported {IR_FORMAT} version {header.get('version')}")
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def is_ir_file(path):
+    return path.suffix.lower() == IR_SUFFIX
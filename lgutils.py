@@ -0,0 +1,77 @@
+from collections import Counter
+
+
+# Paragraphs whose orthographic guess reaches this confidence skip hunspell.
+CONFIDENCE_THRESHOLD = 0.75
+# Number of marker hits at which the evidence is considered sufficient.
+MIN_EVIDENCE = 3
+
+# Characters that are typical of a language and rare in the others. Sango's
+#   other tone marks (âêîôû, ëïü) are ordinary French letters (être, île,
+#   Noël), so only its stop words count them.
+MARKER_CHARS = {
+    'en_US': '',
+    'fr_FR': 'éèàùçœ',
+    'sg_CF': 'äö',
+}
+
+# Frequent function words. Words shared between languages (e.g. "me", "so",
+#   "a", "la") are left out on purpose.
+STOP_WORDS = {
+    'en_US': {
+        'the', 'and', 'of', 'to', 'is', 'it', 'that', 'he', 'she', 'you',
+        'his', 'her', 'was', 'for', 'with', 'they', 'not', 'be', 'have',
+        'but', 'on', 'at', 'will', 'my', 'this', 'we', 'are', 'from', 'what',
+        'your', 'their', 'him', 'them', 'who', 'all', 'were', 'there',
+    },
+    'fr_FR': {
+        'le', 'les', 'de', 'des', 'du', 'et', 'est', 'il', 'elle', 'un',
+        'une', 'que', 'qui', 'dans', 'pour', 'pas', 'ne', 'ce', 'je', 'vous',
+        'nous', 'au', 'aux', 'sur', 'avec', 'se', 'son', 'sa', 'ses', 'mais',
+        'ils', 'leur', 'mon', 'ton', 'cette', 'sont', 'être',
+    },
+    'sg_CF': {
+        'na', 'ti', 'tî', 'ni', 'lo', 'ala', 'âla', 'mbi', 'ayeke', 'yeke',
+        'ape', 'apê', 'kue', 'kûê', 'nga', 'tongana', 'ndali', 'zo', 'mo',
+        'ye', 'aye', 'teti', 'sô', 'gï',
+    },
+}
+
+
+def score_orthography(token_counts, lang_codes):
+    """
+    Score each language by its stop-word and marker-character hits in the
+    given Counter of normalized tokens.
+    """
+    # Count characters over distinct tokens, weighted by token frequency.
+    char_counts = Counter()
+    for t, n in token_counts.items():
+        for c in t:
+            char_counts[c] += n
+
+    scores = {}
+    for lang_code in lang_codes:
+        stop_words = STOP_WORDS.get(lang_code, set())
+        chars = MARKER_CHARS.get(lang_code, '')
+        score = sum(n for t, n in token_counts.items() if t in stop_words)
+        score += sum(char_counts[c] for c in chars)
+        scores[lang_code] = score
+    return scores
+
+def guess_language(token_counts, lang_codes):
+    """
+    Return the most likely language code and a confidence value between 0
+    and 1. The confidence combines the best score's margin over the
+    runner-up with the amount of evidence found.
+    """
+    return guess_from_scores(score_orthography(token_counts, lang_codes))
+
+def guess_from_scores(scores):
+    """Return guess_language's result for scores from score_orthography."""
+    ranked = sorted(scores.items(), key=lambda s: s[1], reverse=True)
+    if not ranked or ranked[0][1] == 0:
+        return None, 0.0
+    best_lang, best = ranked[0]
+    second = ranked[1][1] if len(ranked) > 1 else 0
+    confidence = (best - second) / best * min(1.0, best / MIN_EVIDENCE)
+    return best_lang, confidence
@@ -0,0 +1,89 @@
+import contextlib
+import sys
+
+
+MiB = 1024 * 1024
+
+
+def pop_args(argv):
+    """
+    Remove the memory report options from a script's argument list:
+        --mem-report        record peak memory per stage and show top allocation sites
+        --mem-limit MB      also warn when a stage's peak goes over MB (implies --mem-report)
+    Return the remaining arguments and a report dict, or None if not requested.
+    """
+    args = []
+    enabled = False
+    limit_mb = None
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a == '--mem-report':
+            enabled = True
+        elif a == '--mem-limit' or a.startswith('--mem-limit='):
+            if '=' in a:
+                value = a.split('=', 1)[1]
+            else:
+                i += 1
+                value = argv[i] if i < len(argv) else ''
+            try:
+                limit_mb = float(value)
+            except ValueError:
+                print(f"Error: --mem-limit needs a number of MB, not \"{value}\".")
+                exit(1)
+            enabled = True
+        else:
+            args.append(a)
+        i += 1
+    report = new_report(limit_mb) if enabled else None
+    return args, report
+
+def new_report(limit_mb=None, top=5):
+    """Start tracing allocations and return an empty report."""
+    # tracemalloc is only imported when a report is asked for.
+    import tracemalloc
+    tracemalloc.start()
+    return {
+        'limit': limit_mb * MiB if limit_mb else None,
+        'top': top,
+        'stages': [],
+    }
+
+@contextlib.contextmanager
+def stage(report, name):
+    """Record current and peak traced memory for the enclosed block."""
+    if report is None:
+        yield
+        return
+    import tracemalloc
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ])
+        # Keep only the summary lines, not the snapshot itself.
+        top_sites = [str(s) for s in snapshot.statistics('lineno')[:report.get('top')]]
+        report['stages'].append({'name': name, 'current': current, 'peak': peak, 'sites': top_sites})
+        limit = report.get('limit')
+        if limit and peak > limit:
+            print(f"Warning: \"{name}\" peaked at {peak/MiB:.1f} MB, over the {limit/MiB:g} MB limit.", file=sys.stderr)
+
+def print_report(report, file=sys.stdout):
+    if report is None:
+        return
+    sp = ' '*3
+    print(f"\nMemory by stage (MB):", file=file)
+    print(f"{sp}{'stage':20}{'current':>10}{'peak':>10}", file=file)
+    for s in report.get('stages'):
+        print(f"{sp}{s.get('name'):20}{s.get('current')/MiB:10.1f}{s.get('peak')/MiB:10.1f}", file=file)
+    for s in report.get('stages'):
+        print(f"\nTop allocation sites still held after \"{s.get('name')}\":", file=file)
+        for line in s.get('sites'):
+            print(f"{sp}{line}", file=file)
+    import tracemalloc
+    tracemalloc.stop()
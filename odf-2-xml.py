@@ -7,9 +7,9 @@ Filter out text by language type from an ODT file.
 # References:
 #   https://github.com/eea/odfpy/wiki
 
+import odfutils
 import sys
 
-from odf.opendocument import load
 from pathlib import Path
 
 
@@ -31,7 +31,7 @@ def main():
     if infile.is_file() and infile.suffix == '.odt':
         infile = infile.resolve()
         # Load content.
-        doc = load(infile)
+        doc = odfutils.load_doc(infile)
     else:
         print("Error: Input file does not exist.")
         exit(1)
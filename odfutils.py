@@ -1,25 +1,272 @@
 #!/usr/bin/env python3
 
-from odf.opendocument import load
-from odf.style import Style, TextProperties
-from odf.text import A, H, P, S
+import copy
+import re
+import shutil
+import struct
+import types
+import zipfile
 
 
+# Package members that are regenerated from the loaded document on save; all
+#   other members are copied as-is from the input file.
+REGENERATED_MEMBERS = {
+    'content.xml',
+    'styles.xml',
+}
+
+# Chapter ("P###") and verse ("Panel #") headings in the drafts.
+regex_chapter = re.compile(r'^\s*[Pp]([0-9]{2,3})')
+regex_verse = re.compile(r'Panel\s*([0-9]+)')
+
+_odf = None
+
+
+def _import_odf():
+    """
+    Return odfpy's classes and functions used here, e.g. _import_odf().Style.
+    odfpy is slow to import, so it's only imported on first use.
+    """
+    global _odf
+    if _odf is None:
+        from odf.opendocument import load
+        from odf.style import Style, TextProperties
+        _odf = types.SimpleNamespace(load=load, Style=Style, TextProperties=TextProperties)
+    return _odf
+
 def load_doc(infile):
-    doc = load(infile)
+    doc = _import_odf().load(infile)
     return doc
 
+def build_element_index(doc):
+    """
+    Walk doc.body once and return {'elements': {tag name: [node, ...]},
+    'paragraphs': {paragraph: (ordinal, parents)}}, with nodes in document
+    order and parents running from doc.body down to the paragraph's parent.
+    """
+    elements = {}
+    paragraphs = {}
+    # Each entry is (node, parent chain of node).
+    stack = [(doc.body, ())]
+    while stack:
+        node, parents = stack.pop()
+        elements.setdefault(node.tagName, []).append(node)
+        if node.tagName == 'text:p':
+            paragraphs[node] = (len(paragraphs), parents)
+        chain = parents + (node,)
+        for child in reversed(node.childNodes):
+            if child.nodeType == child.ELEMENT_NODE:
+                stack.append((child, chain))
+    return {'elements': elements, 'paragraphs': paragraphs}
+
+def get_tree_size(doc):
+    # odfpy updates doc.element_dict when nodes are added with addElement()
+    #   or removed with removeChild(), so its size changes with the tree.
+    return sum(len(nodes) for nodes in doc.element_dict.values())
+
+def get_element_index(doc):
+    """
+    Return doc's element index, building it on first use and rebuilding it
+    when nodes have been added or removed since.
+    """
+    index = getattr(doc, '_element_index', None)
+    size = get_tree_size(doc)
+    if index is None or index.get('size') != size:
+        index = build_element_index(doc)
+        index['size'] = size
+        doc._element_index = index
+    return index
+
+def invalidate_index(doc):
+    """
+    Drop doc's element index. Only needed after appendChild() or
+    insertBefore(), which odfpy doesn't track in doc.element_dict.
+    """
+    doc._element_index = None
+
+def get_elements(doc, tag_name):
+    """
+    Cached replacement for doc.body.getElementsByType(), by tag name, e.g.
+    get_elements(doc, 'text:p'). Don't modify the returned list.
+    """
+    return get_element_index(doc).get('elements').get(tag_name, [])
+
+def get_paragraph_info(doc, p):
+    """Return (ordinal, parents) for a text:p element in doc.body."""
+    info = get_element_index(doc).get('paragraphs').get(p)
+    if info is None:
+        # The node may have been added without odfpy tracking it.
+        invalidate_index(doc)
+        info = get_element_index(doc).get('paragraphs').get(p)
+    if info is None:
+        raise ValueError(f"{p.tagName} element is not a paragraph in the document body")
+    return info
+
+def is_comment_paragraph(doc, p):
+    """Return True if p is part of a comment rather than of the document's text."""
+    ordinal, parents = get_paragraph_info(doc, p)
+    return any(n.tagName == 'office:annotation' for n in parents)
+
+def get_text_paragraphs(doc):
+    """Return the text:p elements of doc.body in document order, without those in comments."""
+    return [p for p in get_elements(doc, 'text:p') if not is_comment_paragraph(doc, p)]
+
 def update_autostyles(doc, lang_codes):
     """
     Update The automatic paragraph styles of the given ODT document to include
     the given languages.
     """
+    odf = _import_odf()
     for lang_code in lang_codes:
         [lg, CN] = lang_code.split('_')
-        pstyle = Style(
+        pstyle = odf.Style(
             name=lang_code,
             family="paragraph",
         )
-        pstyle.addElement(TextProperties(language=lg, country=CN))
+        pstyle.addElement(odf.TextProperties(language=lg, country=CN))
         doc.automaticstyles.addElement(pstyle)
     return doc
+
+def can_copy_raw(zin, zout):
+    """Return True if the zipfile internals that copy_raw_member uses are there."""
+    return (
+        hasattr(zin, 'fp') and hasattr(zout, 'fp') and hasattr(zout, 'start_dir')
+        and hasattr(zipfile, 'sizeFileHeader') and hasattr(zipfile.ZipInfo, 'FileHeader')
+    )
+
+def copy_raw_member(zin, zout, info):
+    """
+    Copy a zip member's compressed bytes from zin to zout without
+    decompressing and recompressing them. This relies on zipfile internals;
+    if they're missing, the member is decompressed and written normally.
+    """
+    if not can_copy_raw(zin, zout):
+        zout.writestr(copy.copy(info), zin.read(info))
+        return
+
+    # Skip past the member's local file header to its compressed data.
+    zin.fp.seek(info.header_offset)
+    header = zin.fp.read(zipfile.sizeFileHeader)
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    zin.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+
+    # Sizes and CRC are known up front, so no trailing data descriptor is needed.
+    new_info = copy.copy(info)
+    new_info.flag_bits &= ~0x08
+    new_info.header_offset = zout.fp.tell()
+    zout.fp.write(new_info.FileHeader())
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = zin.fp.read(min(remaining, 1 << 20))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member: {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    # Register the member so that zout writes it into the central directory.
+    zout.filelist.append(new_info)
+    zout.NameToInfo[new_info.filename] = new_info
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+def save_doc(doc, infile, outfile):
+    """
+    Save doc to outfile using infile as the source package. Only content.xml
+    and styles.xml are regenerated; every other member (images, settings,
+    manifest, etc.) is copied raw from infile without recompression.
+    """
+    regenerated = {
+        'content.xml': doc.contentxml(),
+        'styles.xml': doc.stylesxml().encode('utf-8'),
+    }
+    tmpfile = outfile.with_name(f".{outfile.name}.tmp")
+    with zipfile.ZipFile(infile) as zin, zipfile.ZipFile(tmpfile, 'w') as zout:
+        for info in zin.infolist():
+            if info.filename in REGENERATED_MEMBERS:
+                zi = zipfile.ZipInfo(info.filename, info.date_time)
+                zi.compress_type = zipfile.ZIP_DEFLATED
+                zi.external_attr = info.external_attr
+                zout.writestr(zi, regenerated.get(info.filename))
+            else:
+                copy_raw_member(zin, zout, info)
+    shutil.move(tmpfile, outfile)
+    return outfile
+
+def fix_chapter_number(chapter):
+    """Correct the draft's known mis-numbered chapters."""
+    if chapter == 317 or chapter == 318:
+        chapter += 2
+    elif chapter == 748:
+        chapter += 1
+    return chapter
+
+def get_paragraph_text(node):
+    """Return the text of a paragraph, leaving out any comment contents."""
+    text = []
+    for n in node.childNodes:
+        if n.nodeType == n.TEXT_NODE:
+            text.append(n.data)
+        elif n.tagName == 'office:annotation':
+            continue
+        elif n.tagName == 'text:s':
+            text.append(' ' * int(n.getAttribute('c') or 1))
+        elif n.tagName in ('text:tab', 'text:line-break'):
+            text.append(' ')
+        else:
+            text.append(get_paragraph_text(n))
+    return ''.join(text)
+
+def get_style_languages(doc):
+    """
+    Return {style name: language code} (e.g. 'sg_CF') for all styles that set
+    a language directly or through their parent styles.
+    """
+    odf = _import_odf()
+    own = {}
+    parents = {}
+    for name, style in doc._styles_dict.items():
+        parents[name] = style.getAttribute('parentstylename')
+        for tp in style.getElementsByType(odf.TextProperties):
+            lg = tp.getAttribute('language')
+            CN = tp.getAttribute('country')
+            if lg and CN:
+                own[name] = f"{lg}_{CN}"
+
+    languages = {}
+    for name in parents.keys():
+        # Follow the parent chain until a language is found.
+        n = name
+        seen = set()
+        while n and n not in own and n not in seen:
+            seen.add(n)
+            n = parents.get(n)
+        if n in own:
+            languages[name] = own.get(n)
+    return languages
+
+def get_language_styles(doc, lang_code):
+    """Return the names of styles whose text properties match lang_code."""
+    return {n for n, lc in get_style_languages(doc).items() if lc == lang_code}
+
+def iter_paragraph_refs(doc):
+    """
+    Yield (chapter, verse, paragraph, text) for each non-empty paragraph,
+    tracking chapters from "P###" headings and verses from "Panel #" headings.
+    """
+    chapter = 0
+    verse = 1
+    for p in get_elements(doc, 'text:p'):
+        if is_comment_paragraph(doc, p):
+            # Comment contents are not part of the text.
+            continue
+        text = get_paragraph_text(p)
+        if not text.strip():
+            continue
+        ch_match = regex_chapter.search(text)
+        v_match = regex_verse.search(text)
+        if ch_match:
+            chapter = fix_chapter_number(int(ch_match.group(1)))
+            verse = 1
+        if v_match:
+            verse = int(v_match.group(1))
+        yield chapter, verse, p, text
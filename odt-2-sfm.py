@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+"""
+Convert a language-tagged ODT (or its IR file) into the SAB and EAB Paratext
+SFM files in one pass. Paragraphs are routed by language, "P###" headings go
+to every output, and the rules of clean-up-text.sh and convert-txt-2-sfm.sh
+are applied line by line.
+"""
+
+import argparse
+import irutils
+import odfutils
+import re
+import scriptutils
+
+from pathlib import Path
+
+
+# Output projects by paragraph language.
+PROJECTS = {
+    'sg_CF': {'name': 'SAB', 'lang': 'sg-CF', 'panel': 'Kapa'},
+    'en_US': {'name': 'EAB', 'lang': 'en-US', 'panel': 'Panel'},
+}
+regex_heading = re.compile(r'^\s*[pP][0-9]{2,3}')
+
+# Rules from clean-up-text.sh, in order: (pattern, replacement, nth). Rules
+#   with nth=None replace the first match on every line; the others only
+#   replace the nth match in the whole file.
+CLEANUP_RULES = [
+    # Remove non-breaking spaces that begin lines.
+    (r'^\xa0', '', None),
+    # Remove work records ##/##/##.
+    (r'[0-9]{1,2}/[0-9]{1,2}/[0-9]{1,2}.*$', '', None),
+    # Remove all xxx### markers.
+    (r'xxx[0-9]+\s*', '', None),
+    # Fix out-of-order chapter 254.
+    (r'P254', 'P750', 2),
+    # Fix poorly-formatted page numbers.
+    (r'^p([0-9]{2,3})', r'P\1', None),
+    # Fix mis-numbered page numbers.
+    (r'P318', 'P320', None),
+    (r'P317', 'P319', None),
+    (r'P316', 'P318', 2),
+    (r'P315', 'P317', 2),
+    (r'P563', 'P564', 2),
+    (r'P748', 'P749', None),
+    (r'P747', 'P748', 2),
+]
+
+
+def compile_rules(rules):
+    return [(re.compile(f), r, n) for f, r, n in rules]
+
+def new_state(rules):
+    """Return per-output match counters for the nth-occurrence rules."""
+    return {i: 0 for i, (f, r, n) in enumerate(rules) if n}
+
+def apply_rules(line, rules, state):
+    for i, (f, r, n) in enumerate(rules):
+        if n is None:
+            line = f.sub(r, line, count=1)
+            continue
+        for m in f.finditer(line):
+            state[i] += 1
+            if state[i] == n:
+                line = line[:m.start()] + m.expand(r) + line[m.end():]
+                break
+    return line
+
+def get_sfm_rules(panel):
+    # Rules from convert-txt-2-sfm.sh.
+    return compile_rules([
+        # Add chapter markers.
+        (r'P([0-9]+)', r'\\c \1', None),
+        # Fix out-of-order chapter 254.
+        (r'\\c 254', r'\\c 750', 2),
+        # Add verse markers.
+        (f'{panel}\\s*([0-9]+)', r'\\v \1', None),
+    ])
+
+def convert_line(text, output):
+    """Return the SFM line for a paragraph's text, or None if it's removed."""
+    line = apply_rules(text.strip(), output.get('cleanup'), output.get('cleanup_state'))
+    if not line.strip():
+        # Remove blank lines.
+        return None
+    line = apply_rules(line, output.get('sfm'), output.get('sfm_state'))
+    if not line.startswith('\\'):
+        # Add paragraph markers.
+        line = f"\\p {line}"
+    return line
+
+def iter_records(infile):
+    if irutils.is_ir_file(infile):
+        yield from irutils.iter_records(infile)
+    else:
+        exporter = scriptutils.import_script('export-odt-ir')
+        doc = odfutils.load_doc(infile)
+        yield from exporter.iter_odt_records(doc, 'XXA')
+
+def get_outfile(outdir, project):
+    filename = f"94XXA{project.get('name')}.SFM"
+    if outdir:
+        return Path(outdir) / filename
+    return Path.home() / 'Paratext8Projects' / project.get('name') / filename
+
+def confirm_overwrite(outfile):
+    if not outfile.exists():
+        return True
+    ans = input(f"Are you sure you want to overwrite the current {outfile}? [y/N]: ")
+    if ans.strip().lower() == 'y':
+        return True
+    print(f"{outfile} not overwritten.")
+    return False
+
+def write_sfm(records, outputs):
+    """
+    Route each record to the outputs in a single pass, writing all SFM files
+    at once. Return the number of paragraphs skipped for other languages.
+    """
+    skipped = 0
+    for r in records:
+        text = r.get('text')
+        if regex_heading.search(text):
+            targets = outputs.values()
+        elif r.get('lang') in outputs:
+            targets = [outputs.get(r.get('lang'))]
+        else:
+            skipped += 1
+            continue
+        for output in targets:
+            line = convert_line(text, output)
+            if line is not None:
+                output.get('file').write(f"{line}\n")
+                output['lines'] += 1
+    return skipped
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('infile', help="language-tagged ODT file or its IR (.jsonl) file")
+    parser.add_argument('-o', '--outdir', help="directory for the SFM files [default: ~/Paratext8Projects/NAME/]")
+    parser.add_argument('-y', '--yes', action='store_true', help="overwrite existing SFM files without asking")
+    args = parser.parse_args()
+
+    infile = Path(args.infile)
+    if infile.suffix not in ['.odt', irutils.IR_SUFFIX]:
+        print("Error: Need to pass an ODT or IR (.jsonl) file as the first argument.")
+        exit(1)
+    if not infile.is_file():
+        print("Error: Input file does not exist.")
+        exit(1)
+    infile = infile.resolve()
+
+    # Set up one output per project.
+    cleanup_rules = compile_rules(CLEANUP_RULES)
+    outputs = {}
+    for lang_code, project in PROJECTS.items():
+        outfile = get_outfile(args.outdir, project)
+        if not args.yes and not confirm_overwrite(outfile):
+            continue
+        sfm_rules = get_sfm_rules(project.get('panel'))
+        outputs[lang_code] = {
+            'outfile': outfile,
+            'cleanup': cleanup_rules,
+            'cleanup_state': new_state(cleanup_rules),
+            'sfm': sfm_rules,
+            'sfm_state': new_state(sfm_rules),
+            'lines': 0,
+        }
+    if not outputs:
+        exit(0)
+
+    try:
+        for lang_code, output in outputs.items():
+            output['outfile'].parent.mkdir(parents=True, exist_ok=True)
+            output['file'] = open(output.get('outfile'), 'w', encoding='utf-8')
+            # Add ID.
+            output['file'].write(f"\\id XXA - Action Bible ({PROJECTS.get(lang_code).get('lang')})\n")
+        skipped = write_sfm(iter_records(infile), outputs)
+    finally:
+        for output in outputs.values():
+            if output.get('file'):
+                output.get('file').close()
+
+    for output in outputs.values():
+        print(f"{output.get('lines')} lines written to {output.get('outfile')}.")
+    print(f"{skipped} paragraphs in other languages skipped.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+"""
+Re-anchor exported Paratext notes against the current SFM text. Each note's
+ContextBefore, SelectedText, and ContextAfter are matched approximately
+against the verses, and its VerseRef, StartPosition, and Verse are updated.
+Notes that can't be placed are reported and left unchanged.
+"""
+
+import argparse
+import sfmutils
+import textutils
+import xmlutils
+
+from collections import Counter
+from pathlib import Path
+
+
+book = 'XXA'
+# q-gram length for the candidate verse index.
+q = 4
+# Number of rarest pattern q-grams used to vote for candidate verses.
+vote_grams = 8
+# q-grams found in more than this share of the verses are too common to vote.
+max_gram_share = 0.01
+# Number of candidate verses checked with the edit-distance search.
+max_candidates = 3
+# Characters of context used on each side of the selection.
+context_len = 40
+# Allowed edit distance as a share of the pattern length.
+max_error_rate = 0.25
+
+
+def normalize_text(text):
+    return ' '.join(textutils.normalize(text).split())
+
+def read_verses(infile):
+    """Return {(chapter, verse): normalized verse text} from an SFM file."""
+    parts = {}
+    for i, chapter, verse, text in sfmutils.iter_verse_text(sfmutils.iter_lines(infile)):
+        parts.setdefault((chapter, verse), []).append(text)
+    return {k: normalize_text(' '.join(v)) for k, v in parts.items()}
+
+def iter_qgrams(text):
+    for i in range(len(text) - q + 1):
+        yield text[i:i+q]
+
+def build_index(verses):
+    """Return an inverted index: q-gram -> set of verse keys."""
+    index = {}
+    for key, text in verses.items():
+        for g in set(iter_qgrams(text.lower())):
+            index.setdefault(g, set()).add(key)
+    return index
+
+def get_candidates(pattern, index, ref_key, max_postings):
+    """
+    Return the note's current verse and its neighbors, followed by the verses
+    sharing the most of the pattern's rarest q-grams.
+    """
+    candidates = []
+    if ref_key:
+        chapter, verse = ref_key
+        candidates = [ref_key, (chapter, verse - 1), (chapter, verse + 1)]
+
+    grams = {g for g in iter_qgrams(pattern.lower()) if g in index}
+    rarest = sorted(grams, key=lambda g: len(index.get(g)))[:vote_grams]
+    votes = Counter()
+    for g in rarest:
+        postings = index.get(g)
+        if len(postings) > max_postings:
+            break
+        votes.update(postings)
+    for k, n in votes.most_common(max_candidates):
+        if k not in candidates:
+            candidates.append(k)
+    return candidates
+
+def myers_scores(pattern, text):
+    """
+    Return, for each position in text, the lowest edit distance between the
+    pattern and any substring of text ending there (Myers' bit-parallel
+    algorithm, using Python ints as bit vectors).
+    """
+    m = len(pattern)
+    full = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+    peq = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    pv = full
+    mv = 0
+    score = m
+    scores = []
+    for c in text:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & full) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        scores.append(score)
+    return scores
+
+def find_approximate(pattern, text):
+    """Return (distance, end) of the best approximate match of pattern in text."""
+    if not text:
+        return len(pattern), 0
+    scores = myers_scores(pattern, text)
+    best = min(scores)
+    return best, scores.index(best) + 1
+
+def find_match_start(pattern, text, dist, end):
+    """Search backwards from a match's end to find where it starts."""
+    rev_scores = myers_scores(pattern[::-1], text[:end][::-1])
+    rev_end = next((i for i, s in enumerate(rev_scores) if s <= dist), len(pattern) - 1)
+    return max(0, end - (rev_end + 1))
+
+def get_pattern(note):
+    """Return the search pattern and the offset of the note's anchor within it."""
+    before = normalize_text(note.get('ContextBefore', ''))[-context_len:]
+    selected = normalize_text(note.get('SelectedText', ''))
+    after = normalize_text(note.get('ContextAfter', ''))[:context_len]
+    pattern = ' '.join(p for p in [before, selected, after] if p)
+    offset = len(before) + 1 if before else 0
+    if not selected:
+        offset = len(before) if before else 0
+    return pattern, offset, selected
+
+def parse_ref(verse_ref):
+    try:
+        chapter, verse = verse_ref.split()[1].split(':')
+        return int(chapter), int(verse)
+    except (IndexError, ValueError):
+        return None
+
+def place_note(note, verses, index):
+    """Return (verse key, start position) for the note, or None if it can't be placed."""
+    pattern, offset, selected = get_pattern(note)
+    if not pattern.strip():
+        return None
+    ref_key = parse_ref(note.get('VerseRef', ''))
+
+    # Most notes are still exactly where they were.
+    best = None
+    ref_text = verses.get(ref_key)
+    if ref_text and pattern in ref_text:
+        best = ((0, False), ref_key, ref_text.find(pattern), None)
+    else:
+        max_postings = max(1, int(len(verses) * max_gram_share))
+        for key in get_candidates(pattern, index, ref_key, max_postings):
+            text = verses.get(key)
+            if text is None:
+                continue
+            dist, end = find_approximate(pattern, text)
+            # Prefer lower distance, then the note's current verse.
+            rank = (dist, key != ref_key)
+            if best is None or rank < best[0]:
+                best = (rank, key, None, end)
+            if dist <= 1:
+                # Close enough; don't look further.
+                break
+    max_errors = max(1, int(len(pattern) * max_error_rate))
+    if best is None or best[0][0] > max_errors:
+        return None
+
+    (dist, not_ref), key, start, end = best
+    text = verses.get(key)
+    if start is None:
+        start = find_match_start(pattern, text, dist, end)
+    position = min(start + offset, len(text))
+    if selected:
+        # Snap to the nearest exact occurrence of the selection, if close by.
+        hits = [i for i in find_all(text, selected) if abs(i - position) <= len(pattern)]
+        if hits:
+            position = min(hits, key=lambda i: abs(i - position))
+    return key, position
+
+def find_all(text, sub):
+    i = text.find(sub)
+    while i != -1:
+        yield i
+        i = text.find(sub, i + 1)
+
+def reanchor_notes(comments, verses, index):
+    moved = 0
+    unplaced = []
+    for c in comments:
+        placement = place_note(c, verses, index)
+        if placement is None:
+            unplaced.append(c)
+            continue
+        (chapter, verse), position = placement
+        verse_ref = sfmutils.format_ref(book, chapter, verse)
+        if verse_ref != c.get('VerseRef') or str(position) != c.get('StartPosition'):
+            moved += 1
+        c['VerseRef'] = verse_ref
+        c['StartPosition'] = str(position)
+        if 'Verse' in c:
+            c['Verse'] = verses.get((chapter, verse))
+    return moved, unplaced
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('sfm', help="current SFM file")
+    parser.add_argument('notes', nargs='+', help="Paratext Notes_USER.xml files")
+    parser.add_argument('-s', '--suffix', default='_reanchored', help="suffix added to output file names [%(default)s]")
+    args = parser.parse_args()
+
+    sfm_file = Path(args.sfm)
+    if not sfm_file.is_file():
+        print("Error: SFM file does not exist.")
+        exit(1)
+
+    verses = read_verses(sfm_file)
+    index = build_index(verses)
+
+    for n in args.notes:
+        infile = Path(n)
+        if not infile.is_file():
+            print(f"Error: {infile} does not exist.")
+            continue
+        user, comments = xmlutils.read_notes_xml(infile)
+        moved, unplaced = reanchor_notes(comments, verses, index)
+        outfile = infile.with_name(f"{infile.stem}{args.suffix}{infile.suffix}")
+        outfile.write_text(xmlutils.build_notes_xml(user, comments))
+        print(f"{infile.name}: {len(comments)} notes, {moved} moved, {len(unplaced)} not placed; written to {outfile}.")
+        for c in unplaced:
+            print(f"   not placed: {c.get('Thread')} {c.get('VerseRef')} \"{c.get('SelectedText') or c.get('ContextBefore')[-30:]}\"")
+
+
+if __name__ == '__main__':
+    main()
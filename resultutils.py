@@ -0,0 +1,155 @@
+import csv
+import numpy as np
+
+
+# Value of each column for rows that don't set it: no language or stage, and
+#   no evidence (as opposed to zero hits).
+FILL_VALUES = {
+    'lang': -1,
+    'stage': -1,
+    'offset': 0,
+    'length': 0,
+    'confidence': 0,
+    'ortho_scores': np.nan,
+    'dict_scores': np.nan,
+}
+
+
+class ResultStore():
+    """
+    Per-paragraph language results kept in growable numpy columns instead of
+    one Python object per paragraph. A language or stage of -1 means none;
+    paragraphs without text have stage -1.
+    """
+    def __init__(self, lang_codes, stages, capacity=1024):
+        self.lang_codes = list(lang_codes)
+        self.stages = list(stages)
+        self.size = 0
+        self.lang = np.full(capacity, -1, dtype=np.int8)
+        self.stage = np.full(capacity, -1, dtype=np.int8)
+        # Character offset and length of each paragraph's text, with
+        #   paragraphs joined by newlines.
+        self.offset = np.zeros(capacity, dtype=np.int64)
+        self.length = np.zeros(capacity, dtype=np.int32)
+        # Confidence (0 to 1) of the stage that decided the language.
+        self.confidence = np.zeros(capacity, dtype=np.float32)
+        # Evidence per language: stop-word and marker hits, and words found by
+        #   hunspell; NaN where that evidence wasn't gathered.
+        self.ortho_scores = np.full((capacity, len(self.lang_codes)), np.nan, dtype=np.float32)
+        self.dict_scores = np.full((capacity, len(self.lang_codes)), np.nan, dtype=np.float32)
+        self.next_offset = 0
+
+    def __len__(self):
+        return self.size
+
+    def grow(self):
+        capacity = len(self.lang) * 2
+        for name, fill in FILL_VALUES.items():
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append(self, length, lang_code=None, stage=None, confidence=0.0, evidence=None):
+        """
+        Add one paragraph's result. evidence is determine_language's
+        {'orthography': {lang_code: score}, 'dictionary': {lang_code: score}};
+        either may be missing.
+        """
+        if self.size == len(self.lang):
+            self.grow()
+        i = self.size
+        self.lang[i] = self.lang_codes.index(lang_code) if lang_code in self.lang_codes else -1
+        self.stage[i] = self.stages.index(stage) if stage in self.stages else -1
+        self.offset[i] = self.next_offset
+        self.length[i] = length
+        self.confidence[i] = confidence
+        evidence = evidence or {}
+        if evidence.get('orthography') is not None:
+            self.ortho_scores[i] = [evidence.get('orthography').get(l, 0) for l in self.lang_codes]
+        if evidence.get('dictionary') is not None:
+            self.dict_scores[i] = [evidence.get('dictionary').get(l, 0) for l in self.lang_codes]
+        self.next_offset += length + 1
+        self.size += 1
+
+    def columns(self):
+        """Return {name: array} trimmed to the stored paragraphs."""
+        return {name: getattr(self, name)[:self.size] for name in FILL_VALUES.keys()}
+
+
+def get_language_counts(store):
+    """Return {lang_code: count} for paragraphs with text, plus 'empty' and 'unknown'."""
+    c = store.columns()
+    has_text = c.get('stage') >= 0
+    by_lang = np.bincount(c.get('lang')[has_text & (c.get('lang') >= 0)], minlength=len(store.lang_codes))
+    counts = {l: int(ct) for l, ct in zip(store.lang_codes, by_lang)}
+    counts['empty'] = int((~has_text).sum())
+    counts['unknown'] = int((has_text & (c.get('lang') < 0)).sum())
+    return counts
+
+def get_stage_counts(store):
+    c = store.columns()
+    by_stage = np.bincount(c.get('stage')[c.get('stage') >= 0], minlength=len(store.stages))
+    return {s: int(ct) for s, ct in zip(store.stages, by_stage)}
+
+def get_confidence_histogram(store, bins=10, stage=None):
+    """
+    Return (counts, bin edges) of the confidence of paragraphs with text,
+    or only of those decided by the given stage.
+    """
+    c = store.columns()
+    rows = c.get('stage') >= 0 if stage is None else c.get('stage') == store.stages.index(stage)
+    return np.histogram(c.get('confidence')[rows], bins=bins, range=(0.0, 1.0))
+
+def print_confidence_histogram(store, bins=10):
+    """Print paragraph counts by confidence, one column per stage that decided any."""
+    stages = [s for s, ct in get_stage_counts(store).items() if ct]
+    if not stages:
+        return
+    histograms = [get_confidence_histogram(store, bins, s) for s in stages]
+    edges = histograms[0][1]
+    sp = ' '*3
+    print(f"\nConfidence by stage:")
+    print(f"{sp}{'':7}" + ''.join(f"{s:>12}" for s in stages))
+    for b, (lo, hi) in enumerate(zip(edges[:-1], edges[1:])):
+        print(f"{sp}{lo:.1f}-{hi:.1f}" + ''.join(f"{h[0][b]:12}" for h in histograms))
+
+def format_score(score):
+    # Evidence that wasn't gathered is left blank.
+    return '' if np.isnan(score) else f"{score:g}"
+
+def write_csv(store, outfile):
+    c = store.columns()
+    with open(outfile, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ['paragraph', 'offset', 'length', 'lang', 'stage', 'confidence']
+            + [f"ortho_{l}" for l in store.lang_codes]
+            + [f"dict_{l}" for l in store.lang_codes]
+        )
+        for i in range(store.size):
+            lang = c.get('lang')[i]
+            stage = c.get('stage')[i]
+            writer.writerow(
+                [i, c.get('offset')[i], c.get('length')[i],
+                store.lang_codes[lang] if lang >= 0 else '',
+                store.stages[stage] if stage >= 0 else '',
+                f"{c.get('confidence')[i]:.3f}"]
+                + [format_score(s) for s in c.get('ortho_scores')[i]]
+                + [format_score(s) for s in c.get('dict_scores')[i]]
+            )
+
+def write_npz(store, outfile):
+    np.savez_compressed(
+        outfile,
+        lang_codes=np.array(store.lang_codes),
+        stages=np.array(store.stages),
+        **store.columns(),
+    )
+
+def write_results(store, outfile):
+    """Write the results to outfile as CSV or NPZ, by its suffix."""
+    if outfile.suffix.lower() == '.npz':
+        write_npz(store, outfile)
+    else:
+        write_csv(store, outfile)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+Run the language tagging, splitting, and comment export stages on an ODT file.
+With --watch, keep the dictionaries loaded and re-run the stages each time the
+file is saved, reusing language results for unchanged paragraphs.
+"""
+
+import argparse
+import hs
+import odfutils
+import scriptutils
+import sys
+import time
+
+from pathlib import Path
+
+
+STAGES = ['tag', 'split', 'comments']
+
+
+def new_cache():
+    return {'previous': {}, 'current': {}, 'hits': 0}
+
+def start_cycle(cache):
+    """Keep only the results seen in the last cycle so the cache can't grow unbounded."""
+    cache['previous'] = cache.get('current')
+    cache['current'] = {}
+    cache['hits'] = 0
+
+def cache_results(determine_language, cache):
+    """
+    Wrap a determine_language function so that paragraphs already seen with
+    the same context reuse their earlier result.
+    """
+    def cached(words, *args):
+        # Dictionaries are the same on every call; only hashable args vary.
+        key = (tuple(words),) + tuple(a for a in args if not isinstance(a, dict))
+        result = cache['current'].get(key) or cache['previous'].get(key)
+        if result is None:
+            result = determine_language(words, *args)
+        else:
+            cache['hits'] += 1
+        cache['current'][key] = result
+        return result
+    return cached
+
+def get_file_state(infile):
+    stat = infile.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+def wait_for_change(infile, last_state, interval):
+    """Poll infile until it changes and then stays unchanged for one interval."""
+    while True:
+        time.sleep(interval)
+        try:
+            state = get_file_state(infile)
+        except FileNotFoundError:
+            # The editor may briefly remove the file while saving.
+            continue
+        if state == last_state:
+            continue
+        time.sleep(interval)
+        try:
+            if get_file_state(infile) == state:
+                return state
+        except FileNotFoundError:
+            continue
+
+def run_stage(stage, doc, infile, scripts, hs_dics, languages):
+    if stage == 'tag':
+        tagger = scripts.get('tag')
+        tag_dics = {l: hs_dics.get(l) for l in languages}
+        langstr = f"__{'__'.join(languages)}"
+        outfile = infile.with_name(f"{infile.stem}{langstr}{infile.suffix}")
+        doc = odfutils.update_autostyles(doc, tag_dics.keys())
+        doc, results = tagger.update_paragraphs_styles(doc, tag_dics)
+        odfutils.save_doc(doc, infile, outfile)
+        tagger.print_summary(results, tag_dics)
+
+    elif stage == 'split':
+        splitter = scripts.get('split')
+        split_langs = languages + ['unknown']
+        split_dics = {l: hs_dics.get(l) for l in split_langs}
+        outfiles = {l: infile.with_name(f"{infile.stem}_{l}.txt") for l in split_langs}
+        counts = splitter.split_units(splitter.iter_paragraphs(doc), split_dics, languages[0], outfiles)
+        splitter.print_summary(counts, 'paragraph')
+
+    elif stage == 'comments':
+        comment_count, outfiles = scripts.get('comments').export_comments(doc, infile)
+        print(f"\n{comment_count} comments found and exported to {infile.parents[0]}.")
+    return doc
+
+def run_stages(infile, stages, scripts, hs_dics, languages, caches):
+    """
+    Run the stages in order. Return None, or the stage that failed ('load' if
+    the file couldn't be read) and its exception; later stages aren't run.
+    """
+    stage = 'load'
+    try:
+        doc = odfutils.load_doc(infile)
+        for stage in stages:
+            if stage in caches:
+                start_cycle(caches.get(stage))
+            doc = run_stage(stage, doc, infile, scripts, hs_dics, languages)
+    except Exception as e:
+        return stage, e
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('infile', help="ODT file")
+    parser.add_argument('-s', '--stages', default=','.join(STAGES), help=f"comma-separated stages to run [{','.join(STAGES)}]")
+    parser.add_argument('-w', '--watch', action='store_true', help="re-run the stages whenever the file changes")
+    parser.add_argument('-i', '--interval', type=float, default=1.0, help="seconds between checks for changes")
+    args = parser.parse_args()
+
+    infile = Path(args.infile)
+    if infile.suffix != '.odt':
+        print("Error: Need to pass an ODT file as the first argument.")
+        exit(1)
+    if not infile.is_file():
+        print("Error: Input file does not exist.")
+        exit(1)
+    infile = infile.resolve()
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    for s in stages:
+        if s not in STAGES:
+            print(f"Error: Unknown stage \"{s}\". Choose from: {', '.join(STAGES)}")
+            exit(1)
+
+    # Load scripts and hunspell dictionaries once.
+    languages = ['en_US', 'fr_FR', 'sg_CF']
+    dict_dir = scriptutils.repo_root / 'dict'
+    scripts = {}
+    caches = {}
+    if 'tag' in stages:
+        scripts['tag'] = scriptutils.import_script('update-odt-lg')
+    if 'split' in stages:
+        scripts['split'] = scriptutils.import_script('split-by-language')
+    for s, script in scripts.items():
+        caches[s] = new_cache()
+        script.determine_language = cache_results(script.determine_language, caches[s])
+    if 'comments' in stages:
+        scripts['comments'] = scriptutils.import_script('convert-odt-comments-to-xml')
+    hs_dics = {}
+    if 'tag' in stages or 'split' in stages:
+        hs_dics = {l: hs.get_hs_dic(dict_dir, l) for l in languages}
+
+    state = get_file_state(infile)
+    while True:
+        start = time.perf_counter()
+        failed = run_stages(infile, stages, scripts, hs_dics, languages, caches)
+        elapsed = time.perf_counter() - start
+        if failed:
+            stage, e = failed
+            print(f"\nError: {stage} stage failed: {e.__class__.__name__}: {e}")
+            # Its partial results can't be trusted; the other stages' can.
+            if stage in caches:
+                caches.get(stage).update(new_cache())
+            if not args.watch:
+                exit(1)
+        else:
+            hits = sum(c.get('hits') for c in caches.values())
+            print(f"\nFinished {', '.join(stages)} in {elapsed:.2f} s ({hits} cached paragraph results reused).")
+            if not args.watch:
+                break
+        print(f"Watching {infile.name} for changes; press Ctrl+C to stop.")
+        try:
+            state = wait_for_change(infile, state, args.interval)
+        except KeyboardInterrupt:
+            print()
+            break
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+"""
+Run the ODT-to-SFM conversion pipeline, skipping stages that are up to date.
+
+    tag -> ir -> sfm -> compare
+                     -> usx
+              -> comments
+
+Each stage's input files (and the scripts it uses) are tracked by content
+hash; a stage only runs when one of them changed or an output is missing.
+Stages that don't depend on each other (sfm and comments) run in parallel.
+All stages share one process, so scripts and dictionaries are loaded once.
+"""
+
+import argparse
+import hashlib
+import hs
+import irutils
+import json
+import odfutils
+import scriptutils
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+LANGUAGES = ['en_US', 'fr_FR', 'sg_CF']
+BOOK = 'XXA'
+
+
+class Pipeline():
+    """Shared state for one pipeline run: paths, loaded scripts, and dictionaries."""
+    def __init__(self, infile, outdir):
+        self.infile = infile
+        self.outdir = outdir
+        langstr = f"__{'__'.join(LANGUAGES)}"
+        self.tagged = outdir / f"{infile.stem}{langstr}{infile.suffix}"
+        self.ir = self.tagged.with_suffix('.jsonl')
+        self.sab = outdir / "94XXASAB.SFM"
+        self.eab = outdir / "94XXAEAB.SFM"
+        self.report = outdir / f"{infile.stem}_compare-markers.txt"
+        self.state_file = outdir / f".{infile.stem}_pipeline.json"
+        self.dict_dir = scriptutils.repo_root / 'dict'
+        self.scripts = {}
+        self.hs_dics = None
+
+    def script(self, name):
+        if name not in self.scripts:
+            self.scripts[name] = scriptutils.import_script(name)
+        return self.scripts.get(name)
+
+    def get_hs_dics(self):
+        if self.hs_dics is None:
+            self.hs_dics = {l: hs.get_hs_dic(self.dict_dir, l) for l in LANGUAGES}
+        return self.hs_dics
+
+
+def run_tag(pl):
+    tagger = pl.script('update-odt-lg')
+    hs_dics = pl.get_hs_dics()
+    doc = odfutils.load_doc(pl.infile)
+    doc = odfutils.update_autostyles(doc, hs_dics.keys())
+    doc, results = tagger.update_paragraphs_styles(doc, hs_dics)
+    odfutils.save_doc(doc, pl.infile, pl.tagged)
+    tagger.print_summary(results, hs_dics)
+    return [pl.tagged]
+
+def run_ir(pl):
+    exporter = pl.script('export-odt-ir')
+    doc = odfutils.load_doc(pl.tagged)
+    ct = irutils.write_records(pl.ir, exporter.iter_odt_records(doc, BOOK), source=pl.tagged.name)
+    print(f"{ct} paragraphs exported to {pl.ir}.")
+    return [pl.ir]
+
+def run_sfm(pl):
+    converter = pl.script('odt-2-sfm')
+    cleanup_rules = converter.compile_rules(converter.CLEANUP_RULES)
+    outputs = {}
+    for lang_code, outfile in [('sg_CF', pl.sab), ('en_US', pl.eab)]:
+        project = converter.PROJECTS.get(lang_code)
+        sfm_rules = converter.get_sfm_rules(project.get('panel'))
+        outputs[lang_code] = {
+            'outfile': outfile,
+            'cleanup': cleanup_rules,
+            'cleanup_state': converter.new_state(cleanup_rules),
+            'sfm': sfm_rules,
+            'sfm_state': converter.new_state(sfm_rules),
+            'lines': 0,
+        }
+    try:
+        for lang_code, output in outputs.items():
+            output['file'] = open(output.get('outfile'), 'w', encoding='utf-8')
+            output['file'].write(f"\\id {BOOK} - Action Bible ({converter.PROJECTS.get(lang_code).get('lang')})\n")
+        converter.write_sfm(converter.iter_records(pl.ir), outputs)
+    finally:
+        for output in outputs.values():
+            if output.get('file'):
+                output.get('file').close()
+    for output in outputs.values():
+        print(f"{output.get('lines')} lines written to {output.get('outfile')}.")
+    return [pl.sab, pl.eab]
+
+def run_comments(pl):
+    exporter = pl.script('convert-odt-comments-to-xml')
+    comment_count, outfiles = exporter.export_comments(None, pl.ir)
+    print(f"{comment_count} comments found and exported to {pl.ir.parents[0]}.")
+    return outfiles
+
+def run_usx(pl):
+    exporter = pl.script('sfm-2-usx')
+    outfiles = []
+    for sfm in [pl.sab, pl.eab]:
+        outfile = sfm.with_suffix('.usx')
+        counts = exporter.convert_file(sfm, outfile)
+        print(f"{counts.get('verses')} verses written to {outfile}.")
+        outfiles.append(outfile)
+    return outfiles
+
+def run_compare(pl):
+    comparer = pl.script('compare-markers')
+    lines = comparer.get_report_lines(pl.sab, pl.eab)
+    pl.report.write_text('\n'.join(lines) + '\n')
+    print(f"Marker comparison written to {pl.report}.")
+    return [pl.report]
+
+# Each stage: (depends on, input files, scripts used, function).
+STAGES = {
+    'tag': ([], lambda pl: [pl.infile], ['update-odt-lg', 'odfutils', 'lgutils', 'textutils', 'diffutils', 'hs', 'memutils', 'scriptutils', 'hmmutils', 'resultutils'], run_tag),
+    'ir': (['tag'], lambda pl: [pl.tagged], ['export-odt-ir', 'irutils', 'odfutils', 'convert-odt-comments-to-xml'], run_ir),
+    'sfm': (['ir'], lambda pl: [pl.ir], ['odt-2-sfm', 'irutils'], run_sfm),
+    'comments': (['ir'], lambda pl: [pl.ir], ['convert-odt-comments-to-xml', 'xmlutils', 'odfutils', 'irutils'], run_comments),
+    'compare': (['sfm'], lambda pl: [pl.sab, pl.eab], ['compare-markers'], run_compare),
+    'usx': (['sfm'], lambda pl: [pl.sab, pl.eab], ['sfm-2-usx', 'sfmutils'], run_usx),
+}
+
+
+def get_file_sha1(infile):
+    h = hashlib.sha1()
+    with open(infile, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def get_stage_hashes(pl, name):
+    """Return {path: sha1} for a stage's input files and scripts."""
+    deps, get_inputs, scripts, func = STAGES.get(name)
+    paths = get_inputs(pl) + [scriptutils.repo_root / f"{s}.py" for s in scripts]
+    if name == 'tag':
+        paths += [pl.dict_dir / f"{l}{s}" for l in LANGUAGES for s in ['.aff', '.dic']]
+    return {str(p): get_file_sha1(p) if p.is_file() else None for p in paths}
+
+def is_up_to_date(state, name, hashes):
+    entry = state.get(name)
+    if not entry or entry.get('inputs') != hashes:
+        return False
+    return all(Path(o).is_file() for o in entry.get('outputs'))
+
+def get_required_stages(targets):
+    """Return targets plus all the stages they depend on, in dependency order."""
+    ordered = []
+    def visit(name):
+        if name in ordered:
+            return
+        for d in STAGES.get(name)[0]:
+            visit(d)
+        ordered.append(name)
+    for t in targets:
+        visit(t)
+    return ordered
+
+def run_stage(pl, name):
+    start = time.perf_counter()
+    outputs = STAGES.get(name)[3](pl)
+    return [str(o) for o in outputs], time.perf_counter() - start
+
+def run_pipeline(pl, stages, state, force=False, dry_run=False, jobs=2):
+    """
+    Run stages in waves: each wave holds the stages whose dependencies are
+    done, and its stages run in parallel. If a stage fails, the others in
+    its wave still finish and are recorded in state before the error is
+    raised.
+    """
+    done = set()
+    pending = list(stages)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending:
+            wave = [s for s in pending if all(d in done or d not in stages for d in STAGES.get(s)[0])]
+            to_run = {}
+            for name in wave:
+                pending.remove(name)
+                if dry_run and any(d in to_run or state.get(d, {}).get('dry_run') for d in STAGES.get(name)[0]):
+                    # Inputs will change once an earlier stage runs.
+                    state.setdefault(name, {})['dry_run'] = True
+                    print(f"[{name}] would run (after {', '.join(STAGES.get(name)[0])}).")
+                    continue
+                hashes = get_stage_hashes(pl, name)
+                if not force and is_up_to_date(state, name, hashes):
+                    print(f"[{name}] up to date.")
+                    continue
+                if dry_run:
+                    state.setdefault(name, {})['dry_run'] = True
+                    print(f"[{name}] would run.")
+                    continue
+                to_run[name] = hashes
+            futures = {name: pool.submit(run_stage, pl, name) for name in to_run}
+            error = None
+            for name, future in futures.items():
+                try:
+                    outputs, elapsed = future.result()
+                except Exception as e:
+                    # Keep the stages running beside it; they are recorded below.
+                    print(f"[{name}] failed: {e!r}")
+                    state.pop(name, None)
+                    error = error or e
+                    continue
+                state[name] = {'inputs': to_run.get(name), 'outputs': outputs}
+                print(f"[{name}] finished in {elapsed:.2f} s.")
+            if error:
+                raise error
+            done.update(wave)
+    return state
+
+def load_state(state_file):
+    if not state_file.is_file():
+        return {}
+    try:
+        return json.loads(state_file.read_text())
+    except json.JSONDecodeError:
+        return {}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('infile', help="draft ODT file")
+    parser.add_argument('targets', nargs='*', default=['compare', 'usx', 'comments'], help="stages to bring up to date, with their dependencies [compare usx comments]")
+    parser.add_argument('-o', '--outdir', help="directory for all outputs [default: INFILE's directory]")
+    parser.add_argument('-f', '--force', action='store_true', help="run stages even if they are up to date")
+    parser.add_argument('-n', '--dry-run', action='store_true', help="only show which stages would run")
+    parser.add_argument('-j', '--jobs', type=int, default=2, help="number of stages to run at once [%(default)s]")
+    args = parser.parse_intermixed_args()
+
+    infile = Path(args.infile)
+    if infile.suffix != '.odt':
+        print("Error: Need to pass an ODT file as the first argument.")
+        exit(1)
+    if not infile.is_file():
+        print("Error: Input file does not exist.")
+        exit(1)
+    infile = infile.resolve()
+    for t in args.targets:
+        if t not in STAGES:
+            print(f"Error: Unknown stage \"{t}\". Choose from: {', '.join(STAGES)}")
+            exit(1)
+    outdir = Path(args.outdir).resolve() if args.outdir else infile.parent
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    pl = Pipeline(infile, outdir)
+    state = load_state(pl.state_file)
+    stages = get_required_stages(args.targets)
+    start = time.perf_counter()
+    try:
+        state = run_pipeline(pl, stages, state, args.force, args.dry_run, args.jobs)
+    finally:
+        # Record finished stages even if a later one failed.
+        if not args.dry_run:
+            pl.state_file.write_text(json.dumps(state, indent=2))
+    if not args.dry_run:
+        print(f"\nPipeline finished in {time.perf_counter() - start:.2f} s.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import importlib.util
+
+from pathlib import Path
+
+
+repo_root = Path(__file__).resolve().parents[0]
+
+
+def import_script(name):
+    """
+    Import one of the repo's hyphenated scripts (e.g. 'update-odt-lg') as a
+    module so that its functions can be reused without running main().
+    """
+    path = repo_root / f"{name}.py"
+    module_name = name.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def pop_option(argv, name):
+    """
+    Remove "NAME VALUE" or "NAME=VALUE" (e.g. "--results out.csv") from a
+    script's argument list. Return the remaining arguments and VALUE, or None.
+    """
+    args = []
+    value = None
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a == name:
+            i += 1
+            value = argv[i] if i < len(argv) else ''
+        elif a.startswith(f"{name}="):
+            value = a.split('=', 1)[1]
+        else:
+            args.append(a)
+        i += 1
+    return args, value
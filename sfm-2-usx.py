@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+"""
+Convert an SFM file to USX 3.0, one line at a time. Chapter and verse
+milestones get sid/eid attributes as they are reached, so memory use doesn't
+grow with the size of the book.
+"""
+
+import argparse
+import sfmutils
+import time
+
+from pathlib import Path
+
+
+USX_VERSION = '3.0'
+# Paragraph-level markers that end the current verse (headings and titles).
+HEADING_MARKERS = {'h', 'toc', 'mt', 'mte', 'ms', 'mr', 's', 'sr', 'r', 'd', 'sp', 'imt', 'is', 'cl', 'cd'}
+
+
+class UsxWriter():
+    """Write USX elements as SFM lines arrive, tracking open chapters, verses, paragraphs, and character styles."""
+    def __init__(self, out):
+        # saxutils pulls in urllib, so it's only imported once there's work.
+        from xml.sax.saxutils import XMLGenerator
+        self.gen = XMLGenerator(out, encoding='utf-8', short_empty_elements=True)
+        self.book = 'XXX'
+        self.chapter = None
+        self.verse = None
+        self.pending_verse = None
+        self.para_open = False
+        # Open inline elements: 'char' or 'note', with their marker.
+        self.inline = []
+        self.counts = {'chapters': 0, 'verses': 0, 'paragraphs': 0}
+
+    def newline(self):
+        self.gen.ignorableWhitespace('\n')
+
+    def start(self):
+        self.gen.startDocument()
+        self.gen.startElement('usx', {'version': USX_VERSION})
+        self.newline()
+
+    def end(self):
+        self.end_chapter()
+        self.gen.endElement('usx')
+        self.newline()
+        self.gen.endDocument()
+
+    def write_book(self, text):
+        code, name = sfmutils.split_number(text)
+        self.book = code.upper() or self.book
+        self.gen.startElement('book', {'code': self.book, 'style': 'id'})
+        self.gen.characters(name)
+        self.gen.endElement('book')
+        self.newline()
+
+    def open_para(self, style):
+        self.close_para()
+        self.gen.startElement('para', {'style': style})
+        self.para_open = True
+        self.counts['paragraphs'] += 1
+
+    def close_para(self):
+        if not self.para_open:
+            return
+        self.close_inline()
+        self.gen.endElement('para')
+        self.newline()
+        self.para_open = False
+
+    def close_inline(self, keep=0):
+        while len(self.inline) > keep:
+            kind, marker = self.inline.pop()
+            self.gen.endElement(kind)
+
+    def start_verse(self):
+        """Write the sid milestone of a verse once its paragraph is known."""
+        number = self.pending_verse
+        self.pending_verse = None
+        if not self.para_open:
+            self.open_para('p')
+        self.verse = f"{self.book} {self.chapter}:{number}"
+        self.gen.startElement('verse', {'number': number, 'style': 'v', 'sid': self.verse})
+        self.gen.endElement('verse')
+        self.counts['verses'] += 1
+
+    def end_verse(self):
+        if self.pending_verse is not None:
+            # A verse with no text still gets both milestones.
+            self.start_verse()
+        if self.verse is None:
+            return
+        if not self.para_open:
+            self.open_para('p')
+        self.close_inline()
+        self.gen.startElement('verse', {'eid': self.verse})
+        self.gen.endElement('verse')
+        self.verse = None
+
+    def start_chapter(self, number):
+        self.end_chapter()
+        # "\c 01" is chapter 1.
+        number = number.lstrip('0') or number
+        self.chapter = number
+        self.gen.startElement('chapter', {'number': number, 'style': 'c', 'sid': f"{self.book} {number}"})
+        self.gen.endElement('chapter')
+        self.newline()
+        self.counts['chapters'] += 1
+
+    def end_chapter(self):
+        self.end_verse()
+        self.close_para()
+        if self.chapter is None:
+            return
+        self.gen.startElement('chapter', {'eid': f"{self.book} {self.chapter}"})
+        self.gen.endElement('chapter')
+        self.newline()
+        self.chapter = None
+
+    def write_text(self, text):
+        """Write paragraph text, turning inline markers into verse, char, and note elements."""
+        if not text:
+            return
+        if self.pending_verse is not None:
+            self.start_verse()
+        elif not self.para_open:
+            self.open_para('p')
+        pos = 0
+        for m in sfmutils.regex_inline_marker.finditer(text):
+            self.gen.characters(text[pos:m.start()])
+            pos = m.end()
+            nested, marker, closing = m.groups()
+            if closing:
+                self.close_marker(marker)
+                continue
+            # The space after an opening marker is part of the marker.
+            if text[pos:pos+1] == ' ':
+                pos += 1
+            if marker == 'v':
+                # A verse that starts mid-line (e.g. "\c 012 \v 1 Text" from
+                #   odt-2-sfm.py) is a milestone like a line-initial \v.
+                rest = text[pos:].lstrip()
+                num, _ = sfmutils.split_number(rest)
+                pos = len(text) - len(rest) + len(num)
+                if text[pos:pos+1] == ' ':
+                    pos += 1
+                self.end_verse()
+                self.pending_verse = num
+                self.start_verse()
+            elif marker in sfmutils.NOTE_MARKERS:
+                caller, sep, _ = text[pos:].partition(' ')
+                pos += len(caller) + len(sep)
+                self.close_marker(None)
+                self.gen.startElement('note', {'caller': caller or '+', 'style': marker})
+                self.inline.append(('note', marker))
+            else:
+                if marker in sfmutils.NOTE_CHAR_MARKERS or not nested:
+                    # Unnested character styles replace the one that's open.
+                    self.close_char()
+                self.gen.startElement('char', {'style': marker})
+                self.inline.append(('char', marker))
+        self.gen.characters(text[pos:])
+
+    def close_char(self):
+        if self.inline and self.inline[-1][0] == 'char':
+            self.close_inline(len(self.inline) - 1)
+
+    def close_marker(self, marker):
+        """Close the innermost open element for marker, and any inside it; None closes everything."""
+        for i in range(len(self.inline) - 1, -1, -1):
+            if self.inline[i][1] == marker:
+                self.close_inline(i)
+                return
+        if marker is None:
+            self.close_inline()
+
+    def write_line(self, line):
+        marker, text = sfmutils.parse_line(line)
+        if marker is None:
+            # Continuation of the current paragraph.
+            self.write_text(' ' + text.strip() if self.para_open else text.strip())
+            return
+        base = sfmutils.get_base_marker(marker)
+        if marker == 'id':
+            self.write_book(text)
+        elif marker == 'c':
+            num, text = sfmutils.split_number(text)
+            self.start_chapter(num)
+            self.write_text(text)
+        elif marker == 'v':
+            num, text = sfmutils.split_number(text)
+            if self.para_open:
+                # The line break before the marker separates the verses' words.
+                self.gen.characters(' ')
+            self.end_verse()
+            self.pending_verse = num
+            self.write_text(text)
+        elif base in HEADING_MARKERS:
+            self.end_verse()
+            self.open_para(marker)
+            self.write_text(text)
+            self.close_para()
+        else:
+            self.open_para(marker)
+            if self.pending_verse is not None:
+                self.start_verse()
+            self.write_text(text)
+
+
+def convert_file(infile, outfile):
+    with open(outfile, 'w', encoding='utf-8') as out:
+        writer = UsxWriter(out)
+        writer.start()
+        for line in sfmutils.iter_lines(infile):
+            if line.strip():
+                writer.write_line(line)
+        writer.end()
+    return writer.counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('infile', help="SFM file")
+    parser.add_argument('-o', '--outfile', help="USX file [default: INFILE.usx]")
+    args = parser.parse_args()
+
+    infile = Path(args.infile)
+    if not infile.is_file():
+        print("Error: Input file does not exist.")
+        exit(1)
+    infile = infile.resolve()
+    outfile = Path(args.outfile) if args.outfile else infile.with_suffix('.usx')
+
+    start = time.perf_counter()
+    counts = convert_file(infile, outfile)
+    elapsed = time.perf_counter() - start
+    print(f"{counts.get('chapters')} chapters, {counts.get('verses')} verses, and {counts.get('paragraphs')} paragraphs written to {outfile} in {elapsed:.2f} s.")
+
+
+if __name__ == '__main__':
+    main()
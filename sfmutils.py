@@ -0,0 +1,109 @@
+import re
+
+
+regex_marker = re.compile(r'^\\([A-Za-z0-9*+-]+)\s*(.*)$')
+regex_verse_number = re.compile(r'^([0-9]+)(?:-[0-9]+)?$')
+regex_inline_marker = re.compile(r'\\(\+?)([A-Za-z]+[0-9]*)(\*?)')
+regex_number_suffix = re.compile(r'[0-9]+$')
+# A verse marker anywhere in a line, e.g. "\\c 012 \\v 1 Text" from odt-2-sfm.py.
+regex_inline_verse = re.compile(r'\\v(?![A-Za-z0-9*])\s*([^\s\\]*)\s*')
+
+# Common USFM markers; numbered variants (\q1, \q2, ...) match their base name.
+KNOWN_MARKERS = {
+    # Identification and headings.
+    'id', 'ide', 'h', 'toc', 'mt', 'mte', 'ms', 'mr', 's', 'sr', 'r', 'd', 'sp', 'rem', 'sts',
+    # Introductions.
+    'imt', 'is', 'ip', 'ipi', 'im', 'imi', 'ipq', 'imq', 'ipr', 'iq', 'ib', 'ili', 'iot', 'io', 'iex', 'ie',
+    # Chapters and verses.
+    'c', 'ca', 'cl', 'cp', 'cd', 'v', 'va', 'vp',
+    # Paragraphs and poetry.
+    'p', 'm', 'po', 'pr', 'cls', 'pmo', 'pm', 'pmc', 'pmr', 'pi', 'mi', 'nb', 'pc', 'ph', 'b',
+    'q', 'qr', 'qc', 'qs', 'qa', 'qac', 'qm', 'qd', 'li', 'lh', 'lf', 'lim',
+    # Footnotes, cross references, and character styles.
+    'f', 'fe', 'fr', 'fq', 'fqa', 'fk', 'fl', 'fw', 'fp', 'fv', 'ft', 'fdc', 'fm',
+    'x', 'xo', 'xk', 'xq', 'xt', 'xta', 'xop', 'xot', 'xnt', 'xdc',
+    'add', 'bk', 'dc', 'k', 'nd', 'ord', 'pn', 'png', 'qt', 'sig', 'sls', 'tl', 'wj',
+    'em', 'bd', 'it', 'bdit', 'no', 'sc', 'sup', 'w', 'wg', 'wh', 'wa', 'rb', 'pro', 'fig', 'ndx',
+}
+# Markers that start a paragraph, which should hold some text.
+PARAGRAPH_MARKERS = {
+    'p', 'm', 'po', 'pr', 'cls', 'pmo', 'pm', 'pmc', 'pmr', 'pi', 'mi', 'nb', 'pc', 'ph',
+    'q', 'qr', 'qc', 'qm', 'li', 'lim', 'ip', 'ipi', 'im', 'imi', 'ipq', 'imq', 'ipr', 'iq', 'ili',
+}
+# Markers that start a footnote or cross reference, and the markers used inside them.
+NOTE_MARKERS = {'f', 'fe', 'x'}
+NOTE_CHAR_MARKERS = {
+    'fr', 'fq', 'fqa', 'fk', 'fl', 'fw', 'fp', 'fv', 'ft', 'fdc', 'fm',
+    'xo', 'xk', 'xq', 'xt', 'xta', 'xop', 'xot', 'xnt', 'xdc',
+}
+
+
+def iter_lines(infile):
+    """Yield the lines of an SFM file one at a time, without newlines."""
+    with open(infile, encoding='utf-8') as f:
+        for line in f:
+            yield line.rstrip('\r\n')
+
+def parse_line(line):
+    """
+    Split an SFM line into its marker (without backslash) and remaining text.
+    Lines that don't start with a marker return None as the marker.
+    """
+    m = regex_marker.match(line)
+    if m:
+        return m.group(1), m.group(2)
+    return None, line
+
+def get_base_marker(marker):
+    """Return a marker without its closing '*', nesting '+', or level number (q2 -> q)."""
+    return regex_number_suffix.sub('', marker.strip('+*'))
+
+def split_number(text):
+    """Split '12 some text' into ('12', 'some text')."""
+    parts = text.split(maxsplit=1)
+    if not parts:
+        return '', ''
+    return parts[0], parts[1] if len(parts) > 1 else ''
+
+def split_verses(text):
+    """
+    Split a line's text on its verse markers. Return the text before the
+    first marker and a list of (number, text) pairs, one per marker.
+    """
+    parts = regex_inline_verse.split(text)
+    return parts[0], list(zip(parts[1::2], parts[2::2]))
+
+def iter_verse_text(lines):
+    """
+    Yield (line_number, chapter, verse, text) for each piece of verse or
+    paragraph text in an SFM file; a line with inline verse markers yields
+    one record per verse. Verse 0 holds text found before the first verse
+    marker of a chapter; a verse bridge (\\v 3-4) counts as its first verse.
+    Malformed chapter or verse numbers keep the previous value; use the SFM
+    validator to find them.
+    """
+    chapter = 0
+    verse = 0
+    for i, line in enumerate(lines, 1):
+        marker, text = parse_line(line)
+        if marker == 'c':
+            num, text = split_number(text)
+            if num.isdigit():
+                chapter = int(num)
+                verse = 0
+        elif marker == 'v':
+            text = '\\v ' + text
+        elif marker == 'id':
+            continue
+        head, verses = split_verses(text)
+        if head.strip():
+            yield i, chapter, verse, head
+        for num, text in verses:
+            m = regex_verse_number.match(num)
+            if m:
+                verse = int(m.group(1))
+            if text.strip():
+                yield i, chapter, verse, text
+
+def format_ref(book, chapter, verse):
+    return f"{book} {chapter}:{verse}"
@@ -1,16 +1,128 @@
 #!/usr/bin/env python3
 
+"""
+Show the code point, name, and normalization details of each character from
+STDIN, or with --audit, stream a whole file and summarize its characters.
+"""
+
+import argparse
+import io
+import re
 import sys
 import unicodedata
 
-charstr = sys.stdin.read().rstrip('\n')
-chars = [c for c in charstr]
-for i, c in enumerate(chars):
-    cname = unicodedata.name(c, None)
-    cnfd = unicodedata.decomposition(c)
-    is_nfc = True
-    if not cnfd:
-        cnfd = None
-        is_nfc = False
-
-    print(f"{i}:  {c}\t{hex(ord(c))}\tNFC?: {is_nfc}, name: {cname}")
+from collections import Counter
+
+
+# Space-like characters that should usually be plain spaces.
+NON_BREAKING_SPACES = {
+    '\u00a0': 'NO-BREAK SPACE',
+    '\u2007': 'FIGURE SPACE',
+    '\u202f': 'NARROW NO-BREAK SPACE',
+    '\u2060': 'WORD JOINER',
+    '\ufeff': 'ZERO WIDTH NO-BREAK SPACE',
+}
+# Control characters that are expected in text files.
+ALLOWED_CONTROLS = {'\t', '\n', '\r'}
+regex_ascii_control = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+
+
+def get_cluster(charstr, i):
+    """Return the base character and combining marks surrounding position i."""
+    start = i
+    while start > 0 and unicodedata.combining(charstr[start]):
+        start -= 1
+    end = i + 1
+    while end < len(charstr) and unicodedata.combining(charstr[end]):
+        end += 1
+    return charstr[start:end]
+
+def show_characters(charstr):
+    for i, c in enumerate(charstr):
+        cname = unicodedata.name(c, None)
+        cnfd = unicodedata.decomposition(c) or None
+        # A character is only NFC in the context of its combining sequence.
+        is_nfc = unicodedata.is_normalized('NFC', get_cluster(charstr, i))
+        print(f"{i}:  {c}\t{hex(ord(c))}\tNFC?: {is_nfc}, decomposition: {cnfd}, name: {cname}")
+
+def new_issue():
+    return {'count': 0, 'first': None}
+
+def add_issue(issues, key, line_num, col):
+    issue = issues.setdefault(key, new_issue())
+    issue['count'] += 1
+    if issue.get('first') is None:
+        issue['first'] = f"{line_num}:{col}"
+
+def audit_stream(stream):
+    """
+    Build a code-point histogram and collect encoding issues from a text
+    stream, keeping only one line in memory at a time.
+    """
+    histogram = Counter()
+    issues = {}
+    for line_num, line in enumerate(stream, 1):
+        histogram.update(line)
+        if line.isascii():
+            # Pure ASCII lines can only have control-character issues.
+            for m in regex_ascii_control.finditer(line):
+                add_issue(issues, f"control character: U+{ord(m.group()):04X}", line_num, m.start() + 1)
+            continue
+
+        # Normalization only needs checking on lines with non-ASCII text.
+        if not unicodedata.is_normalized('NFC', line):
+            nfc = unicodedata.normalize('NFC', line)
+            col = next((i for i, (a, b) in enumerate(zip(line, nfc)) if a != b), min(len(line), len(nfc))) + 1
+            add_issue(issues, 'not NFC', line_num, col)
+        for col, c in enumerate(line, 1):
+            if c.isascii() and c.isprintable():
+                continue
+            category = unicodedata.category(c)
+            if c in NON_BREAKING_SPACES:
+                add_issue(issues, f"non-breaking space: U+{ord(c):04X} {NON_BREAKING_SPACES.get(c)}", line_num, col)
+            elif category == 'Mn':
+                add_issue(issues, f"combining character: U+{ord(c):04X} {unicodedata.name(c, '')}", line_num, col)
+            elif category == 'Cc' and c not in ALLOWED_CONTROLS:
+                add_issue(issues, f"control character: U+{ord(c):04X}", line_num, col)
+            elif category == 'Cf':
+                add_issue(issues, f"format character: U+{ord(c):04X} {unicodedata.name(c, '')}", line_num, col)
+            elif c == '\ufffd':
+                add_issue(issues, "undecodable bytes (U+FFFD)", line_num, col)
+    return histogram, issues
+
+def print_audit(histogram, issues):
+    print(f"{'code point':10}\t{'count':>8}\tcat\tchar\tname")
+    for c in sorted(histogram.keys()):
+        category = unicodedata.category(c)
+        shown = c if c.isprintable() and category[0] not in 'MZ' else ' '
+        print(f"U+{ord(c):04X}    \t{histogram.get(c):8}\t{category}\t{shown}\t{unicodedata.name(c, '')}")
+    print()
+    if not issues:
+        print("No issues found.")
+        return
+    print(f"{'count':>8}\tfirst\tissue")
+    for key, issue in sorted(issues.items()):
+        print(f"{issue.get('count'):8}\t{issue.get('first')}\t{key}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('infile', nargs='?', help="file to read instead of STDIN")
+    parser.add_argument('-a', '--audit', action='store_true', help="summarize the whole input instead of listing each character")
+    args = parser.parse_args()
+
+    if args.infile:
+        f = open(args.infile, 'rb')
+    else:
+        f = sys.stdin.buffer
+    # Decode in buffered chunks; newline='' keeps \r visible to the audit.
+    stream = io.TextIOWrapper(f, encoding='utf-8', errors='replace', newline='')
+
+    if args.audit:
+        histogram, issues = audit_stream(stream)
+        print_audit(histogram, issues)
+    else:
+        show_characters(stream.read().rstrip('\n'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+"""
+Report every distinct word unknown to the Sango dictionary in an SFM or ODT
+file, with its frequency, verse references, and hunspell suggestions.
+"""
+
+import argparse
+import hs
+import json
+import memutils
+import odfutils
+import os
+import sfmutils
+import sys
+import textutils
+
+from pathlib import Path
+
+
+repo_root = Path(__file__).resolve().parents[0]
+dict_dir = repo_root / 'dict'
+cache_dir = repo_root / '.cache'
+lang_code = 'sg_CF'
+book = 'XXA'
+# Number of verse references listed per word in the report.
+max_refs = 10
+
+# Each worker process loads its own dictionary; HunSpell objects can't be
+#   passed between processes.
+worker_dic = None
+
+
+def init_worker(dir, lang_code):
+    global worker_dic
+    worker_dic = hs.get_hs_dic(dir, lang_code)
+
+def suggest_words(words):
+    return {w: worker_dic.suggest(w) for w in words}
+
+def get_dic_signature(dir, lang_code):
+    """Identify the dictionary version so that stale cached suggestions are dropped."""
+    sig = []
+    for suffix in ['.aff', '.dic']:
+        stat = (dir / f"{lang_code}{suffix}").stat()
+        sig.append(f"{stat.st_size}-{int(stat.st_mtime)}")
+    return '_'.join(sig)
+
+def load_cache(cache_file, signature):
+    if not cache_file.is_file():
+        return {}
+    try:
+        data = json.loads(cache_file.read_text())
+    except json.JSONDecodeError:
+        return {}
+    if data.get('signature') != signature:
+        return {}
+    return data.get('suggestions', {})
+
+def save_cache(cache_file, signature, suggestions):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    data = {'signature': signature, 'suggestions': suggestions}
+    cache_file.write_text(json.dumps(data, ensure_ascii=False))
+
+def iter_sfm_text(infile):
+    for i, chapter, verse, text in sfmutils.iter_verse_text(sfmutils.iter_lines(infile)):
+        yield sfmutils.format_ref(book, chapter, verse), text
+
+def iter_odt_text(infile):
+    doc = odfutils.load_doc(infile)
+    styles = odfutils.get_language_styles(doc, lang_code)
+    for chapter, verse, p, text in odfutils.iter_paragraph_refs(doc):
+        if p.getAttribute('stylename') in styles:
+            yield sfmutils.format_ref(book, chapter, verse), text
+
+def collect_unknown_words(refs_and_text, hs_dic):
+    """
+    Return {word: {'count': #, 'refs': {ref: None, ...}}} for words not in
+    hs_dic; refs is a dict so that it keeps document order without repeats.
+    Each distinct word is only looked up once.
+    """
+    known = {}
+    unknown = {}
+    for ref, text in refs_and_text:
+        for t in textutils.tokenize(text):
+            is_known = known.get(t)
+            if is_known is None:
+                is_known = hs.lookup_word(hs_dic, t)
+                known[t] = is_known
+            if is_known:
+                continue
+            entry = unknown.setdefault(t, {'count': 0, 'refs': {}})
+            entry['count'] += 1
+            entry['refs'][ref] = None
+    return unknown
+
+def get_suggestions(words, cached, jobs):
+    """Compute hunspell suggestions for uncached words in a process pool."""
+    todo = [w for w in words if w not in cached]
+    if not todo:
+        return cached
+    # multiprocessing is slow to import and not needed when all are cached.
+    from concurrent.futures import ProcessPoolExecutor
+    chunk_size = max(1, len(todo) // (jobs * 4))
+    chunks = [todo[i:i+chunk_size] for i in range(0, len(todo), chunk_size)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(dict_dir, lang_code)) as pool:
+        for result in pool.map(suggest_words, chunks):
+            cached.update(result)
+    return cached
+
+def format_report(unknown, suggestions):
+    lines = []
+    ordered = sorted(unknown.items(), key=lambda i: (-i[1].get('count'), i[0]))
+    for word, entry in ordered:
+        refs = list(entry.get('refs'))
+        refs_str = ', '.join(refs[:max_refs])
+        if len(refs) > max_refs:
+            refs_str += f", ... (+{len(refs) - max_refs})"
+        sugg_str = ', '.join(suggestions.get(word, []))
+        lines.append(f"{entry.get('count')}\t{word}\t{sugg_str}\t{refs_str}")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('infile', help="SFM or ODT file")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="number of suggestion worker processes")
+    parser.add_argument('--no-suggest', action='store_true', help="skip hunspell suggestions")
+    parser.add_argument('--mem-report', action='store_true', help="record peak memory per stage and show top allocation sites")
+    parser.add_argument('--mem-limit', type=float, metavar='MB', help="warn when a stage's peak memory goes over MB")
+    args = parser.parse_args()
+    mem = None
+    if args.mem_report or args.mem_limit:
+        mem = memutils.new_report(args.mem_limit)
+
+    # Ensure that input file exists.
+    infile = Path(args.infile)
+    if not infile.is_file():
+        print("Error: Input file does not exist.")
+        exit(1)
+    infile = infile.resolve()
+    suffix = infile.suffix.lower()
+
+    if suffix == '.odt':
+        refs_and_text = iter_odt_text(infile)
+    elif suffix in ['.sfm', '.usfm', '.txt']:
+        refs_and_text = iter_sfm_text(infile)
+    else:
+        print("Error: Need to pass an SFM or ODT file as the first argument.")
+        exit(1)
+
+    # Get hunspell dictionary.
+    hs_dic = hs.get_hs_dic(dict_dir, lang_code)
+    if not hs_dic:
+        print(f"Error: No {lang_code} dictionary found in {dict_dir}.")
+        exit(1)
+
+    with memutils.stage(mem, 'collect'):
+        unknown = collect_unknown_words(refs_and_text, hs_dic)
+
+    # Get suggestions, reusing those cached from earlier runs.
+    suggestions = {}
+    if not args.no_suggest and unknown:
+        cache_file = cache_dir / f"{lang_code}_suggestions.json"
+        signature = get_dic_signature(dict_dir, lang_code)
+        cached = load_cache(cache_file, signature)
+        jobs = args.jobs or os.cpu_count() or 1
+        with memutils.stage(mem, 'suggestions'):
+            suggestions = get_suggestions(list(unknown.keys()), cached, jobs)
+            save_cache(cache_file, signature, suggestions)
+
+    # Write out the report.
+    outfile = infile.with_name(f"{infile.stem}_{lang_code}_spelling.tsv")
+    header = "count\tword\tsuggestions\treferences"
+    outfile.write_text('\n'.join([header] + format_report(unknown, suggestions)) + '\n')
+
+    total = sum(e.get('count') for e in unknown.values())
+    print(f"{len(unknown)} distinct unknown words ({total} occurrences) written to {outfile}.")
+    memutils.print_report(mem)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,45 +7,53 @@ Split out text to multiple text files by language type.
 # References:
 #   https://github.com/eea/odfpy/wiki
 
-import re
-import shutil
-import string
 import sys
 
-from odf.opendocument import load
-from odf.opendocument import OpenDocumentText
-from odf.style import Style, TextProperties
-from odf.text import P
 from pathlib import Path
 
 import hs
+import irutils
+import lgutils
+import memutils
+import odfutils
+import textutils
 
 
-def get_paragraphs(doc):
-    # Create a list of word strings.
-    paragraphs = []
-    for p in doc.body.getElementsByType(P):
-        # Get text of each paragraph.
+def iter_paragraphs(doc):
+    # Yield the words of each paragraph; the language is not yet known.
+    for p in odfutils.get_text_paragraphs(doc):
         words = []
         for n in p.childNodes:
             try:
                 words.extend(n.data.split())
             except AttributeError:
                 pass
-        paragraphs.append(words)
-    return paragraphs
+        yield words, None
 
-def get_lines(text_file):
+def iter_lines(text_file):
+    # Yield the words of each line, reading one line at a time.
     with open(text_file) as f:
-        lines = f.readlines()
-    # Strip newlines.
-    lines = [p.strip().split() for p in lines[:]]
-    return lines
+        for line in f:
+            yield line.split(), None
+
+def iter_ir_paragraphs(ir_file, lang_codes):
+    # Yield the words and already-detected language of each IR paragraph.
+    for r in irutils.iter_records(ir_file):
+        lang_code = r.get('lang')
+        if lang_code not in lang_codes:
+            lang_code = None
+        yield r.get('text').split(), lang_code
 
 def determine_language(words, hs_dics, default_lang):
     lang_code = ''
-    regex_punctuation = re.compile(f'[{re.escape(string.punctuation)}]')
-    word_counts_by_lg = count_occurrences_by_lg(words, regex_punctuation, hs_dics)
+    token_counts = textutils.count_tokens(words)
+
+    # Cheap orthographic pre-pass; hunspell is only consulted when it's unsure.
+    lang_code, confidence = lgutils.guess_language(token_counts, hs_dics.keys())
+    if lang_code and confidence >= lgutils.CONFIDENCE_THRESHOLD:
+        return lang_code, 'orthography'
+
+    word_counts_by_lg = count_occurrences_by_lg(token_counts, hs_dics)
     total_words = word_counts_by_lg.pop('words')
     max_count = max(word_counts_by_lg.values())
     lang_codes = []
@@ -69,7 +77,7 @@ def determine_language(words, hs_dics, default_lang):
                 lang_code = 'en_US'
             else:
                 lang_code = default_lang
-    return lang_code
+    return lang_code, 'hunspell'
 
 def get_hs_dics(dir, lang_codes):
     hs_dics = {}
@@ -77,50 +85,93 @@ def get_hs_dics(dir, lang_codes):
         hs_dics[lc] = hs.get_hs_dic(dir, lc)
     return hs_dics
 
-def count_occurrences_by_lg(text_words, regex, hs_dics):
+def count_occurrences_by_lg(token_counts, hs_dics):
     counts = {}
     counts['words'] = 0
     for lang_code in hs_dics.keys():
         counts[lang_code] = 0
-    for t in text_words:
-        counts['words'] += 1
-        t = t.lower()
+    # Look up each distinct token once per language, weighted by its frequency.
+    for t, n in token_counts.items():
+        counts['words'] += n
         for lang_code, d in hs_dics.items():
             if not d:
                 pass
             elif hs.lookup_word(d, t):
-                counts[lang_code] += 1
+                counts[lang_code] += n
+    return counts
+
+def new_counts(lang_codes):
+    counts = {
+        'total': 0,
+        'empty': 0,
+        'languages': {l: 0 for l in lang_codes},
+        'stages': {'ir': 0, 'orthography': 0, 'hunspell': 0, 'viterbi': 0},
+    }
     return counts
 
-def print_summary(results, hs_dics):
+def write_unit(outhandles, outfiles, lang_code, text):
+    """
+    Append text to the output file for lang_code, opening it on first use.
+    """
+    f = outhandles.get(lang_code)
+    if f is None:
+        f = open(outfiles.get(lang_code), 'w')
+        outhandles[lang_code] = f
+    else:
+        f.write('\n')
+    f.write(text)
+
+def split_units(parts, hs_dics, default_lang, outfiles, viterbi=False):
+    """
+    Determine the language of each unit (list of words) that doesn't already
+    have one and append it to the matching output file. Return the summary
+    counts. With viterbi, all units are read first and their languages are
+    decoded as one sequence.
+    """
+    counts = new_counts(outfiles.keys())
+    outhandles = {}
+    if viterbi:
+        # numpy is only needed for this mode.
+        import hmmutils
+        parts = list(parts)
+        dics = {l: d for l, d in hs_dics.items() if l != 'unknown'}
+        decoded = iter(hmmutils.decode_languages([words for words, lang_code in parts], dics))
+    try:
+        for words, lang_code in parts:
+            decoded_lang = next(decoded) if viterbi else None
+            counts['total'] += 1
+            if not words:
+                counts['empty'] += 1
+                continue
+            if lang_code:
+                stage = 'ir'
+            elif viterbi:
+                lang_code, stage = decoded_lang, 'viterbi'
+            else:
+                lang_code, stage = determine_language(words, hs_dics, default_lang)
+            if not lang_code:
+                lang_code = 'unknown'
+            write_unit(outhandles, outfiles, lang_code, ' '.join(words))
+            counts['languages'][lang_code] += 1
+            counts['stages'][stage] += 1
+    finally:
+        for f in outhandles.values():
+            f.close()
+    return counts
+
+def print_summary(counts, unit):
     """
     Print summary statistics about number of paragraphs found for each language code.
     """
-    total_p_ct = len(results)
-    blank_p_ct = len([r for r in results if r[1] == None])
     sp = ' '*3
-    print(f"\n{total_p_ct} paragraphs in the document:\n{sp}{blank_p_ct} are empty")
-    p_ct_unknown = total_p_ct - blank_p_ct
-    p_ct_by_lang = {}
-    for lang_code in hs_dics.keys():
-        ct = len([r for r in results if r[1] == lang_code])
-        p_ct_by_lang[lang_code] = ct
-        p_ct_unknown -= ct
+    print(f"\n{counts.get('total')} {unit}s in the document:\n{sp}{counts.get('empty')} are empty")
+    for lang_code, ct in counts.get('languages').items():
         print(f"{sp}{ct} are {lang_code}")
-    # for r in results:
-    #     print(r[0])
-    print(f"{sp}{p_ct_unknown} are unknown.")
 
-def print_results(results, hs_dics, start=0, end=-1):
-    """
-    Print language code and initial paragraph text for the given range.
-    """
-    print()
-    total_p_ct = len(results)
-    #digit_ct = len(total_p_ct)
-    for i, r in enumerate(results[start:end]):
-        if r[1] is not None:
-            print(f"{i+1+start}. {r[1]}: {r[0]}")
+    # Show which stage decided each non-empty paragraph.
+    print(f"\n{unit.title()}s decided by stage:")
+    for stage, ct in counts.get('stages').items():
+        print(f"{sp}{ct} by {stage}")
 
 def main():
     # Define global variables.
@@ -130,13 +181,17 @@ def main():
     default_lang = languages[0]
     repo_root = Path(__file__).resolve().parents[0]
     dict_dir = repo_root / 'dict'
+    args, mem = memutils.pop_args(sys.argv)
+    # Decode the whole file's language sequence at once.
+    viterbi = '--viterbi' in args
+    args = [a for a in args if a != '--viterbi']
 
     # Ensure that a file was passed as an argument.
-    suffix = Path(sys.argv[1]).suffix.lower()
-    if len(sys.argv) > 1 and suffix == '.odt' or suffix == '.txt':
-        infile = Path(sys.argv[1])
+    suffix = Path(args[1]).suffix.lower() if len(args) > 1 else ''
+    if suffix in ['.odt', '.txt', irutils.IR_SUFFIX]:
+        infile = Path(args[1])
     else:
-        print("Error: Need to pass an ODT or TXT file as the first argument.")
+        print("Error: Need to pass an ODT, TXT, or IR (.jsonl) file as the first argument.")
         exit(1)
 
     # Ensure that file exists.
@@ -146,53 +201,40 @@ def main():
         print("Error: Input file does not exist.")
         exit(1)
 
-    # Create outfiles dictionary.
+    # Create outfiles dictionary; files are opened as text is found for them.
     languages.append('unknown')
     outfiles = {l: infile.with_name(f"{infile.stem}_{l}.txt") for l in languages}
-    outtext = {l: [] for l in languages}
 
     # Get hunspell dictionaries.
-    hs_dics = get_hs_dics(dict_dir, languages)
+    with memutils.stage(mem, 'dictionaries'):
+        hs_dics = get_hs_dics(dict_dir, languages)
 
-    # Load file content; set dependent variables.
+    # Set up a reader for the file content; set dependent variables.
     if suffix == '.odt':
         file_type = 'ODT'
         unit = 'paragraph'
-        end = '\n'
-        doc = load(infile)
-        parts = get_paragraphs(doc)
+        with memutils.stage(mem, 'load'):
+            doc = odfutils.load_doc(infile)
+        parts = iter_paragraphs(doc)
     elif suffix == '.txt':
         file_type = 'TXT'
         unit = 'line'
-        end = '\n'
-        parts = get_lines(infile)
+        parts = iter_lines(infile)
+    elif suffix == irutils.IR_SUFFIX:
+        file_type = 'IR'
+        unit = 'paragraph'
+        parts = iter_ir_paragraphs(infile, languages)
     else:
-        print("Error: not an ODT or TXT file.")
+        print("Error: not an ODT, TXT, or IR file.")
         exit(1)
 
-    # Determine the language of each unit.
-    results = []
-    for words in parts:
-        if not words:
-            continue
-        # print(words)
-        first_words = ' '.join(words[:4])
-        # last_lang = None
-        lang_code = determine_language(words, hs_dics, default_lang)
-        if not lang_code:
-            lang_code = 'unknown'
-        outtext[lang_code].append(' '.join(words))
-        results.append([f"{first_words} ...", lang_code])
-
-    # Write outtext to outfiles.
-    for l, f in outfiles.items():
-        if outtext[l]:
-            f.write_text('\n'.join(outtext[l]))
+    # Determine the language of each unit and write it out immediately.
+    with memutils.stage(mem, 'split'):
+        counts = split_units(parts, hs_dics, default_lang, outfiles, viterbi)
 
     # Print summary data.
-    # print_results(results, hs_dics, start=0, end=-1)
-    print_summary(results, hs_dics)
-
+    print_summary(counts, unit)
+    memutils.print_report(mem)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+"""
+Remove tracked changes from an ODT file by accepting (default) or rejecting
+all of them, and turn off change tracking. content.xml is streamed in one
+pass; all other package members are copied as they are.
+"""
+
+import argparse
+import odfutils
+import shutil
+import zipfile
+
+from pathlib import Path
+from xml.sax.handler import ContentHandler
+
+
+CHANGE_MARKERS = {'text:change', 'text:change-start', 'text:change-end'}
+CHANGE_TYPES = {'text:insertion', 'text:deletion', 'text:format-change'}
+PARAGRAPHS = {'text:p', 'text:h'}
+
+
+class TrackedChangesHandler(ContentHandler):
+    """
+    Copy content.xml to out, leaving out the text:tracked-changes list and
+    the change markers in the body.
+
+    accept: inserted text is kept and deleted text stays deleted.
+    reject: text between the change-start/end markers of an insertion is
+    dropped, and deleted text (kept in the tracked-changes list, which comes
+    before the body) is put back at its text:change marker. Format changes
+    keep the current formatting either way; ODF doesn't store the old one.
+    """
+    def __init__(self, out, reject=False):
+        super().__init__()
+        from xml.sax.saxutils import XMLGenerator
+        self.gen = XMLGenerator(out, encoding='utf-8', short_empty_elements=True)
+        self.reject = reject
+        # Input elements still open: True if written out, False if dropped,
+        #   None for change markers.
+        self.inp = []
+        # Output elements still open, as (name, attrs).
+        self.out = []
+        # Open insertions whose text is being dropped (reject only).
+        self.active = set()
+        # Tracked-changes list parsing.
+        self.tracked_depth = 0
+        # Open changed regions' ids; a region can be nested in deleted content.
+        self.regions = []
+        self.info_depth = 0
+        self.capture = None
+        self.capture_id = None
+        self.types = {}
+        self.deleted = {}
+        self.counts = {t: 0 for t in CHANGE_TYPES}
+
+    def startDocument(self):
+        self.gen.startDocument()
+
+    def endDocument(self):
+        while self.out:
+            self.gen.endElement(self.out.pop()[0])
+        self.gen.endDocument()
+
+    def start_tracked(self, name, attrs):
+        """Record each change's type and, for deletions, the deleted content."""
+        self.tracked_depth += 1
+        if self.info_depth:
+            self.info_depth += 1
+        elif name == 'text:changed-region':
+            self.regions.append(attrs.get('text:id') or attrs.get('xml:id'))
+        elif name in CHANGE_TYPES:
+            # A nested region's text stays in the outer deletion's content,
+            #   but its wrapper elements don't.
+            region_id = self.regions[-1] if self.regions else None
+            self.types.setdefault(region_id, name)
+            self.counts[name] += 1
+            if name == 'text:deletion' and self.capture is None:
+                self.capture = self.deleted.setdefault(region_id, [])
+                self.capture_id = region_id
+        elif name == 'office:change-info':
+            self.info_depth = 1
+        elif self.capture is not None:
+            self.capture.append(('start', name, dict(attrs)))
+
+    def end_tracked(self, name):
+        self.tracked_depth -= 1
+        if self.info_depth:
+            self.info_depth -= 1
+        elif name == 'text:changed-region':
+            self.regions.pop()
+        elif name in CHANGE_TYPES:
+            if name == 'text:deletion' and self.regions and self.regions[-1] == self.capture_id:
+                self.capture = None
+                self.capture_id = None
+        elif self.capture is not None:
+            self.capture.append(('end', name, None))
+
+    def close_extra(self):
+        """Close output elements left open by dropped text that spanned paragraphs."""
+        while len(self.out) > len(self.inp):
+            self.gen.endElement(self.out.pop()[0])
+
+    def startElement(self, name, attrs):
+        if self.tracked_depth:
+            self.start_tracked(name, attrs)
+            return
+        if name == 'text:tracked-changes':
+            self.tracked_depth = 1
+            return
+        if name in CHANGE_MARKERS:
+            self.inp.append(None)
+            self.handle_marker(name, attrs.get('text:change-id'))
+            return
+        if self.active:
+            self.inp.append(False)
+            return
+        self.close_extra()
+        if name == 'office:text' and 'text:track-changes' in attrs:
+            attrs = {k: v for k, v in attrs.items() if k != 'text:track-changes'}
+        self.gen.startElement(name, attrs)
+        self.inp.append(True)
+        self.out.append((name, attrs))
+
+    def endElement(self, name):
+        if self.tracked_depth:
+            self.end_tracked(name)
+            return
+        state = self.inp.pop()
+        if state is None or self.active:
+            return
+        self.close_extra()
+
+    def characters(self, content):
+        if self.tracked_depth:
+            if self.capture is not None and not self.info_depth:
+                self.capture.append(('chars', None, content))
+            return
+        if not self.active:
+            self.gen.characters(content)
+
+    def ignorableWhitespace(self, content):
+        self.characters(content)
+
+    def handle_marker(self, name, change_id):
+        if not self.reject:
+            return
+        change_type = self.types.get(change_id)
+        if name == 'text:change-start' and change_type == 'text:insertion':
+            self.active.add(change_id)
+        elif name == 'text:change-end':
+            self.active.discard(change_id)
+        elif name == 'text:change' and change_type == 'text:deletion' and not self.active:
+            self.restore_deletion(self.deleted.get(change_id, []))
+
+    def write_events(self, events):
+        for kind, name, data in events:
+            if name in CHANGE_MARKERS:
+                continue
+            if kind == 'start':
+                self.gen.startElement(name, data)
+            elif kind == 'end':
+                self.gen.endElement(name)
+            else:
+                self.gen.characters(data)
+
+    def restore_deletion(self, events):
+        """
+        Write deleted content back at the current position. The first deleted
+        paragraph's text joins the current paragraph; each following one
+        splits it, as when the text was first typed.
+        """
+        para_idx = None
+        for i, (name, attrs) in enumerate(self.out):
+            if name in PARAGRAPHS:
+                para_idx = i
+        if para_idx is None:
+            self.write_events(events)
+            return
+
+        # Group the events by top-level element.
+        elements = []
+        depth = 0
+        for e in events:
+            if depth == 0 and e[0] == 'start':
+                elements.append((e[1], e[2], []))
+            elif depth == 0 and e[0] == 'chars':
+                # Whitespace between deleted paragraphs.
+                continue
+            if e[0] == 'start':
+                depth += 1
+            elif e[0] == 'end':
+                depth -= 1
+            if depth > 0 and not (depth == 1 and e[0] == 'start'):
+                elements[-1][2].append(e)
+
+        for i, (name, attrs, inner) in enumerate(elements):
+            if name not in PARAGRAPHS:
+                self.write_events([('start', name, attrs)] + inner + [('end', name, None)])
+                continue
+            if i > 0:
+                # Split the paragraph, reopening any spans around the marker.
+                closed = self.out[para_idx:]
+                for n, a in reversed(closed):
+                    self.gen.endElement(n)
+                # The last part also holds the rest of the current paragraph,
+                #   so it keeps that paragraph's style.
+                if i == len(elements) - 1:
+                    name, attrs = closed[0]
+                reopened = [(name, attrs)] + closed[1:]
+                for n, a in reopened:
+                    self.gen.startElement(n, a)
+                self.out[para_idx:] = reopened
+            self.write_events(inner)
+
+
+def strip_tracked_changes(infile, outfile, reject=False):
+    """Write infile to outfile without tracked changes; return the change counts."""
+    # The SAX modules are slow to import; keep them off the usage-error path.
+    from defusedxml.sax import make_parser
+    tmpfile = outfile.with_name(f".{outfile.name}.tmp")
+    with zipfile.ZipFile(infile) as zin, zipfile.ZipFile(tmpfile, 'w') as zout:
+        for info in zin.infolist():
+            if info.filename != 'content.xml':
+                odfutils.copy_raw_member(zin, zout, info)
+                continue
+            zi = zipfile.ZipInfo(info.filename, info.date_time)
+            zi.compress_type = zipfile.ZIP_DEFLATED
+            zi.external_attr = info.external_attr
+            with zin.open(info) as src, zout.open(zi, 'w', force_zip64=True) as dst:
+                handler = TrackedChangesHandler(dst, reject)
+                parser = make_parser()
+                parser.setContentHandler(handler)
+                parser.parse(src)
+    shutil.move(tmpfile, outfile)
+    return handler.counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('infile', help="ODT file")
+    parser.add_argument('-r', '--reject', action='store_true', help="reject all changes instead of accepting them")
+    parser.add_argument('-o', '--outfile', help="output file [default: INFILE_no-tracked-changes.odt]")
+    args = parser.parse_args()
+
+    infile = Path(args.infile)
+    if infile.suffix != '.odt':
+        print("Error: Need to pass an ODT file as the first argument.")
+        exit(1)
+    if not infile.is_file():
+        print("Error: Input file does not exist.")
+        exit(1)
+    infile = infile.resolve()
+    if args.outfile:
+        outfile = Path(args.outfile).resolve()
+    else:
+        outfile = infile.with_name(f"{infile.stem}_no-tracked-changes{infile.suffix}")
+    if outfile == infile:
+        print("Error: Output file can't be the same as the input file.")
+        exit(1)
+
+    counts = strip_tracked_changes(infile, outfile, args.reject)
+    action = 'rejected' if args.reject else 'accepted'
+    print(f"{counts.get('text:insertion')} insertions, {counts.get('text:deletion')} deletions, and {counts.get('text:format-change')} format changes {action}.")
+    print(f"Written to {outfile}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+import sys
+
+from pathlib import Path
+
+
+# The scripts and *utils modules live at the repo root.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,50 @@
+import diffutils
+
+
+def apply_opcodes(a, b, opcodes):
+    """Rebuild b from a and the opcodes, checking that they cover both sides in order."""
+    out = []
+    i0 = j0 = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i0, j0)
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+            out.extend(a[i1:i2])
+        else:
+            out.extend(b[j1:j2])
+        i0, j0 = i2, j2
+    assert (i0, j0) == (len(a), len(b))
+    return out
+
+def get_paragraphs(texts):
+    return [{'p': f"p{i}", 'hash': diffutils.hash_paragraph(t)} for i, t in enumerate(texts)]
+
+def test_moved_block():
+    a = list('ABCDEFG')
+    b = list('AEFBCDG')
+    opcodes = diffutils.patience_diff(a, b)
+    assert apply_opcodes(a, b, opcodes) == b
+    # The longer run stays in place; the shorter one is deleted and re-inserted.
+    assert ('equal', 1, 4, 3, 6) in opcodes
+    assert [o[0] for o in opcodes] == ['equal', 'insert', 'equal', 'delete', 'equal']
+
+def test_repeated_paragraphs():
+    # Blank and repeated headings aren't unique, so they can't anchor on their own.
+    a = ['P001', 'Panel 1', '', 'one', '', 'Panel 1', 'two']
+    b = ['P001', 'Panel 1', '', 'one', '', 'new', '', 'Panel 1', 'two']
+    opcodes = diffutils.patience_diff(a, b)
+    assert apply_opcodes(a, b, opcodes) == b
+    assert [o for o in opcodes if o[0] != 'equal'] == [('insert', 5, 5, 5, 7)]
+
+def test_unchanged_paragraphs_ignore_whitespace():
+    old = get_paragraphs(['P001', 'Panel 1', 'Text  here', 'gone', 'end'])
+    new = get_paragraphs(['P001', 'Panel 1', 'Text here', 'end', 'added'])
+    unchanged = diffutils.get_unchanged_paragraphs(old, new)
+    assert unchanged == {'p0': 'p0', 'p1': 'p1', 'p2': 'p2', 'p3': 'p4'}
+    kinds = [kind for kind, o, n in diffutils.iter_changes(old, new)]
+    assert sorted(kinds) == ['deleted', 'inserted']
+
+def test_empty_sides():
+    assert diffutils.patience_diff([], []) == []
+    assert diffutils.patience_diff([], ['a']) == [('insert', 0, 0, 0, 1)]
+    assert diffutils.patience_diff(['a'], []) == [('delete', 0, 1, 0, 0)]
@@ -0,0 +1,43 @@
+import scriptutils
+import shutil
+
+from pathlib import Path
+
+
+harvest_lexicon = scriptutils.import_script('harvest-lexicon')
+dict_dir = Path(__file__).resolve().parents[1] / 'dict'
+
+
+def test_txt_file_is_in_sort_key_order():
+    words = (dict_dir / 'sg_CF.txt').read_text(encoding='utf-8').rstrip('\n').split('\n')
+    assert sorted(words, key=harvest_lexicon.get_txt_sort_key) == words
+
+def test_merge_words_keeps_txt_order(tmp_path):
+    dic_file = tmp_path / 'sg_CF.dic'
+    txt_file = tmp_path / 'sg_CF.txt'
+    shutil.copy(dict_dir / 'sg_CF.dic', dic_file)
+    shutil.copy(dict_dir / 'sg_CF.txt', txt_file)
+    old_words = txt_file.read_text(encoding='utf-8').rstrip('\n').split('\n')
+
+    added = harvest_lexicon.merge_words(['bèkpa', 'Zuzu', 'ba-bâ'], dic_file, txt_file)
+    assert added == ['ba-bâ', 'bèkpa', 'zuzu']
+    words = txt_file.read_text(encoding='utf-8').rstrip('\n').split('\n')
+    assert [w for w in words if w not in added] == old_words
+    # "è" sorts after "z", so bèkpa goes after the by- words.
+    assert words.index('bèkpa') == words.index('bèchetera') + 1
+    assert words.index('zuzu') == words.index('zuzi') + 1
+    dic_lines = dic_file.read_text(encoding='utf-8').split('\n')
+    assert int(dic_lines[0]) == len(dic_lines) - 1 == len(words)
+
+def test_dic_words_follow_aff_ignore():
+    ignore = harvest_lexicon.get_aff_ignore(dict_dir / 'sg_CF.aff')
+    assert ignore == '-'
+    known = harvest_lexicon.get_dic_words(dict_dir / 'sg_CF.dic', ignore)
+    counts = {
+        'a-ange': [2, 2, 'XXA 1:1'],
+        'aange': [2, 2, 'XXA 1:2'],
+        'ba-ba': [2, 2, 'XXA 1:3'],
+        'zzyzx': [2, 2, 'XXA 1:4'],
+    }
+    candidates = harvest_lexicon.get_candidates([counts], known, 1, ignore)
+    assert [c[0] for c in candidates] == ['zzyzx']
@@ -0,0 +1,23 @@
+import lgutils
+
+from collections import Counter
+
+
+LANG_CODES = ['en_US', 'fr_FR', 'sg_CF']
+
+
+def get_token_counts(text):
+    return Counter(text.lower().replace(',', '').replace('.', '').split())
+
+def test_french_circumflex_is_not_sango():
+    token_counts = get_token_counts("Même sur l'île, être prêt en août à Noël, côte à côte.")
+    scores = lgutils.score_orthography(token_counts, LANG_CODES)
+    assert scores['sg_CF'] == 0
+    lang_code, confidence = lgutils.guess_language(token_counts, LANG_CODES)
+    assert lang_code == 'fr_FR'
+
+def test_sango_stop_words_and_markers():
+    token_counts = get_token_counts("Mbi yeke na kûê tî âla, sô ayeke nzönî.")
+    lang_code, confidence = lgutils.guess_language(token_counts, LANG_CODES)
+    assert lang_code == 'sg_CF'
+    assert confidence >= lgutils.CONFIDENCE_THRESHOLD
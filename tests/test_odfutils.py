@@ -0,0 +1,66 @@
+import odfutils
+import pytest
+import zipfile
+
+from odf.opendocument import OpenDocumentText
+from odf.text import P
+
+
+def make_odt(path):
+    doc = OpenDocumentText()
+    for text in ['P001', 'Panel 1', 'Some text.']:
+        doc.text.addElement(P(text=text))
+    doc.save(str(path))
+    # An extra stored member, like the images in the drafts.
+    with zipfile.ZipFile(path, 'a') as z:
+        z.writestr(zipfile.ZipInfo('Pictures/x.png'), b'\x89PNG' + bytes(range(256)))
+    return path
+
+@pytest.fixture(params=['raw', 'fallback'])
+def copy_mode(request, monkeypatch):
+    if request.param == 'fallback':
+        monkeypatch.setattr(odfutils, 'can_copy_raw', lambda zin, zout: False)
+    return request.param
+
+def test_save_doc_round_trip(tmp_path, copy_mode):
+    infile = make_odt(tmp_path / 'in.odt')
+    outfile = tmp_path / 'out.odt'
+    doc = odfutils.load_doc(infile)
+    for p in odfutils.get_text_paragraphs(doc):
+        p.setAttribute('stylename', 'en_US')
+    odfutils.save_doc(doc, infile, outfile)
+
+    with zipfile.ZipFile(infile) as zin, zipfile.ZipFile(outfile) as zout:
+        assert zout.testzip() is None
+        first = zout.infolist()[0]
+        assert first.filename == 'mimetype'
+        assert first.compress_type == zipfile.ZIP_STORED
+        assert zout.namelist() == zin.namelist()
+        for name in zin.namelist():
+            if name not in odfutils.REGENERATED_MEMBERS:
+                assert zout.read(name) == zin.read(name)
+                assert zout.getinfo(name).compress_type == zin.getinfo(name).compress_type
+
+    reloaded = odfutils.load_doc(outfile)
+    paragraphs = odfutils.get_text_paragraphs(reloaded)
+    assert [odfutils.get_paragraph_text(p) for p in paragraphs] == ['P001', 'Panel 1', 'Some text.']
+    assert {p.getAttribute('stylename') for p in paragraphs} == {'en_US'}
+
+def test_index_follows_tree_changes(tmp_path):
+    doc = odfutils.load_doc(make_odt(tmp_path / 'in.odt'))
+    assert len(odfutils.get_text_paragraphs(doc)) == 3
+
+    # addElement() is tracked by odfpy, so the index is rebuilt.
+    doc.text.addElement(P(text='Added.'))
+    paragraphs = odfutils.get_text_paragraphs(doc)
+    assert [odfutils.get_paragraph_text(p) for p in paragraphs][-1] == 'Added.'
+    assert odfutils.get_paragraph_info(doc, paragraphs[-1])[0] == 3
+
+    # insertBefore() isn't, but an unknown paragraph triggers a rebuild.
+    first = P(text='First.')
+    doc.text.insertBefore(first, paragraphs[0])
+    assert odfutils.get_paragraph_info(doc, first)[0] == 0
+    assert not odfutils.is_comment_paragraph(doc, first)
+
+    with pytest.raises(ValueError):
+        odfutils.get_paragraph_info(doc, P(text='Not in the document.'))
@@ -0,0 +1,58 @@
+import io
+import scriptutils
+import xml.etree.ElementTree as ET
+
+
+odt_2_sfm = scriptutils.import_script('odt-2-sfm')
+sfm_2_usx = scriptutils.import_script('sfm-2-usx')
+
+
+def get_eab_sfm(records):
+    """Return the EAB SFM that odt-2-sfm.py writes for the given IR-like records."""
+    cleanup_rules = odt_2_sfm.compile_rules(odt_2_sfm.CLEANUP_RULES)
+    sfm_rules = odt_2_sfm.get_sfm_rules('Panel')
+    out = io.StringIO()
+    outputs = {
+        'en_US': {
+            'file': out,
+            'cleanup': cleanup_rules,
+            'cleanup_state': odt_2_sfm.new_state(cleanup_rules),
+            'sfm': sfm_rules,
+            'sfm_state': odt_2_sfm.new_state(sfm_rules),
+            'lines': 0,
+        },
+    }
+    out.write("\\id XXA - Action Bible (en-US)\n")
+    odt_2_sfm.write_sfm(records, outputs)
+    return out.getvalue()
+
+def convert(sfm, tmp_path):
+    infile = tmp_path / 'in.SFM'
+    outfile = tmp_path / 'out.usx'
+    infile.write_text(sfm, encoding='utf-8')
+    counts = sfm_2_usx.convert_file(infile, outfile)
+    return counts, ET.parse(outfile).getroot()
+
+def test_inline_verse_after_chapter(tmp_path):
+    sfm = get_eab_sfm([
+        {'text': 'P012 Panel 1 Text here', 'lang': 'en_US'},
+        {'text': 'Panel 2 more', 'lang': 'en_US'},
+    ])
+    assert '\\c 012 \\v 1 Text here\n' in sfm
+
+    counts, usx = convert(sfm, tmp_path)
+    assert counts.get('verses') == 2
+    assert usx.findall('.//char/verse') == []
+    assert usx.findall('.//char') == []
+    sids = [v.get('sid') for v in usx.iter('verse') if v.get('sid')]
+    eids = [v.get('eid') for v in usx.iter('verse') if v.get('eid')]
+    assert sids == ['XXA 12:1', 'XXA 12:2']
+    assert eids == sids
+    para = usx.find('para')
+    assert ''.join(para.itertext()).split() == ['Text', 'here', 'more']
+
+def test_inline_verse_keeps_char_styles(tmp_path):
+    counts, usx = convert("\\id XXA\n\\c 1\n\\p a \\v 2 b \\nd Lord\\nd* c\n", tmp_path)
+    assert counts.get('verses') == 1
+    assert [v.get('sid') for v in usx.iter('verse') if v.get('sid')] == ['XXA 1:2']
+    assert usx.find('.//char').text == 'Lord'
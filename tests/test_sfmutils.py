@@ -0,0 +1,27 @@
+import sfmutils
+
+
+def test_inline_verses_on_chapter_lines():
+    # odt-2-sfm.py writes the first verse of a chapter on the chapter line.
+    lines = [
+        '\\id XXA - Action Bible (en-US)',
+        '\\c 012 \\v 1 Text here',
+        '\\v 2 a \\v 3 b',
+        '\\p more \\v 4-5 bridged',
+        '\\c 013',
+        '\\s Heading',
+        '\\v 1 last',
+    ]
+    records = [(c, v, t.strip()) for i, c, v, t in sfmutils.iter_verse_text(lines)]
+    assert records == [
+        (12, 1, 'Text here'),
+        (12, 2, 'a'),
+        (12, 3, 'b'),
+        (12, 3, 'more'),
+        (12, 4, 'bridged'),
+        (13, 0, 'Heading'),
+        (13, 1, 'last'),
+    ]
+
+def test_split_verses_ignores_other_v_markers():
+    assert sfmutils.split_verses('x \\vp 4 y \\v 5 z') == ('x \\vp 4 y ', [('5', 'z')])
@@ -0,0 +1,108 @@
+import io
+import scriptutils
+import xml.etree.ElementTree as ET
+import xml.sax
+
+
+strip_tracked_changes = scriptutils.import_script('strip-tracked-changes')
+
+NAMESPACES = {
+    'office': 'urn:oasis:names:tc:opendocument:xmlns:office:1.0',
+    'text': 'urn:oasis:names:tc:opendocument:xmlns:text:1.0',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+}
+CHANGE_INFO = '<office:change-info><dc:creator>A</dc:creator><dc:date>2024-01-01T00:00:00</dc:date></office:change-info>'
+
+
+def region(change_id, change_type, content=''):
+    return f'<text:changed-region text:id="{change_id}"><text:{change_type}>{CHANGE_INFO}{content}</text:{change_type}></text:changed-region>'
+
+def strip(tracked, body, reject=False):
+    """Run the handler on a content.xml with the given tracked changes and body; return the output root and counts."""
+    xmlns = ' '.join(f'xmlns:{k}="{v}"' for k, v in NAMESPACES.items())
+    content = (
+        f'<office:document-content {xmlns}><office:body><office:text text:track-changes="true">'
+        f'<text:tracked-changes>{tracked}</text:tracked-changes>{body}'
+        '</office:text></office:body></office:document-content>'
+    )
+    out = io.BytesIO()
+    handler = strip_tracked_changes.TrackedChangesHandler(out, reject)
+    xml.sax.parseString(content.encode('utf-8'), handler)
+    return ET.fromstring(out.getvalue()), handler.counts
+
+def get_body_texts(root):
+    text = root.find('office:body/office:text', NAMESPACES)
+    return [''.join(p.itertext()) for p in text.findall('text:p', NAMESPACES)]
+
+def get_note_texts(root):
+    return [''.join(p.itertext()) for p in root.iterfind('.//office:annotation/text:p', NAMESPACES)]
+
+def test_insertion_and_tracking_removed():
+    tracked = region('ct1', 'insertion')
+    body = '<text:p>Hello <text:change-start text:change-id="ct1"/>big <text:change-end text:change-id="ct1"/>world</text:p>'
+    for reject, expected in [(False, ['Hello big world']), (True, ['Hello world'])]:
+        root, counts = strip(tracked, body, reject)
+        assert get_body_texts(root) == expected
+        assert counts.get('text:insertion') == 1
+        assert root.find('.//text:tracked-changes', NAMESPACES) is None
+        assert root.find('.//text:change-start', NAMESPACES) is None
+        text = root.find('office:body/office:text', NAMESPACES)
+        assert f"{{{NAMESPACES.get('text')}}}track-changes" not in text.attrib
+
+def test_deletion_spanning_paragraphs():
+    tracked = region('ct1', 'deletion', '<text:p text:style-name="P2">one</text:p><text:p text:style-name="P2">two </text:p>')
+    body = '<text:p text:style-name="P1">Start <text:change text:change-id="ct1"/>end</text:p>'
+    root, counts = strip(tracked, body)
+    assert get_body_texts(root) == ['Start end']
+    assert counts.get('text:deletion') == 1
+
+    root, counts = strip(tracked, body, reject=True)
+    assert get_body_texts(root) == ['Start one', 'two end']
+    # The rest of the paragraph keeps its own style.
+    styles = [p.get(f"{{{NAMESPACES.get('text')}}}style-name") for p in root.iter(f"{{{NAMESPACES.get('text')}}}p")]
+    assert styles == ['P1', 'P1']
+
+def test_insertion_spanning_paragraphs():
+    tracked = region('ct1', 'insertion')
+    body = (
+        '<text:p>a<text:change-start text:change-id="ct1"/>b</text:p>'
+        '<text:p>c</text:p>'
+        '<text:p>d<text:change-end text:change-id="ct1"/>e</text:p>'
+    )
+    root, counts = strip(tracked, body)
+    assert get_body_texts(root) == ['ab', 'c', 'de']
+    root, counts = strip(tracked, body, reject=True)
+    assert get_body_texts(root) == ['ae']
+
+def test_nested_changed_region():
+    # A region inside another's deleted content: both are counted, and the
+    #   inner region's wrapper elements aren't restored with the text.
+    tracked = region('ct1', 'deletion', '<text:p>old ' + region('ct2', 'insertion') + 'text </text:p>') + region('ct3', 'insertion')
+    body = (
+        '<text:p>Keep <text:change text:change-id="ct1"/>'
+        '<text:change-start text:change-id="ct3"/>new <text:change-end text:change-id="ct3"/>this</text:p>'
+    )
+    root, counts = strip(tracked, body)
+    assert get_body_texts(root) == ['Keep new this']
+    assert counts == {'text:insertion': 2, 'text:deletion': 1, 'text:format-change': 0}
+
+    root, counts = strip(tracked, body, reject=True)
+    assert get_body_texts(root) == ['Keep old text this']
+    assert root.find('.//text:changed-region', NAMESPACES) is None
+    assert root.find('.//text:insertion', NAMESPACES) is None
+
+def test_change_marks_in_annotation():
+    tracked = region('ct1', 'insertion') + region('ct2', 'deletion', '<text:p>gone</text:p>')
+    body = (
+        '<text:p>Hi <office:annotation><dc:creator>A</dc:creator>'
+        '<text:p>note <text:change-start text:change-id="ct1"/>added<text:change-end text:change-id="ct1"/>'
+        ' <text:change text:change-id="ct2"/></text:p>'
+        '</office:annotation>there</text:p>'
+    )
+    root, counts = strip(tracked, body)
+    assert get_note_texts(root) == ['note added ']
+    assert get_body_texts(root) == ['Hi Anote added there']
+
+    root, counts = strip(tracked, body, reject=True)
+    assert get_note_texts(root) == ['note  gone']
+    assert get_body_texts(root) == ['Hi Anote  gonethere']
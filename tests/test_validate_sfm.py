@@ -0,0 +1,33 @@
+import scriptutils
+
+from test_sfm_2_usx import get_eab_sfm
+
+
+validate_sfm = scriptutils.import_script('validate-sfm')
+
+
+def get_codes(sfm):
+    return [(i.get('line'), i.get('code')) for i in validate_sfm.validate_lines(sfm.splitlines())]
+
+def test_odt_2_sfm_output_is_valid():
+    sfm = get_eab_sfm([
+        {'text': 'P012 Panel 1 Text here', 'lang': 'en_US'},
+        {'text': 'Panel 2 more', 'lang': 'en_US'},
+        {'text': 'P013 Panel 1 New chapter', 'lang': 'en_US'},
+        {'text': 'Panel 2 and more', 'lang': 'en_US'},
+    ])
+    assert '\\c 013 \\v 1 New chapter\n' in sfm
+    assert get_codes(sfm) == []
+
+def test_mid_line_verses():
+    sfm = '\n'.join([
+        '\\id XXA',
+        '\\c 1 \\v 1 one',
+        '\\p more \\v 2 two \\v 4 four',
+        '\\v 3 three \\v 2 again',
+    ])
+    assert get_codes(sfm) == [
+        (3, 'verse-gap'),
+        (4, 'verse-order'),
+        (4, 'duplicate-verse'),
+    ]
@@ -0,0 +1,53 @@
+import re
+import string
+import unicodedata
+
+from collections import Counter
+
+
+# ASCII punctuation plus the typographic quotes, dashes, and ellipses found in
+#   the drafts. Only leading and trailing punctuation is stripped from tokens,
+#   so word-internal hyphens and apostrophes (e.g. "a-ange") are kept.
+PUNCTUATION = string.punctuation + '«»‘’‚‛“”„‟‹›–—―…¡¿·'
+regex_edge_punctuation = re.compile(f'^[{re.escape(PUNCTUATION)}]+|[{re.escape(PUNCTUATION)}]+$')
+regex_word = re.compile(r'\S+')
+
+
+def normalize(text):
+    """Return text in NFC form so that Sango diacritics match the dictionaries."""
+    return unicodedata.normalize('NFC', text)
+
+def normalize_token(word):
+    """Return the lowercased NFC form of a word with edge punctuation removed."""
+    return regex_edge_punctuation.sub('', normalize(word)).lower()
+
+def tokenize(words):
+    """
+    Yield normalized tokens from a list of raw words (or a text string).
+    Tokens that contain no letters (numbers, lone punctuation) are skipped.
+    """
+    if isinstance(words, str):
+        words = words.split()
+    for w in words:
+        t = normalize_token(w)
+        if t and any(c.isalpha() for c in t):
+            yield t
+
+def count_tokens(words):
+    """Return a Counter of distinct normalized tokens and their frequencies."""
+    return Counter(tokenize(words))
+
+def fold_diacritics(text):
+    """Return text without combining marks, e.g. "sêse" -> "sese"."""
+    decomposed = unicodedata.normalize('NFD', text)
+    return unicodedata.normalize('NFC', ''.join(c for c in decomposed if not unicodedata.combining(c)))
+
+def iter_token_offsets(text):
+    """Yield (token, offset) for each normalized token in an NFC text string."""
+    for m in regex_word.finditer(text):
+        w = m.group()
+        t = normalize_token(w)
+        if t and any(c.isalpha() for c in t):
+            # Offset of the token itself, after any stripped leading punctuation.
+            lead = len(w) - len(w.lstrip(PUNCTUATION))
+            yield t, m.start() + lead
@@ -7,20 +7,43 @@ Programmatically set language type by paragraph in an ODT file.
 # References:
 #   https://github.com/eea/odfpy/wiki
 
+import diffutils
 import hs
+import lgutils
+import memutils
 import odfutils
-import re
-import shutil
-import string
+import scriptutils
 import sys
+import textutils
 
 from pathlib import Path
 
 
-def determine_language(words, last_text_lang, hs_dics):
+# Stages that can decide a paragraph's language.
+STAGES = ['unchanged', 'orthography', 'hunspell', 'viterbi']
+
+
+def determine_language(words, last_text_lang, hs_dics, threshold=None):
+    """
+    Return the paragraph's language code, the stage that decided it, that
+    stage's confidence (0 to 1), and the evidence used: {'orthography':
+    {lang_code: stop-word and marker hits}, 'dictionary': {lang_code: words
+    found by hunspell}}; 'dictionary' is only there if hunspell decided.
+    Orthographic guesses below threshold [lgutils.CONFIDENCE_THRESHOLD] go
+    to hunspell.
+    """
+    if threshold is None:
+        threshold = lgutils.CONFIDENCE_THRESHOLD
     lang_code = ''
-    regex_punctuation = re.compile(f'[{re.escape(string.punctuation)}]')
-    word_counts_by_lg = count_occurrences_by_lg(words, regex_punctuation, hs_dics)
+    token_counts = textutils.count_tokens(words)
+
+    # Cheap orthographic pre-pass; hunspell is only consulted when it's unsure.
+    scores = lgutils.score_orthography(token_counts, hs_dics.keys())
+    lang_code, confidence = lgutils.guess_from_scores(scores)
+    if lang_code and confidence >= threshold:
+        return lang_code, 'orthography', confidence, {'orthography': scores}
+
+    word_counts_by_lg = count_occurrences_by_lg(token_counts, hs_dics)
     total_words = word_counts_by_lg.pop('words')
     max_count = max(word_counts_by_lg.values())
     lang_codes = []
@@ -44,7 +67,11 @@ def determine_language(words, last_text_lang, hs_dics):
                 lang_code = 'en_US'
             else:
                 lang_code = lang_codes[0]
-    return lang_code
+    # Share of the words that the chosen dictionary knows; a tie splits it.
+    confidence = 0.0
+    if lang_code in word_counts_by_lg and total_words:
+        confidence = word_counts_by_lg.get(lang_code) / total_words / max(lc_length, 1)
+    return lang_code, 'hunspell', confidence, {'orthography': scores, 'dictionary': word_counts_by_lg}
 
 def get_hs_dics(dir, lang_codes):
     hs_dics = {}
@@ -52,26 +79,61 @@ def get_hs_dics(dir, lang_codes):
         hs_dics[lc] = hs.get_hs_dic(dir, lc)
     return hs_dics
 
-def count_occurrences_by_lg(text_words, regex, hs_dics):
+def count_occurrences_by_lg(token_counts, hs_dics):
     counts = {}
     counts['words'] = 0
     for lang_code in hs_dics.keys():
         counts[lang_code] = 0
-    for t in text_words:
-        counts['words'] += 1
-        t = t.lower()
+    # Look up each distinct token once per language, weighted by its frequency.
+    for t, n in token_counts.items():
+        counts['words'] += n
         for lang_code, d in hs_dics.items():
             if not d:
                 pass
             elif hs.lookup_word(d, t):
-                counts[lang_code] += 1
+                counts[lang_code] += n
     return counts
 
-def update_paragraphs_styles(doc, hs_dics):
-    results = []
+def get_paragraph_words(p):
+    words = []
+    for n in p.childNodes:
+        try:
+            words.extend(n.data.split())
+        except AttributeError:
+            pass
+    return words
+
+def get_known_languages(old_doc, doc, lang_codes):
+    """
+    Return {paragraph: language code} for the paragraphs of doc that are
+    unchanged since old_doc (an earlier tagged revision), taken from their
+    styles in old_doc.
+    """
+    style_languages = odfutils.get_style_languages(old_doc)
+    unchanged = diffutils.get_unchanged_paragraphs(diffutils.get_paragraphs(old_doc), diffutils.get_paragraphs(doc))
+    known = {}
+    for p, old_p in unchanged.items():
+        lang_code = style_languages.get(old_p.getAttribute('stylename'))
+        if lang_code in lang_codes:
+            known[p] = lang_code
+    return known
+
+def update_paragraphs_styles(doc, hs_dics, viterbi=False, known=None):
+    """
+    Set each text paragraph's style to its language and return the doc and a
+    ResultStore of the results. Paragraphs in known (see get_known_languages)
+    keep the given language without being checked.
+    """
+    # numpy (for the result columns) is only imported once there's work.
+    import resultutils
+
+    known = known or {}
+    results = resultutils.ResultStore(hs_dics.keys(), STAGES)
+    if viterbi:
+        return update_paragraphs_styles_viterbi(doc, hs_dics, known, results)
     last_text_lang = None
     ct = 0
-    for p in doc.body.getElementsByType(odfutils.P):
+    for p in odfutils.get_text_paragraphs(doc):
         # Show progress dots: 1 for every X paragraphs.
         x = 50
         ct += 1
@@ -80,55 +142,96 @@ def update_paragraphs_styles(doc, hs_dics):
             sys.stdout.flush()
 
         # Determine language code of paragraph.
-        words = []
-        for n in p.childNodes:
-            try:
-                words.extend(n.data.split())
-            except AttributeError:
-                pass
+        words = get_paragraph_words(p)
+        length = len(' '.join(words))
         if words:
-            first_words = ' '.join(words[:4])
-            lang_code = determine_language(words, last_text_lang, hs_dics)
+            if p in known:
+                lang_code, stage, confidence, evidence = known.get(p), 'unchanged', 1.0, None
+            else:
+                lang_code, stage, confidence, evidence = determine_language(words, last_text_lang, hs_dics)
             if lang_code:
                 p.setAttribute('stylename', lang_code)
+            results.append(length, lang_code, stage, confidence, evidence)
         else:
             lang_code = None
-            first_words = None
+            results.append(length)
 
         last_text_lang = lang_code
-        results.append([f"{first_words} ...", lang_code])
     print()
     return doc, results
 
+def update_paragraphs_styles_viterbi(doc, hs_dics, known, results):
+    """
+    Score every paragraph first, then decode the language sequence of the
+    whole document at once, so that neighbouring paragraphs inform each other.
+    The confidence of a decoded paragraph is its own probability of the
+    decoded language, before the neighbours are taken into account.
+    Paragraphs in known aren't scored; they keep their language and still
+    inform their neighbours.
+    """
+    # numpy is only needed for this mode.
+    import hmmutils
+    import numpy as np
+
+    lang_codes = list(hs_dics.keys())
+    paragraphs = odfutils.get_text_paragraphs(doc)
+    word_lists = [get_paragraph_words(p) for p in paragraphs]
+    # Unchanged paragraphs aren't scored again; their labels are fixed.
+    fixed = {i: lang_codes.index(known.get(p)) for i, p in enumerate(paragraphs) if p in known}
+    indexes, ortho, hits, labels = hmmutils.decode_word_lists(word_lists, hs_dics, fixed)
+    scores = hmmutils.combine_evidence(ortho, hits)
+    probabilities = np.exp(hmmutils.get_log_emissions(scores)) if len(indexes) else scores
+    rows = {i: k for k, i in enumerate(indexes)}
+    for i, (p, words) in enumerate(zip(paragraphs, word_lists)):
+        length = len(' '.join(words))
+        if not words:
+            results.append(length)
+            continue
+        k = rows.get(i)
+        lang_code = lang_codes[labels[k]]
+        p.setAttribute('stylename', lang_code)
+        if p in known:
+            results.append(length, lang_code, 'unchanged', 1.0)
+            continue
+        evidence = {'orthography': dict(zip(lang_codes, ortho[k]))}
+        if not np.isnan(hits[k]).any():
+            evidence['dictionary'] = dict(zip(lang_codes, hits[k]))
+        results.append(length, lang_code, 'viterbi', probabilities[k, labels[k]], evidence)
+    return doc, results
+
 def print_summary(results, hs_dics):
     """
     Print summary statistics about number of paragraphs found for each language code.
     """
-    total_p_ct = len(results)
-    blank_p_ct = len([r for r in results if r[1] == None])
+    import resultutils
+
+    lang_counts = resultutils.get_language_counts(results)
     sp = ' '*3
-    print(f"\n{total_p_ct} paragraphs in the document:\n{sp}{blank_p_ct} are empty")
-    p_ct_unknown = total_p_ct - blank_p_ct
-    p_ct_by_lang = {}
+    print(f"\n{len(results)} paragraphs in the document:\n{sp}{lang_counts.get('empty')} are empty")
     for lang_code in hs_dics.keys():
-        ct = len([r for r in results if r[1] == lang_code])
-        p_ct_by_lang[lang_code] = ct
-        p_ct_unknown -= ct
-        print(f"{sp}{ct} are {lang_code}")
-    # for r in results:
-    #     print(r[0])
-    print(f"{sp}{p_ct_unknown} are unknown.")
-
-def print_results(results, hs_dics, start=0, end=-1):
+        print(f"{sp}{lang_counts.get(lang_code)} are {lang_code}")
+    print(f"{sp}{lang_counts.get('unknown')} are unknown.")
+
+    # Show which stage decided each non-empty paragraph.
+    print(f"\nParagraphs decided by stage:")
+    for stage, ct in resultutils.get_stage_counts(results).items():
+        print(f"{sp}{ct} by {stage}")
+    resultutils.print_confidence_histogram(results)
+
+def print_results(results, doc, start=0, end=-1):
     """
     Print language code and initial paragraph text for the given range.
     """
     print()
-    total_p_ct = len(results)
-    #digit_ct = len(total_p_ct)
-    for i, r in enumerate(results[start:end]):
-        if r[1] is not None:
-            print(f"{i+1+start}. {r[1]}: {r[0]}")
+    paragraphs = odfutils.get_text_paragraphs(doc)
+    lang = results.columns().get('lang')
+    end = len(results) if end < 0 else end
+    for i in range(start, end):
+        if lang[i] >= 0:
+            # Number paragraphs as in the document, counting those in comments.
+            ordinal, parents = odfutils.get_paragraph_info(doc, paragraphs[i])
+            words = get_paragraph_words(paragraphs[i])
+            print(f"{ordinal+1}. {results.lang_codes[lang[i]]}: {' '.join(words[:4])} ...")
 
 def main():
     # Define global variables.
@@ -137,10 +240,21 @@ def main():
     languages = ['en_US', 'fr_FR', 'sg_CF']
     repo_root = Path(__file__).resolve().parents[0]
     dict_dir = repo_root / 'dict'
+    args, mem = memutils.pop_args(sys.argv)
+    # Decode the whole document's language sequence at once.
+    viterbi = '--viterbi' in args
+    args = [a for a in args if a != '--viterbi']
+    # Only check the paragraphs that changed since an earlier tagged revision.
+    args, since = diffutils.pop_args(args)
+    # Save the per-paragraph results as CSV or NPZ.
+    args, results_file = scriptutils.pop_option(args, '--results')
+    if results_file is not None and Path(results_file).suffix.lower() not in ['.csv', '.npz']:
+        print("Error: --results needs a .csv or .npz file name.")
+        exit(1)
 
     # Ensure that a file was passed as an argument.
-    if len(sys.argv) > 1 and Path(sys.argv[1]).suffix == '.odt':
-        infile = Path(sys.argv[1])
+    if len(args) > 1 and Path(args[1]).suffix == '.odt':
+        infile = Path(args[1])
     else:
         print("Error: Need to pass an ODT file as the first argument.")
         exit(1)
@@ -149,12 +263,13 @@ def main():
     if infile.is_file() and infile.suffix == '.odt':
         infile = infile.resolve()
         # Load content.
-        doc = odfutils.load_doc(infile)
+        with memutils.stage(mem, 'load'):
+            doc = odfutils.load_doc(infile)
     else:
         print("Error: Input file does not exist.")
         exit(1)
 
-    # Copy infile to outfile, asking for confirmation if it exists.
+    # Set outfile, asking for confirmation if it exists.
     langstr = f"__{'__'.join(languages)}"
     outfile = infile.with_name(f"{infile.stem}{langstr}{infile.suffix}")
     if outfile.is_file():
@@ -165,22 +280,36 @@ def main():
         except IndexError:
             # User hit [Enter] with no text. Accept default overwrite.
             pass
-    shutil.copyfile(infile, outfile)
 
     # Get hunspell dictionaries.
-    hs_dics = get_hs_dics(dict_dir, languages)
+    with memutils.stage(mem, 'dictionaries'):
+        hs_dics = get_hs_dics(dict_dir, languages)
+
+    # Carry over the languages of paragraphs that haven't changed.
+    known = None
+    if since:
+        with memutils.stage(mem, 'diff'):
+            known = get_known_languages(odfutils.load_doc(since.resolve()), doc, hs_dics.keys())
+        print(f"\n{len(known)} unchanged paragraphs keep their language from {since}.")
 
     # Update XML tree.
     print(f"\nDetermining the language of each paragraph...")
-    doc = odfutils.update_autostyles(doc, hs_dics.keys())
-    doc, results = update_paragraphs_styles(doc, hs_dics)
+    with memutils.stage(mem, 'tagging'):
+        doc = odfutils.update_autostyles(doc, hs_dics.keys())
+        doc, results = update_paragraphs_styles(doc, hs_dics, viterbi, known)
 
-    # Write out the updated file.
-    doc.save(outfile)
+    # Write out the updated file, raw-copying unchanged package members.
+    with memutils.stage(mem, 'save'):
+        odfutils.save_doc(doc, infile, outfile)
 
     # Print summary data.
     print_summary(results, hs_dics)
-    # print_results(results, hs_dics, start=0, end=-1)
+    if results_file:
+        import resultutils
+        resultutils.write_results(results, Path(results_file))
+        print(f"\nResults written to {results_file}.")
+    # print_results(results, doc, start=0, end=-1)
+    memutils.print_report(mem)
 
 
 if __name__ == '__main__':
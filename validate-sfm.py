@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+Check SFM files for structural problems in one pass and list each one with
+its line number: text before \\id, unknown markers, bad, duplicate, or
+out-of-order chapter and verse numbers, verse gaps, and empty paragraphs.
+Verse markers are checked wherever they are in a line, including the
+"\\c 012 \\v 1 Text" lines that odt-2-sfm.py writes.
+Exits with status 1 if any errors are found.
+"""
+
+import argparse
+import json
+import sfmutils
+
+from pathlib import Path
+
+
+def new_issue(issues, line_no, level, code, message):
+    issues.append({'line': line_no, 'level': level, 'code': code, 'message': message})
+
+def close_paragraph(state, issues):
+    para = state.get('paragraph')
+    if para and not para.get('has_text'):
+        new_issue(issues, para.get('line'), 'warning', 'empty-paragraph', f"Empty \\{para.get('marker')} paragraph.")
+    state['paragraph'] = None
+
+def check_chapter(state, issues, line_no, num):
+    if not num.isdigit():
+        new_issue(issues, line_no, 'error', 'bad-chapter-number', f"Chapter number \"{num}\" is not a number.")
+        # Verse numbers can't be checked until the next good chapter.
+        state['chapter'] = None
+        return
+    chapter = int(num)
+    if chapter in state.get('chapters'):
+        new_issue(issues, line_no, 'error', 'duplicate-chapter', f"Chapter {chapter} already started on line {state.get('chapters').get(chapter)}.")
+    elif state.get('last_chapter') is not None and chapter < state.get('last_chapter'):
+        new_issue(issues, line_no, 'error', 'chapter-order', f"Chapter {chapter} comes after chapter {state.get('last_chapter')}.")
+    state['chapters'].setdefault(chapter, line_no)
+    state['chapter'] = chapter
+    state['last_chapter'] = max(chapter, state.get('last_chapter') or 0)
+    state['verses'] = {}
+    state['last_verse'] = 0
+
+def check_verse(state, issues, line_no, num):
+    m = sfmutils.regex_verse_number.match(num)
+    if not m:
+        new_issue(issues, line_no, 'error', 'bad-verse-number', f"Verse number \"{num}\" is not a number or range.")
+        return
+    if state.get('last_chapter') is None:
+        new_issue(issues, line_no, 'error', 'verse-before-chapter', f"Verse {num} comes before the first chapter.")
+        return
+    if state.get('chapter') is None:
+        return
+    first = int(m.group(1))
+    last = int(num.split('-')[-1])
+    ch = state.get('chapter')
+    verses = state.get('verses')
+    last_verse = state.get('last_verse')
+    duplicates = [v for v in range(first, last + 1) if v in verses]
+    for v in duplicates:
+        new_issue(issues, line_no, 'error', 'duplicate-verse', f"Verse {ch}:{v} already used on line {verses.get(v)}.")
+    if not duplicates and first <= last_verse:
+        new_issue(issues, line_no, 'error', 'verse-order', f"Verse {ch}:{first} comes after verse {ch}:{last_verse}.")
+    elif first > last_verse + 1:
+        missing = f"{last_verse + 1}" if first == last_verse + 2 else f"{last_verse + 1}-{first - 1}"
+        new_issue(issues, line_no, 'warning', 'verse-gap', f"Verse {ch}:{missing} missing.")
+    for v in range(first, last + 1):
+        verses.setdefault(v, line_no)
+    state['last_verse'] = max(last, last_verse)
+
+def check_inline_verses(state, issues, line_no, text):
+    """Check the verse markers inside a line's text; return the text without them."""
+    head, verses = sfmutils.split_verses(text)
+    for num, piece in verses:
+        check_verse(state, issues, line_no, num)
+    return ' '.join([head] + [piece for num, piece in verses])
+
+def check_markers(issues, line_no, text):
+    for m in sfmutils.regex_inline_marker.finditer(text):
+        base = sfmutils.get_base_marker(m.group(2))
+        if base not in sfmutils.KNOWN_MARKERS:
+            new_issue(issues, line_no, 'error', 'unknown-marker', f"Unknown marker \\{m.group(2)}.")
+
+def validate_lines(lines):
+    """Return the list of issues found in an iterable of SFM lines."""
+    issues = []
+    state = {
+        'seen_id': False,
+        'before_id': None,
+        'chapters': {},
+        'chapter': None,
+        'last_chapter': None,
+        'verses': {},
+        'last_verse': 0,
+        'paragraph': None,
+    }
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        marker, text = sfmutils.parse_line(line)
+        if not state.get('seen_id'):
+            if marker == 'id':
+                state['seen_id'] = True
+                if state.get('before_id'):
+                    new_issue(issues, state.get('before_id'), 'error', 'text-before-id', "Text or markers before \\id.")
+                continue
+            state['before_id'] = state.get('before_id') or line_no
+        if marker is None:
+            # Continuation text of the current paragraph or verse.
+            text = check_inline_verses(state, issues, line_no, text)
+            if state.get('paragraph'):
+                state['paragraph']['has_text'] = True
+            check_markers(issues, line_no, text)
+            continue
+
+        base = sfmutils.get_base_marker(marker)
+        if base not in sfmutils.KNOWN_MARKERS:
+            new_issue(issues, line_no, 'error', 'unknown-marker', f"Unknown marker \\{marker}.")
+        if marker == 'id':
+            new_issue(issues, line_no, 'error', 'duplicate-id', "Second \\id line.")
+        elif marker == 'c':
+            close_paragraph(state, issues)
+            num, text = sfmutils.split_number(text)
+            check_chapter(state, issues, line_no, num)
+        elif marker == 'v':
+            num, text = sfmutils.split_number(text)
+            check_verse(state, issues, line_no, num)
+        elif base in sfmutils.PARAGRAPH_MARKERS:
+            close_paragraph(state, issues)
+            state['paragraph'] = {'line': line_no, 'marker': marker, 'has_text': False}
+        text = check_inline_verses(state, issues, line_no, text)
+        if text.strip():
+            if state.get('paragraph'):
+                state['paragraph']['has_text'] = True
+            check_markers(issues, line_no, text)
+    close_paragraph(state, issues)
+    if not state.get('seen_id'):
+        new_issue(issues, 1, 'error', 'missing-id', "No \\id line found.")
+    issues.sort(key=lambda i: i.get('line'))
+    return issues
+
+def print_issues(infile, issues):
+    for i in issues:
+        print(f"{infile}:{i.get('line')}: {i.get('level')}: {i.get('message')} [{i.get('code')}]")
+    errors = sum(1 for i in issues if i.get('level') == 'error')
+    print(f"{infile}: {errors} errors, {len(issues) - errors} warnings.")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('infiles', nargs='+', help="SFM files")
+    parser.add_argument('-j', '--json', action='store_true', help="print the issues as JSON")
+    parser.add_argument('-q', '--quiet', action='store_true', help="don't list warnings")
+    args = parser.parse_args()
+
+    results = {}
+    for f in args.infiles:
+        infile = Path(f)
+        if not infile.is_file():
+            print(f"Error: {infile} does not exist.")
+            exit(1)
+        issues = validate_lines(sfmutils.iter_lines(infile))
+        if args.quiet:
+            issues = [i for i in issues if i.get('level') == 'error']
+        results[str(infile)] = issues
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for infile, issues in results.items():
+            print_issues(infile, issues)
+
+    if any(i.get('level') == 'error' for issues in results.values() for i in issues):
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
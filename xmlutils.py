@@ -32,3 +32,27 @@ def build_notes_xml(user, comments):
 
     xml_str = root.toprettyxml(indent="  ")
     return xml_str
+
+def read_notes_xml(infile):
+    """
+    Read a Paratext Notes XML file into the user name and a list of comment
+    dicts in the form taken by build_notes_xml.
+    """
+    from defusedxml import minidom as safe_minidom
+
+    root = safe_minidom.parse(str(infile))
+    user = ''
+    comments = []
+    for c_xml in root.getElementsByTagName('Comment'):
+        user = c_xml.getAttribute('User') or user
+        c = {
+            'Thread': c_xml.getAttribute('Thread'),
+            'VerseRef': c_xml.getAttribute('VerseRef'),
+            'Date': c_xml.getAttribute('Date'),
+        }
+        for ch in c_xml.childNodes:
+            if ch.nodeType != ch.ELEMENT_NODE:
+                continue
+            c[ch.tagName] = ''.join(t.data for t in ch.childNodes if t.nodeType == t.TEXT_NODE)
+        comments.append(c)
+    return user, comments